@@ -1,14 +1,17 @@
 import os
-import asyncio
+import math
 import streamlit as st
 from dotenv import load_dotenv
 
 from openai import OpenAI
-from agents import Agent, Runner, function_tool
 
-from src.utils import extract_text_from_pdf, extract_receipt_info
 from src.database.local_database import ReceiptDatabase
-from datetime import datetime
+from src.database.query_guard import GuardedQueryRunner
+from src.extraction.pdf import extract_pdf_content
+from src.extraction.cache import ExtractionCache
+from src.extraction.batch import BatchReceiptExtractor
+from src.extraction.jobs import ExtractionJobQueue
+from src.chatbot.receipt_agent import build_receipt_agent, iter_agent_events
 
 
 assert load_dotenv(), "Failed to load .env file"
@@ -30,122 +33,154 @@ st.markdown("This chatbot extracts important information from your food delivery
 # Get OpenAI client
 client = get_openai_client()
 
-# Initialize receipt database
-receipt_database = ReceiptDatabase(db_path="data/receipts.db")
-schema = receipt_database.get_schema()
-st.json(schema, expanded=False)
 
-AGENT_PROMPT = """
-You are an AI assistant that helps users with information extracted from their food delivery receipts. Use the tools available to you to answer questions about the receipt data.
-Here is the schema of the receipt database you can query:
-{schema}
+# Shared by every session in this process: one database writer, one query cache, one agent
+@st.cache_resource
+def get_receipt_database() -> ReceiptDatabase:
+    return ReceiptDatabase(db_path="data/receipts.db")
+
+
+@st.cache_resource
+def get_query_runner() -> GuardedQueryRunner:
+    # Agent SQL runs under a time/row budget and repeated queries are served from cache until the next write
+    return GuardedQueryRunner(get_receipt_database(), max_rows=200, time_limit=5.0)
+
+
+@st.cache_resource
+def get_extraction_cache() -> ExtractionCache:
+    # Cache of previous extractions so re-uploaded receipts skip the LLM call
+    return ExtractionCache(db_path="data/extraction_cache.db")
+
 
-Current time: {current_time}
+@st.cache_resource
+def get_extraction_queue() -> ExtractionJobQueue:
+    # Vision requests run on shared background workers, so uploads from every session return immediately
+    extractor = BatchReceiptExtractor(client, cache=get_extraction_cache())
+    return ExtractionJobQueue(extractor, database=get_receipt_database(), max_workers=4)
 
-When answering questions, refer to the relevant fields in the database schema to provide accurate information. You can use the current time to provide context for time-based queries or comparisons.
-"""
 
+@st.cache_data(max_entries=32)
+def get_pdf_preview(file_bytes: bytes) -> tuple[str, int]:
+    # The fragment reruns every second while jobs are pending, so each PDF is only parsed once
+    try:
+        content = extract_pdf_content(file_bytes)
+    except Exception as e:
+        # A corrupt PDF fails its job too, which shows the error; there is just no preview
+        print(f"Could not preview PDF: {e}")
+        return "", 0
+    return content.text, len(content.images)
 
-# Tool definition for the agent
-@function_tool
-def run_query(query: str) -> str:
-    return receipt_database.execute_query(query)
 
+@st.cache_resource
+def get_receipt_agent():
+    # The schema only changes through migrations at startup, so the instructions stay identical
+    return build_receipt_agent(get_query_runner(), get_receipt_database().get_schema())
 
-agent = Agent(
-    name="Agent-Receipt-Chatbot",
-    instructions=AGENT_PROMPT.format(schema=schema, current_time=datetime.now().isoformat()),
-    tools=[run_query],
-)
 
-async def run_agent(user_input: str):
-    """Runs the OpenAI Agent with the given user input."""
-    result = await Runner.run(agent, user_input)
-    return result.final_output
+# Initialize receipt database
+receipt_database = get_receipt_database()
+schema = receipt_database.get_schema()
+st.json(schema, expanded=False)
+
+extraction_queue = get_extraction_queue()
+agent = get_receipt_agent()
 
 # Tabs for upload/extract and chat
 tab_chat, tab_insert = st.tabs(["Chat with Receipt", "Upload & Extract"])
 
 # Upload & Extract Tab
 with tab_insert:
-    # Upload receipt file
-    uploaded_file = st.file_uploader(
-        "Upload your food receipt", 
+    # Upload receipt files
+    uploaded_files = st.file_uploader(
+        "Upload your food receipts",
         type=["png", "jpg", "jpeg", "pdf"],
         help="Supported formats: PNG, JPG, JPEG, PDF",
+        accept_multiple_files=True,
         key="receipt_uploader"  # Add unique key for better session handling
     )
 
-    if uploaded_file is not None:
-        st.success("File uploaded successfully!")
-        uploaded_file_type = "pdf" if uploaded_file.name.lower().endswith(".pdf") else "image"
-        
-        # Display the uploaded image
-        if uploaded_file_type == "image":
-            st.image(uploaded_file, caption="Uploaded Receipt", use_column_width=True)
-        else:
-            st.info("PDF file uploaded. Preview not available.")
-        
-    else:
-        st.info("📤 Please upload a food receipt to start chatting.")
-
-    # Extract receipt information
-    receipt_data = st.session_state.get("receipt_data", None)
-    extract = st.button("Extract Receipt Information")
-    if extract or (receipt_data is None and uploaded_file is not None):
-        # Extract receipt information
-        with st.spinner("🔍 Analyzing your receipt..."):
-            try:
-                if uploaded_file_type == "image":
-                    # Get file bytes with error handling
-                    file_bytes = uploaded_file.getvalue()
-                    if len(file_bytes) == 0:
-                        st.error("❌ Uploaded file is empty. Please try uploading again.")
-                        st.stop()
-                    receipt_data = extract_receipt_info(client, file_bytes)
-                else:
-                    # Get file bytes with error handling for PDF
-                    file_bytes = uploaded_file.getvalue()
-                    if len(file_bytes) == 0:
-                        st.error("❌ Uploaded PDF is empty. Please try uploading again.")
-                        st.stop()
-                    text = extract_text_from_pdf(file_bytes)
-                    st.write("Extracted Text from PDF:")
-                    st.write(text)
-                    receipt_data = extract_receipt_info(client, text)
-
-                st.session_state["receipt_data"] = receipt_data
-                st.success("✅ Receipt analysis completed!")
-                
-            except Exception as e:
-                st.error(f"❌ Error processing file: {str(e)}")
-                st.error("This might be due to a session issue. Please try uploading the file again.")
-                # Clear the problematic data
-                if "receipt_data" in st.session_state:
-                    del st.session_state["receipt_data"]
+    # Each upload is queued once and extracted in the background; the page reruns on every interaction
+    extraction_jobs = st.session_state.setdefault("extraction_jobs", {})
+    for uploaded_file in uploaded_files or []:
+        if uploaded_file.file_id in extraction_jobs:
+            continue
+        file_bytes = uploaded_file.getvalue()
+        if len(file_bytes) == 0:
+            st.error(f"❌ {uploaded_file.name} is empty. Please try uploading again.")
+            continue
+        extraction_jobs[uploaded_file.file_id] = extraction_queue.submit(uploaded_file.name, file_bytes)
+
+    if not uploaded_files:
+        st.info("📤 Please upload food receipts to start chatting.")
     st.divider()
 
     # Display extracted receipt information
     st.title("Receipt Analysis Results")
-    if receipt_data:
-        # st.write(receipt_data)
-        st.write(receipt_data.to_dict())
-
-        # Insert into database
-        if st.button("Store Receipt in Local Database"):
-            with st.spinner("💾 Storing receipt data..."):
-                res = receipt_database.insert_receipt(receipt_data)
-                if res:
-                    st.success("✅ Receipt data stored successfully!")
+    jobs_pending = any(not job.finished for job in extraction_queue.jobs(list(extraction_jobs.values())))
+
+    # Only this fragment reruns while polling, so the rest of the page stays responsive
+    @st.fragment(run_every=1.0 if jobs_pending else None)
+    def show_extraction_jobs():
+        jobs = extraction_queue.jobs(list(extraction_jobs.values()))
+        if not jobs:
+            st.info("No receipt data extracted yet.")
+            return
+
+        # Uploads still in the uploader, by job id, for previews
+        uploads = {extraction_jobs[f.file_id]: f for f in uploaded_files or [] if f.file_id in extraction_jobs}
+
+        for job in jobs:
+            with st.expander(f"{job.name}: {job.status} ({job.elapsed:.1f}s)", expanded=job.status == "done" and not job.stored):
+                uploaded_file = uploads.get(job.id)
+                if uploaded_file is not None and not uploaded_file.name.lower().endswith(".pdf"):
+                    st.image(uploaded_file, caption="Uploaded Receipt", use_column_width=True)
+                elif uploaded_file is not None:
+                    pdf_text, scanned_pages = get_pdf_preview(uploaded_file.getvalue())
+                    if pdf_text.strip():
+                        st.write("Extracted Text from PDF:")
+                        st.write(pdf_text)
+                    if scanned_pages:
+                        st.info(f"{scanned_pages} page(s) without a text layer are sent to the vision model as images.")
+
+                if job.status == "failed":
+                    st.error(f"❌ Error processing file: {job.error}")
+                elif job.status != "done":
+                    st.info("🔍 Analyzing your receipt...")
                 else:
-                    st.error("❌ Failed to store receipt data.")
-    else:
-        st.info("No receipt data extracted yet.")
+                    st.write(job.receipt.to_dict())
+                    if job.stored:
+                        st.success("✅ Receipt data stored successfully!")
+                    elif st.button("Store Receipt in Local Database", key=f"store_{job.id}"):
+                        with st.spinner("💾 Storing receipt data..."):
+                            try:
+                                # False means another rerun stored it first, or the job is gone
+                                stored = extraction_queue.store(job.id) or getattr(extraction_queue.get(job.id), "stored", False)
+                            except Exception as e:
+                                st.error(f"❌ Failed to store receipt data: {e}")
+                            else:
+                                if stored:
+                                    st.success("✅ Receipt data stored successfully!")
+                                else:
+                                    st.error("❌ Failed to store receipt data.")
+
+        # Once everything is in, rerun the page to stop polling and refresh the stored receipts
+        if jobs_pending and all(job.finished for job in jobs):
+            st.rerun()
+
+    show_extraction_jobs()
     st.divider()
 
     # Show all stored receipts
     st.title("Stored Receipts in Local Database")
-    receipts = receipt_database.execute_query("SELECT * FROM receipts as r RIGHT JOIN receipt_items as ri ON r.id = ri.receipt_id")
+    # Only one page of rows is loaded per rerun, however large the table grows
+    page_size = 100
+    total_items = receipt_database.execute_query("SELECT COUNT(*) AS n FROM receipt_items")[0]["n"]
+    page_count = max(1, math.ceil(total_items / page_size))
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1) - 1
+    receipts = receipt_database.query_dataframe(
+        "SELECT * FROM receipts as r RIGHT JOIN receipt_items as ri ON r.id = ri.receipt_id ORDER BY ri.id LIMIT ? OFFSET ?",
+        (page_size, page * page_size),
+    )
     st.dataframe(receipts)
 
     schema = receipt_database.get_schema()
@@ -166,8 +201,22 @@ with tab_chat:
         chats.append({"role": "user", "content": user_question})
         st.session_state["chats"] = chats
 
-        with st.spinner("🤖 Thinking..."):
-            agent_response = asyncio.run(run_agent(user_question))
+        st.chat_message("user").write(user_question)
+        with st.chat_message("assistant"):
+            status = st.status("🤖 Thinking...", expanded=False)
+
+            # Tokens are rendered as they arrive; tool activity goes into the status box
+            def answer_chunks():
+                for event in iter_agent_events(agent, user_question):
+                    if event.type == "text":
+                        yield event.data
+                    elif event.type == "tool_call":
+                        status.write(f"Running query: `{event.data}`")
+                    elif event.type == "tool_output":
+                        status.write(event.data[:500])
+
+            agent_response = st.write_stream(answer_chunks())
+            status.update(label="Done", state="complete")
 
             chats.append({"role": "assistant", "content": agent_response})
             st.session_state["chats"] = chats
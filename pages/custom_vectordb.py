@@ -3,13 +3,28 @@ from uuid import uuid4
 
 from src.vectorstore.custom_vectordb import CustomVectorDB
 from src.embeddings.openai_embedder import OpenAIEmbeddingModel
+from src.embeddings.batching_embedder import MicroBatchingEmbedder
 from src.models.document import Document
 from src.retriever.vector_search import VectorSearchRetriever
 
 st.sidebar.markdown("# Custom Vector Database ❄️")
 
-file_path = "data/custom_vector_db/vectors.csv"
-custom_vector_db = CustomVectorDB(file_path)
+
+@st.cache_resource
+def get_openai_embedder() -> MicroBatchingEmbedder:
+    # Shared by every session, so concurrent searches are embedded in one upstream request
+    embedder = OpenAIEmbeddingModel(model_name="text-embedding-3-small", vector_size=1536)
+    return MicroBatchingEmbedder(embedder, window=0.01, max_batch_size=64)
+
+
+@st.cache_resource
+def get_custom_vector_db() -> CustomVectorDB:
+    # Loaded once per process; reruns only read what was appended or deleted since
+    return CustomVectorDB("data/custom_vector_db/vectors.csv")
+
+
+custom_vector_db = get_custom_vector_db()
+custom_vector_db.refresh()
 
 st.title("Custom Vector Database Documents")
 st.write("This page demonstrates the usage of a custom vector database backed by CSV storage.")
@@ -25,9 +40,8 @@ st.divider()
 st.header("Add New Document")
 text_input = st.text_area("Enter text to embed and store in Custom Vector DB:", "Sample text for embedding.")
 if st.button("Embed and Store in Custom Vector DB"):
-    # Initialize OpenAI embedder
-    openai_embedder = OpenAIEmbeddingModel(model_name="text-embedding-3-small", vector_size=1536)
-    
+    openai_embedder = get_openai_embedder()
+
     # Initialize Retriever with Custom Vector DB
     retriever = VectorSearchRetriever(vector_store=custom_vector_db, embedder=openai_embedder)
     
@@ -40,9 +54,8 @@ st.divider()
 st.header("Search Documents")
 query_input = st.text_input("Enter query text to search in Custom Vector DB:", "Sample query.")
 if st.button("Search in Custom Vector DB"):
-    # Initialize OpenAI embedder
-    openai_embedder = OpenAIEmbeddingModel(model_name="text-embedding-3-small", vector_size=1536)
-    
+    openai_embedder = get_openai_embedder()
+
     # Initialize Retriever with Custom Vector DB
     retriever = VectorSearchRetriever(vector_store=custom_vector_db, embedder=openai_embedder)
     
@@ -3,6 +3,7 @@ from uuid import uuid4
 
 from src.vectorstore.qdrant_client import Qdrant
 from src.embeddings.openai_embedder import OpenAIEmbeddingModel
+from src.embeddings.batching_embedder import MicroBatchingEmbedder
 from src.models.document import Document
 from src.retriever.vector_search import VectorSearchRetriever
 
@@ -14,11 +15,14 @@ def get_qdrant_client(host: str = "localhost", port: int = 6333, collection_name
     qdrant_client = Qdrant(host=host, port=port, collection_name=collection_name, vector_size=vector_size)
     return qdrant_client
 
-# @st.cache_resource
-def get_openai_embedder(model_name: str = "text-embedding-3-small", vector_size: int = 1536) -> OpenAIEmbeddingModel:
-    """Initialize and return an OpenAI embedding model instance."""
+@st.cache_resource
+def get_openai_embedder(model_name: str = "text-embedding-3-small", vector_size: int = 1536) -> MicroBatchingEmbedder:
+    """Initialize and return an OpenAI embedding model instance.
+
+    Shared by every session, so concurrent searches are embedded in one upstream request.
+    """
     embedder = OpenAIEmbeddingModel(model_name=model_name, vector_size=vector_size)
-    return embedder
+    return MicroBatchingEmbedder(embedder, window=0.01, max_batch_size=64)
 
 st.title("Qdrant Vector Database Documents")
 st.write("This page demonstrates the usage of Qdrant as a vector database.")
@@ -36,10 +40,21 @@ retriever = VectorSearchRetriever(vector_store=qdrant_client, embedder=openai_em
 st.write(f"Host: {retriever.vector_store.host}, Port: {retriever.vector_store.port}, Collection: {retriever.vector_store.collection_name}")
 st.divider()
 
-# List all documents in the Qdrant vector database
+# List one page of the Qdrant vector database; Qdrant pages by cursor, so keep the start of every page seen
 st.header("Stored Documents")
-collections = qdrant_client.list_all_documents()
-st.json(collections, expanded=False)
+page_size = 20
+page_offsets = st.session_state.setdefault("qdrant_page_offsets", [None])
+documents, next_offset = qdrant_client.scroll_documents(limit=page_size, offset=page_offsets[-1])
+st.json(documents, expanded=False)
+
+col_previous, col_page, col_next = st.columns(3)
+col_page.write(f"Page {len(page_offsets)}")
+if col_previous.button("Previous page", disabled=len(page_offsets) == 1):
+    page_offsets.pop()
+    st.rerun()
+if col_next.button("Next page", disabled=next_offset is None):
+    page_offsets.append(next_offset)
+    st.rerun()
 st.divider()
 
 # Insert data
@@ -57,4 +72,4 @@ query_input = st.text_input("Enter query text to search in Qdrant:", "Sample que
 if st.button("Search"):
     results = retriever.retrieve(query=query_input, top_k=5)
     st.success("Search completed.")
-    st.json([result.dict() for result in results])
\ No newline at end of file
+    st.json(results)
\ No newline at end of file
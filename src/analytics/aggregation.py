@@ -0,0 +1,256 @@
+import io
+import os
+import multiprocessing
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from src.analytics.customers import DATE_COLUMNS, DATE_FORMAT
+
+
+# Bytes of CSV (or rows of Parquet row groups) handed to one worker task
+PARTITION_BYTES = 64 * 1024 * 1024
+
+# Bytes parsed into a DataFrame at a time inside a task, which bounds worker memory
+BLOCK_BYTES = 8 * 1024 * 1024
+
+# Pending partial results a task keeps before merging them down to one
+MERGE_EVERY = 8
+
+
+class Aggregation:
+    """A mergeable aggregation: computed per chunk, merged across chunks, then finalized.
+
+    Partial results are count Series indexed by the grouping keys, so merging is a sum by key
+    and memory depends on the number of distinct keys rather than the number of rows.
+    """
+
+    name: str
+    columns: List[str]
+
+    def partial(self, chunk: pd.DataFrame) -> pd.Series:
+        raise NotImplementedError("partial method not implemented.")
+
+    def merge(self, partials: List[pd.Series]) -> pd.Series:
+        if len(partials) == 1:
+            return partials[0]
+        combined = pd.concat(partials)
+        return combined.groupby(level=list(range(combined.index.nlevels)), sort=False).sum()
+
+    def finalize(self, partial: pd.Series) -> pd.Series:
+        return partial.astype('int64').sort_values(ascending=False, kind='stable').rename('count')
+
+
+@dataclass
+class ValueCounts(Aggregation):
+    """Same as `df[column].value_counts()`."""
+
+    column: str
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        self.name = self.name or f"{self.column} counts"
+        self.columns = [self.column]
+
+    def partial(self, chunk: pd.DataFrame) -> pd.Series:
+        return chunk[self.column].value_counts()
+
+
+@dataclass
+class MonthlyCounts(Aggregation):
+    """Rows per calendar month of a datetime column, in date order."""
+
+    column: str
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        self.name = self.name or f"{self.column} by month"
+        self.columns = [self.column]
+
+    def partial(self, chunk: pd.DataFrame) -> pd.Series:
+        return chunk.groupby(chunk[self.column].dt.to_period('M')).size()
+
+    def finalize(self, partial: pd.Series) -> pd.Series:
+        monthly = partial.astype('int64').sort_index().rename('count')
+        monthly.index = monthly.index.to_timestamp()
+        return monthly
+
+
+@dataclass
+class GroupCount(Aggregation):
+    """Same as `df.groupby(by)[column].count()`, or `.size()` without a column."""
+
+    by: List[str]
+    column: Optional[str] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        self.by = list(self.by)
+        self.name = self.name or f"{self.column or 'rows'} by {' x '.join(self.by)}"
+        self.columns = self.by + ([self.column] if self.column else [])
+
+    def partial(self, chunk: pd.DataFrame) -> pd.Series:
+        groups = chunk.groupby(self.by, sort=False)
+        return groups[self.column].count() if self.column else groups.size()
+
+
+# The aggregations behind the customers EDA notebook
+CUSTOMER_EDA_AGGREGATIONS = [
+    ValueCounts('Country'),
+    ValueCounts('Company'),
+    ValueCounts('City'),
+    MonthlyCounts('Subscription Date'),
+    GroupCount(['Country'], 'Company'),
+]
+
+
+def _required_columns(aggregations: List[Aggregation]) -> List[str]:
+    return list(dict.fromkeys(column for aggregation in aggregations for column in aggregation.columns))
+
+
+class _PartialAccumulator:
+    """Collects per-chunk partials and merges them down every MERGE_EVERY chunks."""
+
+    def __init__(self, aggregations: List[Aggregation]):
+        self.aggregations = aggregations
+        self.pending = [[] for _ in aggregations]
+
+    def add(self, partials: List[Optional[pd.Series]]):
+        for aggregation, pending, partial in zip(self.aggregations, self.pending, partials):
+            # Tasks over empty ranges return None, which carries nothing to merge
+            if partial is None:
+                continue
+            pending.append(partial)
+            if len(pending) >= MERGE_EVERY:
+                pending[:] = [aggregation.merge(pending)]
+
+    def add_chunk(self, chunk: pd.DataFrame):
+        self.add([aggregation.partial(chunk) for aggregation in self.aggregations])
+
+    def result(self) -> List[Optional[pd.Series]]:
+        return [aggregation.merge(pending) if pending else None for aggregation, pending in zip(self.aggregations, self.pending)]
+
+
+def aggregate_chunks(chunks: Iterable[pd.DataFrame], aggregations: List[Aggregation] = CUSTOMER_EDA_AGGREGATIONS) -> Dict[str, pd.Series]:
+    """Run `aggregations` over DataFrame chunks in this process, e.g. from `iter_customer_chunks`."""
+    accumulator = _PartialAccumulator(aggregations)
+    for chunk in chunks:
+        accumulator.add_chunk(chunk)
+    return _finalize(aggregations, accumulator.result())
+
+
+def _finalize(aggregations: List[Aggregation], partials: List[Optional[pd.Series]]) -> Dict[str, pd.Series]:
+    return {
+        aggregation.name: aggregation.finalize(partial if partial is not None else pd.Series(dtype='int64'))
+        for aggregation, partial in zip(aggregations, partials)
+    }
+
+
+def _read_csv_block(block: bytes, header: List[str], columns: List[str]) -> pd.DataFrame:
+    return pd.read_csv(
+        io.BytesIO(block),
+        names=header,
+        header=None,
+        usecols=columns,
+        parse_dates=[column for column in DATE_COLUMNS if column in columns],
+        date_format=DATE_FORMAT,
+    )
+
+
+def _iter_csv_range(path: str, start: int, end: int, header: List[str], columns: List[str], block_bytes: int) -> Iterator[pd.DataFrame]:
+    # A line belongs to the range its first byte falls in. Quoted fields must not contain newlines.
+    with open(path, 'rb') as f:
+        if start == 0:
+            f.readline()  # header
+        else:
+            # Step back one byte so a range starting exactly on a line start keeps that line
+            f.seek(start - 1)
+            f.readline()
+
+        while f.tell() < end:
+            block = f.read(min(block_bytes, end - f.tell()))
+            if not block.endswith(b'\n'):
+                block += f.readline()
+            yield _read_csv_block(block, header, columns)
+
+
+def _csv_range_partials(path: str, start: int, end: int, header: List[str], aggregations: List[Aggregation], block_bytes: int):
+    accumulator = _PartialAccumulator(aggregations)
+    for chunk in _iter_csv_range(path, start, end, header, _required_columns(aggregations), block_bytes):
+        accumulator.add_chunk(chunk)
+    return accumulator.result()
+
+
+def _parquet_row_group_partials(path: str, row_groups: List[int], aggregations: List[Aggregation]):
+    import pyarrow.parquet as pq
+
+    accumulator = _PartialAccumulator(aggregations)
+    parquet_file = pq.ParquetFile(path)
+    for row_group in row_groups:
+        accumulator.add_chunk(parquet_file.read_row_group(row_group, columns=_required_columns(aggregations)).to_pandas())
+    return accumulator.result()
+
+
+def _plan_tasks(path: str, aggregations: List[Aggregation], partition_bytes: int, block_bytes: int) -> list:
+    """Split the file into independent tasks: byte ranges of a CSV or row-group runs of a Parquet file."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        metadata = pq.ParquetFile(path).metadata
+        tasks, current, current_bytes = [], [], 0
+        for row_group in range(metadata.num_row_groups):
+            current.append(row_group)
+            current_bytes += metadata.row_group(row_group).total_byte_size
+            if current_bytes >= partition_bytes:
+                tasks.append((_parquet_row_group_partials, path, current, aggregations))
+                current, current_bytes = [], 0
+        if current:
+            tasks.append((_parquet_row_group_partials, path, current, aggregations))
+        return tasks
+
+    with open(path, 'rb') as f:
+        header = pd.read_csv(io.BytesIO(f.readline()), nrows=0).columns.tolist()
+    missing = set(_required_columns(aggregations)) - set(header)
+    if missing:
+        raise ValueError(f"Columns not found in {path}: {sorted(missing)}")
+
+    size = os.path.getsize(path)
+    return [
+        (_csv_range_partials, path, start, min(start + partition_bytes, size), header, aggregations, block_bytes)
+        for start in range(0, size, partition_bytes)
+    ]
+
+
+def aggregate_file(
+    path: str,
+    aggregations: List[Aggregation] = CUSTOMER_EDA_AGGREGATIONS,
+    max_workers: Optional[int] = None,
+    partition_bytes: int = PARTITION_BYTES,
+    block_bytes: int = BLOCK_BYTES,
+) -> Dict[str, pd.Series]:
+    """Compute `aggregations` over a customers CSV or Parquet file without loading it whole.
+
+    The file is split into partitions that worker processes aggregate independently, block
+    by block, and the partial results are merged as they finish. Memory use depends on block
+    size and on the number of distinct keys, not on the file size.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    tasks = _plan_tasks(path, aggregations, partition_bytes, block_bytes)
+
+    accumulator = _PartialAccumulator(aggregations)
+    if max_workers < 2 or len(tasks) < 2:
+        for fn, *args in tasks:
+            accumulator.add(fn(*args))
+        return _finalize(aggregations, accumulator.result())
+
+    # Spawned workers start clean: forking would copy pyarrow's I/O thread pool and any frames the caller
+    # (a notebook or page) holds, and each task only needs its path, byte range and aggregations
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)), mp_context=context) as executor:
+        futures = [executor.submit(fn, *args) for fn, *args in tasks]
+        for future in as_completed(futures):
+            accumulator.add(future.result())
+
+    return _finalize(aggregations, accumulator.result())
@@ -0,0 +1,144 @@
+import os
+import glob
+import hashlib
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+# Columns used by the customer analysis; Index and Customer Id are never needed
+DEFAULT_COLUMNS = ['First Name', 'Last Name', 'Company', 'City', 'Country', 'Subscription Date']
+
+# Low-cardinality columns stored as categories instead of one string object per row
+CATEGORY_COLUMNS = ['First Name', 'Last Name', 'Country']
+
+DATE_COLUMNS = ['Subscription Date']
+DATE_FORMAT = '%Y-%m-%d'
+
+# Bump when the parsing or dtypes change so existing caches are rebuilt
+CACHE_VERSION = 1
+
+
+def _dtypes(columns: List[str]) -> dict:
+    return {column: 'category' for column in CATEGORY_COLUMNS if column in columns}
+
+
+def iter_customer_chunks(csv_path: str, columns: List[str] = DEFAULT_COLUMNS, chunksize: int = 200_000) -> Iterator[pd.DataFrame]:
+    """Read the customers CSV in chunks with category and datetime dtypes applied while parsing.
+
+    Only `columns` are parsed, so pruned columns never take memory.
+    """
+    reader = pd.read_csv(
+        csv_path,
+        usecols=columns,
+        dtype=_dtypes(columns),
+        parse_dates=[column for column in DATE_COLUMNS if column in columns],
+        date_format=DATE_FORMAT,
+        chunksize=chunksize,
+    )
+    with reader:
+        for chunk in reader:
+            # Keep the requested column order regardless of the order in the file
+            yield chunk[list(columns)]
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:12]
+
+
+def customers_cache_path(csv_path: str, columns: List[str] = DEFAULT_COLUMNS, cache_dir: str = 'data/cache') -> str:
+    """Parquet cache location, keyed by the source file and selected columns, then by the file's current state."""
+    stat = os.stat(csv_path)
+    source = _digest(os.path.abspath(csv_path), ','.join(columns))
+    state = _digest(str(stat.st_size), str(stat.st_mtime_ns), str(CACHE_VERSION))
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}.{source}.{state}.parquet")
+
+
+def _remove_stale_caches(cache_path: str):
+    # Caches of earlier versions of the same source and columns differ only in the state digest
+    prefix = cache_path.rsplit('.', 2)[0]
+    for path in glob.glob(f"{glob.escape(prefix)}.*.parquet"):
+        if path != cache_path:
+            print(f"Removing stale customers cache {path}")
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    if not chunks:
+        return pd.DataFrame()
+
+    # Chunks have their own category sets, which plain concat would turn back into strings
+    frame = pd.concat(chunks, ignore_index=True)
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            frame[column] = pd.api.types.union_categoricals([chunk[column] for chunk in chunks])
+    return frame
+
+
+def _write_parquet_cache(chunks: Iterator[pd.DataFrame], cache_path: str) -> bool:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = f"{cache_path}.tmp"
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                # pandas picks the narrowest index type per chunk, so fix one wide enough for any chunk
+                schema = table.schema
+                for i, field in enumerate(schema):
+                    if pa.types.is_dictionary(field.type):
+                        schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), pa.string())))
+                writer = pq.ParquetWriter(tmp_path, schema, compression='zstd')
+            # Each chunk becomes a row group, so the cache is written without holding the whole file
+            writer.write_table(table.cast(writer.schema))
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            os.remove(tmp_path)
+        raise
+
+    if writer is None:
+        return False
+    writer.close()
+    os.replace(tmp_path, cache_path)
+    return True
+
+
+def load_customers(
+    csv_path: str,
+    columns: List[str] = DEFAULT_COLUMNS,
+    cache_dir: Optional[str] = 'data/cache',
+    chunksize: int = 200_000,
+) -> pd.DataFrame:
+    """Load the customers CSV with memory-efficient dtypes, through a Parquet cache when possible.
+
+    The first load streams the CSV chunk by chunk into a column-pruned Parquet file under
+    `cache_dir`; later loads read that file instead of parsing the CSV. The cache is rebuilt
+    when the CSV changes. Pass `cache_dir=None`, or run without pyarrow, to skip the cache.
+    """
+    columns = list(columns)
+    chunks = iter_customer_chunks(csv_path, columns, chunksize)
+    if cache_dir is None:
+        return _concat_chunks(list(chunks))
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow is not installed, loading customers without the Parquet cache")
+        return _concat_chunks(list(chunks))
+
+    cache_path = customers_cache_path(csv_path, columns, cache_dir)
+    if not os.path.exists(cache_path):
+        print(f"Building customers cache {cache_path}")
+        if not _write_parquet_cache(chunks, cache_path):
+            return pd.DataFrame(columns=columns)
+        _remove_stale_caches(cache_path)
+
+    return pd.read_parquet(cache_path)
@@ -0,0 +1,91 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, Optional
+
+from src.database.query_guard import GuardedQueryRunner
+
+if TYPE_CHECKING:
+    from agents import Agent, RunConfig
+
+
+# Kept free of per-request values (like the current time) so the prompt prefix is identical on
+# every call and can be served from the provider's prompt cache.
+AGENT_PROMPT = """
+You are an AI assistant that helps users with information extracted from their food delivery receipts. Use the tools available to you to answer questions about the receipt data.
+Here is the schema of the receipt database you can query:
+{schema}
+
+For totals per day or platform use the precomputed daily_platform_spend table, and for popular or most ordered items use restaurant_item_stats, instead of aggregating receipts and receipt_items yourself.
+
+To look up text such as item names, notes, restaurants or addresses, use the full-text tables instead of LIKE '%...%': for example `SELECT ri.* FROM receipt_items_fts JOIN receipt_items AS ri ON ri.id = receipt_items_fts.rowid WHERE receipt_items_fts MATCH 'cheese'`, and likewise receipts_fts for receipts. Append * to a word for prefix matches.
+
+When answering questions, refer to the relevant fields in the database schema to provide accurate information. Each user message starts with the current time, use it to provide context for time-based queries or comparisons.
+"""
+
+
+@dataclass
+class AgentEvent:
+    type: str  # "text", "tool_call" or "tool_output"
+    data: str
+
+
+def build_receipt_agent(query_runner: GuardedQueryRunner, schema: dict, model: Optional[str] = None) -> "Agent":
+    """Build the receipt chatbot agent. Meant to be built once per process and reused."""
+    # The agents SDK takes over a second to import, so it is loaded on first use
+    from agents import Agent, function_tool
+
+    @function_tool
+    def run_query(query: str) -> str:
+        """Run a SQL query against the receipt database and return the rows as JSON."""
+        return query_runner.run(query)
+
+    kwargs = {"model": model} if model else {}
+    return Agent(
+        name="Agent-Receipt-Chatbot",
+        instructions=AGENT_PROMPT.format(schema=schema),
+        tools=[run_query],
+        **kwargs,
+    )
+
+
+def with_current_time(user_input: str) -> str:
+    return f"Current time: {datetime.now().isoformat(timespec='minutes')}\n\n{user_input}"
+
+
+async def run_agent(agent: "Agent", user_input: str, run_config: Optional["RunConfig"] = None) -> str:
+    """Runs the agent to completion and returns its final answer."""
+    from agents import Runner
+
+    result = await Runner.run(agent, with_current_time(user_input), run_config=run_config)
+    return result.final_output
+
+
+async def stream_agent_events(agent: "Agent", user_input: str, run_config: Optional["RunConfig"] = None) -> AsyncIterator[AgentEvent]:
+    """Yield answer text deltas and tool activity as soon as the model produces them."""
+    from agents import Runner
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    result = Runner.run_streamed(agent, with_current_time(user_input), run_config=run_config)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            yield AgentEvent("text", event.data.delta)
+        elif event.type == "run_item_stream_event" and event.name == "tool_called":
+            yield AgentEvent("tool_call", getattr(event.item.raw_item, "arguments", ""))
+        elif event.type == "run_item_stream_event" and event.name == "tool_output":
+            yield AgentEvent("tool_output", str(event.item.output))
+
+
+def iter_agent_events(agent: "Agent", user_input: str, run_config: Optional["RunConfig"] = None) -> Iterator[AgentEvent]:
+    """Synchronous version of `stream_agent_events` for Streamlit, which renders from plain generators."""
+    loop = asyncio.new_event_loop()
+    events = stream_agent_events(agent, user_input, run_config=run_config)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(events.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(events.aclose())
+        loop.close()
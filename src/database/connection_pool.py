@@ -0,0 +1,109 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+from typing import Any, Callable, Iterator, Optional
+
+
+class SQLiteConnectionPool:
+    """Read-only connections that run in parallel, plus one writer thread that serializes all writes.
+
+    Callers hand work in as functions taking a `sqlite3.Connection`: `read(fn)` borrows a
+    reader connection, `write(fn)` queues `fn` for the writer thread and waits for its result.
+    With WAL journaling readers see the last committed state and never wait for the writer.
+    """
+
+    def __init__(self, db_path: str, readers: int = 4, configure: Optional[Callable[[sqlite3.Connection], None]] = None, timeout: float = 30.0):
+        self.db_path = db_path
+        self.configure = configure
+        self.timeout = timeout
+
+        # Private in-memory databases can't be shared, so everything goes through the writer
+        self.reader_count = 0 if db_path == ":memory:" else readers
+
+        self._write_queue = queue.Queue()
+        self._writer_ready = threading.Event()
+        self._writer_error = None
+        self._writer = threading.Thread(target=self._writer_loop, name="sqlite-writer", daemon=True)
+        self._writer.start()
+        self._writer_ready.wait()
+        if self._writer_error is not None:
+            raise self._writer_error
+
+        self._readers = queue.LifoQueue()
+        for _ in range(self.reader_count):
+            self._readers.put(self._connect(read_only=True))
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        # Connections move between threads but are only ever used by one thread at a time
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        if self.configure is not None:
+            self.configure(conn)
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _writer_loop(self):
+        try:
+            conn = self._connect(read_only=False)
+        except Exception as e:
+            self._writer_error = e
+            self._writer_ready.set()
+            return
+        self._writer_ready.set()
+
+        while True:
+            task = self._write_queue.get()
+            if task is None:
+                break
+
+            fn, args, kwargs, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(conn, *args, **kwargs)
+            except BaseException as e:
+                # Never leave a half-finished transaction open for the next task
+                conn.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        conn.close()
+
+    def submit_write(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        future = Future()
+        self._write_queue.put((fn, args, kwargs, future))
+        return future
+
+    def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        # A write task calling write() again would wait on itself forever
+        if threading.current_thread() is self._writer:
+            raise RuntimeError("write() called from the writer thread; call the function directly instead")
+        return self.submit_write(fn, *args, **kwargs).result()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection for longer-lived work such as streaming a cursor."""
+        if self.reader_count == 0:
+            raise RuntimeError("This pool has no reader connections; use read() instead")
+
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self.reader_count == 0:
+            return self.write(fn, *args, **kwargs)
+
+        with self.reader() as conn:
+            return fn(conn, *args, **kwargs)
+
+    def close(self):
+        self._write_queue.put(None)
+        self._writer.join()
+        for _ in range(self.reader_count):
+            self._readers.get().close()
@@ -1,25 +1,288 @@
 import os
+import time
 import sqlite3
-from typing import Optional
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
 
 from src.models.receipt import Receipt
+from src.models.receipt_batch import ReceiptBatch
+from src.database.connection_pool import SQLiteConnectionPool
+
+
+INSERT_RECEIPT_SQL = '''
+    INSERT OR REPLACE INTO receipts (
+        platform, transaction_id, customer_name, date, time,
+        restaurant_name, restaurant_location,
+        delivery_address, delivery_fee, driver_name, driver_vehicle,
+        distance, estimated_time, actual_delivery_time, pickup_time,
+        payment_subtotal, payment_delivery_fee, payment_service_fee,
+        payment_discount, payment_total, 
+        payment_method, 
+        special_instructions, order_status,
+        additional_info_thank_you, additional_info_environmental, additional_info_final_note
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_ITEM_SQL = '''
+    INSERT INTO receipt_items (receipt_id, item_name, quantity, unit_price, total_price, notes)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# SQLite's default limit on host parameters per statement is 999
+MAX_SQL_PARAMS = 900
+
+# Schema migrations applied in order; PRAGMA user_version records how many have run
+SCHEMA_MIGRATIONS = [
+    # 1: query-path indexes and trigger-maintained summary tables
+    '''
+    DROP INDEX IF EXISTS idx_transaction_id;
+    CREATE INDEX IF NOT EXISTS idx_receipts_date ON receipts(date);
+    CREATE INDEX IF NOT EXISTS idx_receipts_platform_date ON receipts(platform, date);
+    CREATE INDEX IF NOT EXISTS idx_receipts_restaurant_name ON receipts(restaurant_name);
+    CREATE INDEX IF NOT EXISTS idx_receipt_items_receipt_id ON receipt_items(receipt_id);
+
+    CREATE TABLE IF NOT EXISTS daily_platform_spend (
+        date TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        receipt_count INTEGER NOT NULL,
+        total_spend REAL NOT NULL,
+        PRIMARY KEY (date, platform)
+    );
+
+    CREATE TABLE IF NOT EXISTS restaurant_item_stats (
+        restaurant_name TEXT NOT NULL,
+        item_name TEXT NOT NULL,
+        order_count INTEGER NOT NULL,
+        total_quantity INTEGER NOT NULL,
+        total_spend REAL NOT NULL,
+        PRIMARY KEY (restaurant_name, item_name)
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_spend_insert AFTER INSERT ON receipts
+    BEGIN
+        INSERT INTO daily_platform_spend (date, platform, receipt_count, total_spend)
+        VALUES (NEW.date, NEW.platform, 1, NEW.payment_total)
+        ON CONFLICT (date, platform) DO UPDATE SET
+            receipt_count = receipt_count + 1,
+            total_spend = total_spend + excluded.total_spend;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_spend_delete AFTER DELETE ON receipts
+    BEGIN
+        UPDATE daily_platform_spend
+        SET receipt_count = receipt_count - 1, total_spend = total_spend - OLD.payment_total
+        WHERE date = OLD.date AND platform = OLD.platform;
+        DELETE FROM daily_platform_spend WHERE date = OLD.date AND platform = OLD.platform AND receipt_count <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_spend_update AFTER UPDATE OF date, platform, payment_total ON receipts
+    BEGIN
+        UPDATE daily_platform_spend
+        SET receipt_count = receipt_count - 1, total_spend = total_spend - OLD.payment_total
+        WHERE date = OLD.date AND platform = OLD.platform;
+        DELETE FROM daily_platform_spend WHERE date = OLD.date AND platform = OLD.platform AND receipt_count <= 0;
+        INSERT INTO daily_platform_spend (date, platform, receipt_count, total_spend)
+        VALUES (NEW.date, NEW.platform, 1, NEW.payment_total)
+        ON CONFLICT (date, platform) DO UPDATE SET
+            receipt_count = receipt_count + 1,
+            total_spend = total_spend + excluded.total_spend;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipt_items_stats_insert AFTER INSERT ON receipt_items
+    BEGIN
+        INSERT INTO restaurant_item_stats (restaurant_name, item_name, order_count, total_quantity, total_spend)
+        SELECT restaurant_name, NEW.item_name, 1, NEW.quantity, COALESCE(NEW.total_price, NEW.quantity * NEW.unit_price)
+        FROM receipts WHERE id = NEW.receipt_id
+        ON CONFLICT (restaurant_name, item_name) DO UPDATE SET
+            order_count = order_count + 1,
+            total_quantity = total_quantity + excluded.total_quantity,
+            total_spend = total_spend + excluded.total_spend;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipt_items_stats_delete AFTER DELETE ON receipt_items
+    BEGIN
+        UPDATE restaurant_item_stats
+        SET order_count = order_count - 1,
+            total_quantity = total_quantity - OLD.quantity,
+            total_spend = total_spend - COALESCE(OLD.total_price, OLD.quantity * OLD.unit_price)
+        WHERE item_name = OLD.item_name
+          AND restaurant_name = (SELECT restaurant_name FROM receipts WHERE id = OLD.receipt_id);
+        DELETE FROM restaurant_item_stats WHERE order_count <= 0;
+    END;
+
+    -- Backfill the summaries for databases created before this migration
+    DELETE FROM daily_platform_spend;
+    INSERT INTO daily_platform_spend (date, platform, receipt_count, total_spend)
+    SELECT date, platform, COUNT(*), SUM(payment_total) FROM receipts GROUP BY date, platform;
+
+    DELETE FROM restaurant_item_stats;
+    INSERT INTO restaurant_item_stats (restaurant_name, item_name, order_count, total_quantity, total_spend)
+    SELECT r.restaurant_name, ri.item_name, COUNT(*), SUM(ri.quantity), SUM(COALESCE(ri.total_price, ri.quantity * ri.unit_price))
+    FROM receipt_items AS ri JOIN receipts AS r ON r.id = ri.receipt_id
+    GROUP BY r.restaurant_name, ri.item_name;
+    ''',
+    # 2: FTS5 full-text indexes over item, restaurant and address text, kept in sync by triggers
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS receipts_fts USING fts5(
+        restaurant_name, restaurant_location, delivery_address, special_instructions,
+        content='receipts', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+
+    CREATE VIRTUAL TABLE IF NOT EXISTS receipt_items_fts USING fts5(
+        item_name, notes,
+        content='receipt_items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_fts_insert AFTER INSERT ON receipts
+    BEGIN
+        INSERT INTO receipts_fts (rowid, restaurant_name, restaurant_location, delivery_address, special_instructions)
+        VALUES (NEW.id, NEW.restaurant_name, NEW.restaurant_location, NEW.delivery_address, NEW.special_instructions);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_fts_delete AFTER DELETE ON receipts
+    BEGIN
+        INSERT INTO receipts_fts (receipts_fts, rowid, restaurant_name, restaurant_location, delivery_address, special_instructions)
+        VALUES ('delete', OLD.id, OLD.restaurant_name, OLD.restaurant_location, OLD.delivery_address, OLD.special_instructions);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_fts_update
+    AFTER UPDATE OF restaurant_name, restaurant_location, delivery_address, special_instructions ON receipts
+    BEGIN
+        INSERT INTO receipts_fts (receipts_fts, rowid, restaurant_name, restaurant_location, delivery_address, special_instructions)
+        VALUES ('delete', OLD.id, OLD.restaurant_name, OLD.restaurant_location, OLD.delivery_address, OLD.special_instructions);
+        INSERT INTO receipts_fts (rowid, restaurant_name, restaurant_location, delivery_address, special_instructions)
+        VALUES (NEW.id, NEW.restaurant_name, NEW.restaurant_location, NEW.delivery_address, NEW.special_instructions);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipt_items_fts_insert AFTER INSERT ON receipt_items
+    BEGIN
+        INSERT INTO receipt_items_fts (rowid, item_name, notes) VALUES (NEW.id, NEW.item_name, NEW.notes);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipt_items_fts_delete AFTER DELETE ON receipt_items
+    BEGIN
+        INSERT INTO receipt_items_fts (receipt_items_fts, rowid, item_name, notes) VALUES ('delete', OLD.id, OLD.item_name, OLD.notes);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipt_items_fts_update AFTER UPDATE OF item_name, notes ON receipt_items
+    BEGIN
+        INSERT INTO receipt_items_fts (receipt_items_fts, rowid, item_name, notes) VALUES ('delete', OLD.id, OLD.item_name, OLD.notes);
+        INSERT INTO receipt_items_fts (rowid, item_name, notes) VALUES (NEW.id, NEW.item_name, NEW.notes);
+    END;
+
+    -- Index rows that existed before this migration
+    INSERT INTO receipts_fts (receipts_fts) VALUES ('rebuild');
+    INSERT INTO receipt_items_fts (receipt_items_fts) VALUES ('rebuild');
+    ''',
+    # 3: keep restaurant_item_stats right when receipts are deleted, replaced or renamed
+    '''
+    -- Only drop the row this item touched; the unscoped sweep made bulk deletes quadratic
+    DROP TRIGGER IF EXISTS trg_receipt_items_stats_delete;
+    CREATE TRIGGER trg_receipt_items_stats_delete AFTER DELETE ON receipt_items
+    BEGIN
+        UPDATE restaurant_item_stats
+        SET order_count = order_count - 1,
+            total_quantity = total_quantity - OLD.quantity,
+            total_spend = total_spend - COALESCE(OLD.total_price, OLD.quantity * OLD.unit_price)
+        WHERE item_name = OLD.item_name
+          AND restaurant_name = (SELECT restaurant_name FROM receipts WHERE id = OLD.receipt_id);
+        DELETE FROM restaurant_item_stats
+        WHERE item_name = OLD.item_name
+          AND restaurant_name = (SELECT restaurant_name FROM receipts WHERE id = OLD.receipt_id)
+          AND order_count <= 0;
+    END;
+
+    -- Delete items while their receipt still exists, so the trigger above can find its restaurant.
+    -- Also covers INSERT OR REPLACE, which fires delete triggers with recursive_triggers on.
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_items_delete BEFORE DELETE ON receipts
+    BEGIN
+        DELETE FROM receipt_items WHERE receipt_id = OLD.id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_receipts_item_stats_update AFTER UPDATE OF restaurant_name ON receipts
+    BEGIN
+        INSERT INTO restaurant_item_stats (restaurant_name, item_name, order_count, total_quantity, total_spend)
+        SELECT OLD.restaurant_name, item_name, -COUNT(*), -SUM(quantity), -SUM(COALESCE(total_price, quantity * unit_price))
+        FROM receipt_items WHERE receipt_id = OLD.id GROUP BY item_name
+        ON CONFLICT (restaurant_name, item_name) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            total_quantity = total_quantity + excluded.total_quantity,
+            total_spend = total_spend + excluded.total_spend;
+        DELETE FROM restaurant_item_stats
+        WHERE restaurant_name = OLD.restaurant_name
+          AND item_name IN (SELECT item_name FROM receipt_items WHERE receipt_id = OLD.id)
+          AND order_count <= 0;
+        INSERT INTO restaurant_item_stats (restaurant_name, item_name, order_count, total_quantity, total_spend)
+        SELECT NEW.restaurant_name, item_name, COUNT(*), SUM(quantity), SUM(COALESCE(total_price, quantity * unit_price))
+        FROM receipt_items WHERE receipt_id = NEW.id GROUP BY item_name
+        ON CONFLICT (restaurant_name, item_name) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            total_quantity = total_quantity + excluded.total_quantity,
+            total_spend = total_spend + excluded.total_spend;
+    END;
+
+    -- Rebuild from the items to clear drift left by the old triggers
+    DELETE FROM restaurant_item_stats;
+    INSERT INTO restaurant_item_stats (restaurant_name, item_name, order_count, total_quantity, total_spend)
+    SELECT r.restaurant_name, ri.item_name, COUNT(*), SUM(ri.quantity), SUM(COALESCE(ri.total_price, ri.quantity * ri.unit_price))
+    FROM receipt_items AS ri JOIN receipts AS r ON r.id = ri.receipt_id
+    GROUP BY r.restaurant_name, ri.item_name;
+    ''',
+]
+
+# How many SQLite VM instructions run between checks of a query's time budget
+PROGRESS_HANDLER_STEPS = 1000
+
+# Tables described to the agent by get_schema
+SCHEMA_TABLES = ['receipts', 'receipt_items', 'daily_platform_spend', 'restaurant_item_stats', 'receipts_fts', 'receipt_items_fts']
+
+# FTS5 tables report no column types, so get_schema describes how to query them instead
+FTS_TABLES = {
+    'receipts_fts': 'receipts',
+    'receipt_items_fts': 'receipt_items',
+}
 
 
 class ReceiptDatabase:
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_connections: int = 4):
         # Ensure the directory exists before creating the database
         db_dir = os.path.dirname(db_path)
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
-            
-        self.conn = sqlite3.connect(db_path)
-        self.cursor = self.conn.cursor()
-        self._create_table()
 
-    def _create_table(self):
+        # Reads run in parallel on a pool of read-only connections, writes are serialized on one writer
+        self.db_path = db_path
+        self.pool = SQLiteConnectionPool(db_path, readers=read_connections, configure=self._configure_connection)
+        self.pool.write(self._create_table)
+        self.pool.write(self._migrate)
+
+        # Bumped after every write so result caches can tell when they are stale
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+
+    def _bump_generation(self):
+        with self._generation_lock:
+            self.generation += 1
+
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        # WAL lets readers proceed during writes and turns per-commit fsyncs into cheap appends
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        # INSERT OR REPLACE only fires delete triggers on the replaced row with this enabled
+        conn.execute("PRAGMA recursive_triggers=ON")
+
+    @staticmethod
+    def _create_table(conn: sqlite3.Connection):
         # Create receipts table with enhanced schema
-        self.cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS receipts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 platform TEXT NOT NULL,
@@ -53,7 +316,7 @@ class ReceiptDatabase:
         ''')
         
         # Create items table with enhanced schema
-        self.cursor.execute('''
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS receipt_items (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 receipt_id INTEGER NOT NULL,
@@ -65,29 +328,19 @@ class ReceiptDatabase:
                 FOREIGN KEY (receipt_id) REFERENCES receipts (id) ON DELETE CASCADE
             )
         ''')
-        
-        # Create index on transaction_id for faster lookups
-        self.cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transaction_id ON receipts(transaction_id)
-        ''')
 
-        self.conn.commit()
+        conn.commit()
 
-    def insert_receipt(self, receipt_data: Receipt):
-        # Insert receipt data with enhanced schema
-        self.cursor.execute('''
-            INSERT OR REPLACE INTO receipts (
-                platform, transaction_id, customer_name, date, time,
-                restaurant_name, restaurant_location,
-                delivery_address, delivery_fee, driver_name, driver_vehicle,
-                distance, estimated_time, actual_delivery_time, pickup_time,
-                payment_subtotal, payment_delivery_fee, payment_service_fee,
-                payment_discount, payment_total, 
-                payment_method, 
-                special_instructions, order_status,
-                additional_info_thank_you, additional_info_environmental, additional_info_final_note
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+            print(f"Applying receipt database migration {number}")
+            conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;")
+
+    @staticmethod
+    def _receipt_row(receipt_data: Receipt) -> tuple:
+        return (
             receipt_data.platform,
             receipt_data.transaction_id,
             receipt_data.customer_name,
@@ -114,62 +367,231 @@ class ReceiptDatabase:
             receipt_data.additional_info.thank_you_message if receipt_data.additional_info else None,
             receipt_data.additional_info.environmental_note if receipt_data.additional_info else None,
             receipt_data.additional_info.final_note if receipt_data.additional_info else None
-        ))
+        )
+
+    def _insert_receipt(self, conn: sqlite3.Connection, receipt_data: Receipt):
+        cursor = conn.cursor()
+
+        # INSERT OR REPLACE gives a replaced receipt a new id, so drop the items of the old row first
+        cursor.execute('''
+            DELETE FROM receipt_items WHERE receipt_id IN (SELECT id FROM receipts WHERE transaction_id = ?)
+        ''', (receipt_data.transaction_id,))
+
+        # Insert receipt data with enhanced schema
+        cursor.execute(INSERT_RECEIPT_SQL, self._receipt_row(receipt_data))
         
         # Get the receipt ID
-        receipt_id = self.cursor.lastrowid
-        
-        # If this was an update (INSERT OR REPLACE), get the existing receipt ID
-        if receipt_id is None:
-            self.cursor.execute('SELECT id FROM receipts WHERE transaction_id = ?', 
-                         (receipt_data.transaction_id,))
-            receipt_id = self.cursor.fetchone()[0]
-            
-            # Delete existing items for this receipt
-            self.cursor.execute('DELETE FROM receipt_items WHERE receipt_id = ?', (receipt_id,))
+        receipt_id = cursor.lastrowid
         
         # Insert items with enhanced schema
-        for item in receipt_data.items:
-            self.cursor.execute('''
-                INSERT INTO receipt_items (receipt_id, item_name, quantity, unit_price, total_price, notes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (receipt_id, item.name, item.quantity, item.unit_price, item.total_price, item.notes))
+        cursor.executemany(INSERT_ITEM_SQL, [
+            (receipt_id, item.name, item.quantity, item.unit_price, item.total_price, item.notes)
+            for item in receipt_data.items
+        ])
         
-        self.conn.commit()
+        conn.commit()
+
+    def insert_receipt(self, receipt_data: Receipt):
+        self.pool.write(self._insert_receipt, receipt_data)
+        self._bump_generation()
         
         print(f"Successfully inserted receipt {receipt_data.transaction_id} with {len(receipt_data.items)} items")
         return True
 
-    def execute_query(self, query: str, params: tuple = ()):
-        self.cursor.execute(query, params)
-        results = self.cursor.fetchall()
+    @staticmethod
+    def _lookup_receipt_ids(conn: sqlite3.Connection, transaction_ids: list) -> dict:
+        receipt_ids = {}
+        for i in range(0, len(transaction_ids), MAX_SQL_PARAMS):
+            chunk = transaction_ids[i:i + MAX_SQL_PARAMS]
+            rows = conn.execute(
+                f'SELECT transaction_id, id FROM receipts WHERE transaction_id IN ({",".join("?" * len(chunk))})',
+                chunk,
+            ).fetchall()
+            receipt_ids.update(rows)
+        return receipt_ids
+
+    def _insert_receipt_batch(self, conn: sqlite3.Connection, batch: list | ReceiptBatch) -> tuple:
+        if isinstance(batch, ReceiptBatch):
+            receipt_rows, item_rows = batch.receipt_rows(), batch.item_rows()
+        else:
+            receipt_rows = [self._receipt_row(receipt) for receipt in batch]
+            item_rows = [
+                [(item.name, item.quantity, item.unit_price, item.total_price, item.notes) for item in receipt.items]
+                for receipt in batch
+            ]
+
+        # Later duplicates within a batch win, as they would with sequential inserts
+        latest = {}
+        for receipt_row, items in zip(receipt_rows, item_rows):
+            transaction_id = receipt_row[1]
+            latest.pop(transaction_id, None)
+            latest[transaction_id] = (receipt_row, items)
+        transaction_ids = list(latest)
+
+        with conn:
+            # Only receipts being replaced have old items to drop
+            replaced_ids = list(self._lookup_receipt_ids(conn, transaction_ids).values())
+            for i in range(0, len(replaced_ids), MAX_SQL_PARAMS):
+                chunk = replaced_ids[i:i + MAX_SQL_PARAMS]
+                conn.execute(f'DELETE FROM receipt_items WHERE receipt_id IN ({",".join("?" * len(chunk))})', chunk)
+
+            conn.executemany(INSERT_RECEIPT_SQL, [receipt_row for receipt_row, _ in latest.values()])
+            receipt_ids = self._lookup_receipt_ids(conn, transaction_ids)
+
+            rows = [
+                (receipt_ids[transaction_id],) + item
+                for transaction_id, (_, items) in latest.items()
+                for item in items
+            ]
+            conn.executemany(INSERT_ITEM_SQL, rows)
+
+        return len(latest), len(rows)
+
+    @staticmethod
+    def _iter_batches(receipts: Iterable[Receipt] | ReceiptBatch, batch_size: int) -> Iterator[list | ReceiptBatch]:
+        if isinstance(receipts, ReceiptBatch):
+            for start in range(0, len(receipts), batch_size):
+                yield receipts.slice(start, start + batch_size)
+            return
+
+        receipts = iter(receipts)
+        while batch := list(islice(receipts, batch_size)):
+            yield batch
+
+    def insert_receipts(self, receipts: Iterable[Receipt] | ReceiptBatch, batch_size: int = 5000) -> dict:
+        """Bulk upsert with one transaction per `batch_size` receipts.
+
+        Same semantics as calling `insert_receipt` for each receipt in order: a receipt whose
+        transaction_id already exists replaces the old row and its items. A `ReceiptBatch` is
+        inserted straight from its columns without building `Receipt` objects.
+        """
+        start = time.perf_counter()
+        receipt_count = 0
+        item_count = 0
+
+        for batch in self._iter_batches(receipts, batch_size):
+            # Each batch is its own write task, so other writers can interleave between batches
+            inserted_receipts, inserted_items = self.pool.write(self._insert_receipt_batch, batch)
+            self._bump_generation()
+            receipt_count += inserted_receipts
+            item_count += inserted_items
+
+        elapsed = time.perf_counter() - start
+        rows_per_second = (receipt_count + item_count) / elapsed if elapsed else 0.0
+        print(f"Inserted {receipt_count} receipts and {item_count} items in {elapsed:.2f}s ({rows_per_second:,.0f} rows/s)")
+
+        return {
+            "receipts": receipt_count,
+            "items": item_count,
+            "elapsed": elapsed,
+            "rows_per_second": rows_per_second,
+        }
+
+    @staticmethod
+    def _column_names(cursor: sqlite3.Cursor) -> List[str]:
+        return [description[0] for description in cursor.description] if cursor.description else []
+
+    @classmethod
+    def _execute_query(cls, conn: sqlite3.Connection, query: str, params: tuple = (), max_rows: Optional[int] = None, time_limit: Optional[float] = None):
+        # The progress handler aborts the statement with "interrupted" once the deadline passes
+        if time_limit is not None:
+            deadline = time.monotonic() + time_limit
+            conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_STEPS)
+        try:
+            cursor = conn.execute(query, params)
+            results = cursor.fetchall() if max_rows is None else cursor.fetchmany(max_rows + 1)
+        finally:
+            if time_limit is not None:
+                conn.set_progress_handler(None, 0)
+
+        if max_rows is not None and len(results) > max_rows:
+            print(f"Query returned more than {max_rows} rows, truncating")
+            results = results[:max_rows]
         
         # Get column names from cursor description
-        column_names = [description[0] for description in self.cursor.description]
+        column_names = cls._column_names(cursor)
         
         # Convert results to list of dictionaries
         dict_results = []
         for row in results:
             dict_results.append(dict(zip(column_names, row)))
         
+        conn.commit()
         return dict_results
 
+    def execute_query(self, query: str, params: tuple = (), max_rows: Optional[int] = None, time_limit: Optional[float] = None):
+        try:
+            return self.pool.read(self._execute_query, query, params, max_rows, time_limit)
+        except sqlite3.OperationalError as e:
+            # Reader connections are query_only; statements that modify data go to the writer
+            if "readonly" not in str(e):
+                raise
+            results = self.pool.write(self._execute_query, query, params, max_rows, time_limit)
+            self._bump_generation()
+            return results
+
+    def iter_query(self, query: str, params: tuple = (), batch_size: int = 1000) -> Iterator[dict]:
+        """Stream rows as dicts, holding at most `batch_size` rows in memory at a time.
+
+        A reader connection is held until the iterator is exhausted or closed.
+        """
+        if self.pool.reader_count == 0:
+            yield from self.execute_query(query, params, max_rows=None)
+            return
+
+        with self.pool.reader() as conn:
+            cursor = conn.execute(query, params)
+            column_names = self._column_names(cursor)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(column_names, row))
+
+    def query_page(self, query: str, params: tuple = (), page: int = 0, page_size: int = 100) -> List[dict]:
+        """Return one page of `query`'s results; the query should have a deterministic ORDER BY and no LIMIT."""
+        # Appended to the caller's statement rather than wrapping it in a subquery, whose ORDER BY
+        # SQLite is free to drop
+        paged_query = f"{query.strip().rstrip(';')} LIMIT ? OFFSET ?"
+        return self.execute_query(paged_query, tuple(params) + (page_size, page * page_size), max_rows=page_size)
+
+    @classmethod
+    def _query_dataframe(cls, conn: sqlite3.Connection, query: str, params: tuple, max_rows: Optional[int]):
+        # Imported here so only callers that want a DataFrame pay for pandas
+        import pandas as pd
+
+        cursor = conn.execute(query, params)
+        rows = cursor.fetchall() if max_rows is None else cursor.fetchmany(max_rows)
+
+        # Joins like r.id / ri.id produce duplicate names, which DataFrame consumers reject
+        column_names = []
+        for name in cls._column_names(cursor):
+            unique_name, suffix = name, 1
+            while unique_name in column_names:
+                unique_name, suffix = f"{name}_{suffix}", suffix + 1
+            column_names.append(unique_name)
+
+        return pd.DataFrame.from_records(rows, columns=column_names)
+
+    def query_dataframe(self, query: str, params: tuple = (), max_rows: Optional[int] = None):
+        """Build a pandas DataFrame straight from the cursor's row tuples, capped at `max_rows` if given."""
+        return self.pool.read(self._query_dataframe, query, params, max_rows)
+
+    @staticmethod
+    def _get_schema(conn: sqlite3.Connection):
+        schema = {}
+        for table in SCHEMA_TABLES:
+            columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            if table in FTS_TABLES:
+                # rowid is the id of the matching row in the content table
+                schema[table] = {col[1]: f"FTS5 (MATCH; rowid = {FTS_TABLES[table]}.id)" for col in columns}
+            else:
+                schema[table] = {col[1]: col[2] for col in columns}  # {column_name: data_type}
+        return schema
+
     def get_schema(self):
-        # Get receipts table schema
-        self.cursor.execute("PRAGMA table_info(receipts)")
-        receipts_columns = self.cursor.fetchall()
-        receipts_schema = {col[1]: col[2] for col in receipts_columns}  # {column_name: data_type}
-        
-        # Get receipt_items table schema
-        self.cursor.execute("PRAGMA table_info(receipt_items)")
-        items_columns = self.cursor.fetchall()
-        items_schema = {col[1]: col[2] for col in items_columns}  # {column_name: data_type}
-        
-        return {
-            'receipts': receipts_schema,
-            'receipt_items': items_schema
-        }
+        return self.pool.read(self._get_schema)
     
     def close(self):
-        self.conn.close()
-    
\ No newline at end of file
+        self.pool.close()
@@ -0,0 +1,132 @@
+import re
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.database.local_database import ReceiptDatabase
+
+
+def normalize_sql(query: str) -> str:
+    """Lowercase and collapse whitespace outside string literals, and drop trailing semicolons."""
+    parts = re.split(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""", query.strip().rstrip(";").strip())
+    # Odd indices are the quoted literals captured by the split and are kept verbatim
+    return "".join(part if i % 2 else " ".join(part.lower().split()) for i, part in enumerate(parts))
+
+
+# Keywords that can start the statement following a WITH clause
+STATEMENT_KEYWORDS = {"select", "values", "insert", "replace", "update", "delete"}
+
+
+def _statement_keyword(normalized_query: str) -> Optional[str]:
+    """The keyword of the statement itself, skipping a leading WITH clause and its parenthesized CTE bodies."""
+    # Literals and quoted identifiers could contain anything, including parentheses
+    unquoted = re.sub(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\]""", "''", normalized_query)
+    depth = 0
+    for token in re.findall(r"[()]|[a-z_]+", unquoted):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token in STATEMENT_KEYWORDS:
+            return token
+    return None
+
+
+def is_read_only_sql(normalized_query: str) -> bool:
+    if normalized_query.startswith("select"):
+        return True
+    # WITH ... DELETE/UPDATE/INSERT is a write
+    return normalized_query.startswith("with") and _statement_keyword(normalized_query) in ("select", "values")
+
+
+class GuardedQueryRunner:
+    """Runs agent-written SQL with a time and row budget, and caches read results until the next write.
+
+    Results are returned as a JSON string meant for the model, including a note when rows were cut off.
+    """
+
+    def __init__(self, database: ReceiptDatabase, max_rows: int = 200, time_limit: float = 5.0, cache_size: int = 128, cache_ttl: float = 300.0):
+        self.database = database
+        self.max_rows = max_rows
+        self.time_limit = time_limit
+        self.cache_size = cache_size
+        # The TTL bounds staleness from writers in other processes, which don't bump the generation
+        self.cache_ttl = cache_ttl
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            generation, created_at, result = entry
+            if generation != self.database.generation or time.monotonic() - created_at > self.cache_ttl:
+                del self._cache[key]
+                self.misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _cache_put(self, key: str, generation: int, result: str):
+        with self._lock:
+            self._cache[key] = (generation, time.monotonic(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _format_result(self, rows: list) -> str:
+        truncated = len(rows) > self.max_rows
+        rows = rows[:self.max_rows]
+        result = {
+            "row_count": len(rows),
+            "truncated": truncated,
+            "rows": rows,
+        }
+        if truncated:
+            result["note"] = (
+                f"Only the first {self.max_rows} rows are shown. "
+                "Use aggregates, filters or LIMIT to answer without listing every row."
+            )
+        return json.dumps(result, default=str)
+
+    def run(self, query: str) -> str:
+        key = normalize_sql(query)
+        read_only = is_read_only_sql(key)
+        if read_only:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+        # Read the generation before running so a write racing with this query invalidates the entry
+        generation = self.database.generation
+        try:
+            rows = self.database.execute_query(query, max_rows=self.max_rows + 1, time_limit=self.time_limit)
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                return json.dumps({
+                    "error": f"Query exceeded the {self.time_limit:g}s time budget and was cancelled. "
+                             "Avoid cross joins and filter or aggregate earlier."
+                })
+            return json.dumps({"error": str(e)})
+        except sqlite3.Error as e:
+            return json.dumps({"error": str(e)})
+
+        result = self._format_result(rows)
+        if read_only:
+            self._cache_put(key, generation, result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
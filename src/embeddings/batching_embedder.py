@@ -0,0 +1,163 @@
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from .embedder_base import EmbeddingBaseModel
+
+
+@dataclass
+class BatchRecord:
+    size: int
+    requests: int
+    fill: float
+    # Seconds the oldest request in the batch waited for it to be sent, and the upstream call took
+    wait: float
+    upstream: float
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: Future
+    enqueued: float
+
+
+class MicroBatchingEmbedder(EmbeddingBaseModel):
+    """Gathers concurrent embed_query/embed_texts calls into shared upstream embed_texts requests.
+
+    A batch is sent once it holds `max_batch_size` texts, or `window` seconds after its first
+    request arrived, so a call waits at most about `window` longer than it would alone. Up to
+    `max_concurrent_batches` batches are in flight at once. Calls with more than
+    `max_batch_size` texts go straight to the wrapped embedder. Queries are embedded through
+    the wrapped embedder's `embed_texts`, which must give the same vectors as `embed_query`.
+
+    Meant to be shared by every session in a process; `stats()` reports how full batches were.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingBaseModel,
+        window: float = 0.01,
+        max_batch_size: int = 64,
+        max_concurrent_batches: int = 4,
+        history_size: int = 1000,
+    ):
+        super().__init__(embedder.model_name, embedder.vector_size)
+        self.embedder = embedder
+        self.model = embedder.model
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self.history = deque(maxlen=history_size)
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+
+        self._pending = deque()
+        self._pending_texts = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="embed-batch")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="embed-batcher", daemon=True)
+        self._dispatcher.start()
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if len(texts) > self.max_batch_size:
+            return self.embedder.embed_texts(texts)
+        return self._submit(list(texts)).result()
+
+    def embed_query(self, query: str) -> List[float]:
+        return self._submit([query]).result()[0]
+
+    def _submit(self, texts: List[str]) -> Future:
+        request = _Request(texts, Future(), time.perf_counter())
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("MicroBatchingEmbedder is closed")
+            self._pending.append(request)
+            self._pending_texts += len(texts)
+            self._condition.notify()
+        return request.future
+
+    def _dispatch_loop(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+
+                # Hold the batch open until it is full or its first request has waited a window
+                deadline = self._pending[0].enqueued + self.window
+                while self._pending_texts < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch, size = [], 0
+                while self._pending and size + len(self._pending[0].texts) <= self.max_batch_size:
+                    request = self._pending.popleft()
+                    batch.append(request)
+                    size += len(request.texts)
+                self._pending_texts -= size
+
+            self._executor.submit(self._run_batch, batch, size)
+
+    def _run_batch(self, batch: List[_Request], size: int):
+        started = time.perf_counter()
+        texts = [text for request in batch for text in request.texts]
+        try:
+            vectors = self.embedder.embed_texts(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Embedder returned {len(vectors)} vectors for {len(texts)} texts")
+        except BaseException as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        upstream = time.perf_counter() - started
+
+        start = 0
+        for request in batch:
+            request.future.set_result(vectors[start:start + len(request.texts)])
+            start += len(request.texts)
+
+        with self._condition:
+            self.batches += 1
+            self.requests += len(batch)
+            self.texts += size
+            self.history.append(BatchRecord(size, len(batch), size / self.max_batch_size, started - batch[0].enqueued, upstream))
+
+    def stats(self) -> dict:
+        """Totals since start, plus averages over the most recent batches."""
+        with self._condition:
+            history = list(self.history)
+            stats = {
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "pending": self._pending_texts,
+            }
+        if history:
+            stats.update({
+                "mean_batch_size": sum(record.size for record in history) / len(history),
+                "mean_fill": sum(record.fill for record in history) / len(history),
+                "full_batch_ratio": sum(record.size == self.max_batch_size for record in history) / len(history),
+                "mean_wait_ms": 1000 * sum(record.wait for record in history) / len(history),
+                "max_wait_ms": 1000 * max(record.wait for record in history),
+                "mean_upstream_ms": 1000 * sum(record.upstream for record in history) / len(history),
+            })
+        return stats
+
+    def close(self):
+        """Send what is pending, then stop the dispatcher and wait for batches in flight."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
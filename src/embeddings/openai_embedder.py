@@ -1,4 +1,3 @@
-from langchain_openai import OpenAIEmbeddings
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 from .embedder_base import EmbeddingBaseModel
 
@@ -8,6 +7,9 @@ class OpenAIEmbeddingModel(EmbeddingBaseModel):
     def __init__(self, model_name: str = "text-embedding-3-small", vector_size: int = 1536):
         super().__init__(model_name, vector_size)
 
+        # Imported here, langchain_openai takes about a second to import
+        from langchain_openai import OpenAIEmbeddings
+
         self.model = OpenAIEmbeddings(
             model=model_name,
         )
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import argparse
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from tenacity import Retrying, stop_after_attempt, wait_exponential
+
+from src.utils import request_receipt_extraction, parse_receipt_response
+from src.models.receipt import Receipt
+from src.database.local_database import ReceiptDatabase
+from src.extraction.cache import ExtractionCache
+from src.extraction.pdf import extract_pdf_content
+from src.extraction.image import preprocess_receipt_image
+from src.extraction.templates import TemplateRegistry, default_registry
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+SUPPORTED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".pdf")
+
+
+class ReceiptExtractionError(Exception):
+    """Raised when a single receipt file could not be turned into a Receipt."""
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls out to at most `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: Optional[float] = None):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        if not self.interval:
+            return
+
+        # Reserve the next free slot under the lock, then sleep outside of it
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BatchState:
+    """Append-only JSONL log of processed files so an interrupted run can resume."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.completed = set()
+
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A crash may leave a partially written last line
+                        continue
+                    if record.get("status") == "done":
+                        self.completed.add(record["path"])
+
+    def is_done(self, path: str) -> bool:
+        return os.path.abspath(path) in self.completed
+
+    def record(self, path: str, status: str, **extra):
+        path = os.path.abspath(path)
+        if status == "done":
+            self.completed.add(path)
+
+        if not self.path:
+            return
+
+        state_dir = os.path.dirname(self.path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"path": path, "status": status, **extra}) + "\n")
+
+
+@dataclass
+class BatchReport:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    elapsed: float = 0.0
+    # Only filled with run(collect_receipts=True); a large run would otherwise hold every receipt
+    receipts: List[Receipt] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Processed files per second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Processed {self.processed}/{self.total - self.skipped} files "
+            f"({self.succeeded} succeeded, {self.failed} failed, {self.skipped} skipped) "
+            f"in {self.elapsed:.1f}s - {self.throughput:.2f} files/s"
+        )
+
+
+def find_receipt_files(directory: str) -> List[str]:
+    paths = []
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+
+class BatchReceiptExtractor:
+
+    def __init__(
+        self,
+        openai_client: "OpenAI",
+        database: Optional[ReceiptDatabase] = None,
+        cache: Optional[ExtractionCache] = None,
+        preprocess_images: bool = True,
+        templates: Optional[TemplateRegistry] = default_registry,
+        max_workers: int = 4,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 3,
+        retry_wait: float = 1.0,
+        db_batch_size: int = 50,
+        state_path: Optional[str] = None,
+        progress_every: int = 10,
+    ):
+        self.openai_client = openai_client
+        self.database = database
+        self.cache = cache
+        self.preprocess_images = preprocess_images
+        self.templates = templates
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_minute)
+        self.max_retries = max_retries
+        self.retry_wait = retry_wait
+        self.db_batch_size = db_batch_size
+        self.state = BatchState(state_path)
+        self.progress_every = progress_every
+
+    def extract_file(self, path: str) -> Receipt:
+        with open(path, "rb") as f:
+            data = f.read()
+        return self.extract_bytes(data, is_pdf=path.lower().endswith(".pdf"))
+
+    def extract_bytes(self, data: bytes, is_pdf: bool = False) -> Receipt:
+        """Extract a receipt from the contents of an image or PDF file."""
+        if len(data) == 0:
+            raise ReceiptExtractionError("file is empty")
+
+        # Cached by the uploaded bytes, so a hit skips preprocessing and its key ignores its settings
+        raw_data = data
+
+        if is_pdf:
+            # Text-native PDFs go through the text path; scanned pages are rasterized for vision
+            data = extract_pdf_content(data).payload
+            if not data:
+                raise ReceiptExtractionError("PDF has no pages to extract")
+
+        # Known templates parse deterministically in milliseconds, the LLM is only the fallback
+        if isinstance(data, str) and self.templates is not None:
+            receipt = self.templates.parse(data)
+            if receipt is not None:
+                return receipt
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(raw_data)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached[0]
+
+        if self.preprocess_images:
+            if isinstance(data, bytes):
+                data = preprocess_receipt_image(data).data
+            elif isinstance(data, list):
+                data = [preprocess_receipt_image(part).data if isinstance(part, bytes) else part for part in data]
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_exponential(multiplier=self.retry_wait, max=10),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                self.rate_limiter.acquire()
+                content = request_receipt_extraction(self.openai_client, data)
+                receipt = parse_receipt_response(content)
+
+        if self.cache is not None:
+            self.cache.put(key, receipt, content)
+        return receipt
+
+    def _flush(self, buffer: List[Tuple[str, Receipt]], report: BatchReport):
+        if not buffer:
+            return
+
+        failed = set()
+        if self.database is not None:
+            try:
+                self.database.insert_receipts(receipt for _, receipt in buffer)
+            except Exception as e:
+                # The batch was rolled back, retry one by one to isolate the bad receipts
+                print(f"Bulk insert failed ({e}), retrying receipts individually")
+                for path, receipt in buffer:
+                    try:
+                        self.database.insert_receipt(receipt)
+                    except Exception as e:
+                        failed.add(path)
+                        report.succeeded -= 1
+                        report.failed += 1
+                        report.errors[path] = f"database insert failed: {e}"
+                        self.state.record(path, "failed", error=report.errors[path])
+
+        for path, receipt in buffer:
+            if path not in failed:
+                self.state.record(path, "done", transaction_id=receipt.transaction_id)
+        buffer.clear()
+
+    def run(
+        self,
+        paths: Iterable[str],
+        collect_receipts: bool = False,
+        on_receipt: Optional[Callable[[str, Receipt], None]] = None,
+    ) -> BatchReport:
+        """Extract `paths` and store the receipts in the database as they come in.
+
+        Receipts are not kept once written: pass `on_receipt(path, receipt)` to stream them,
+        or `collect_receipts=True` to get them all back in `report.receipts`.
+        """
+        report = BatchReport()
+
+        pending = []
+        for path in paths:
+            report.total += 1
+            if self.state.is_done(path):
+                report.skipped += 1
+            else:
+                pending.append(path)
+
+        print(f"Extracting {len(pending)} receipts with {self.max_workers} workers ({report.skipped} already done)")
+        start = time.perf_counter()
+
+        # Extraction runs on the pool; database flushes and state updates stay on this thread
+        # so the state file only ever has one writer.
+        buffer = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.extract_file, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    receipt = future.result()
+                except Exception as e:
+                    report.failed += 1
+                    report.errors[path] = str(e)
+                    self.state.record(path, "failed", error=str(e))
+                else:
+                    report.succeeded += 1
+                    if collect_receipts:
+                        report.receipts.append(receipt)
+                    if on_receipt is not None:
+                        on_receipt(path, receipt)
+                    buffer.append((path, receipt))
+                    if len(buffer) >= self.db_batch_size:
+                        self._flush(buffer, report)
+
+                if self.progress_every and report.processed % self.progress_every == 0:
+                    report.elapsed = time.perf_counter() - start
+                    print(f"[{report.processed}/{len(pending)}] {report.throughput:.2f} files/s, {report.failed} failed")
+
+        self._flush(buffer, report)
+        report.elapsed = time.perf_counter() - start
+
+        print(report.summary())
+        if self.templates is not None:
+            print(f"Template fast path: {self.templates.stats()}")
+        return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract a directory of receipts and store them in the receipt database.")
+    parser.add_argument("directory", help="Directory containing receipt images/PDFs")
+    parser.add_argument("--db", default="data/receipts.db", help="Path to the SQLite receipt database")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent extraction requests")
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum extraction requests per minute")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per file before giving up")
+    parser.add_argument("--batch-size", type=int, default=50, help="Receipts written to the database per flush")
+    parser.add_argument("--state", default="data/batch_extraction_state.jsonl", help="Resumable state file")
+    parser.add_argument("--cache", default="data/extraction_cache.db", help="Extraction cache database (empty string disables it)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from openai import OpenAI
+    load_dotenv()
+
+    database = ReceiptDatabase(db_path=args.db)
+    cache = ExtractionCache(db_path=args.cache) if args.cache else None
+    extractor = BatchReceiptExtractor(
+        openai_client=OpenAI(),
+        database=database,
+        cache=cache,
+        max_workers=args.workers,
+        requests_per_minute=args.rpm,
+        max_retries=args.retries,
+        db_batch_size=args.batch_size,
+        state_path=args.state,
+    )
+
+    try:
+        report = extractor.run(find_receipt_files(args.directory))
+    finally:
+        database.close()
+        if cache is not None:
+            cache.close()
+
+    for path, error in report.errors.items():
+        print(f"FAILED {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
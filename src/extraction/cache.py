@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from src.models.receipt import Receipt
+from src.utils import (
+    RECEIPT_EXTRACTION_MODEL,
+    RECEIPT_PROMPT_VERSION,
+    request_receipt_extraction,
+    parse_receipt_response,
+)
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+class ExtractionCache:
+    """Persistent cache of receipt extractions keyed by content hash, prompt version and model.
+
+    Entries are evicted least-recently-used first once either `max_entries` or
+    `max_bytes` (size of the stored responses) is exceeded.
+    """
+
+    def __init__(self, db_path: str = "data/extraction_cache.db", max_entries: int = 10_000, max_bytes: int = 256 * 1024 * 1024):
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        # Shared by Streamlit sessions and batch workers, so guard the connection with a lock
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._create_table()
+
+    def _create_table(self):
+        with self._lock:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    raw_response TEXT NOT NULL,
+                    receipt_json TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                )
+            ''')
+            self.conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_accessed ON extraction_cache(last_accessed)
+            ''')
+            self.conn.commit()
+
+    @staticmethod
+    def make_key(data: bytes | str | List[bytes | str], model: str = RECEIPT_EXTRACTION_MODEL, prompt_version: str = RECEIPT_PROMPT_VERSION) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{model}\0{prompt_version}\0".encode("utf-8"))
+        if isinstance(data, list):
+            # Length-prefixed so that different splits of the same bytes get different keys
+            digest.update(b"parts\0")
+            for part in data:
+                encoded = part if isinstance(part, bytes) else part.encode("utf-8")
+                digest.update(b"bytes\0" if isinstance(part, bytes) else b"text\0")
+                digest.update(len(encoded).to_bytes(8, "big") + encoded)
+        elif isinstance(data, bytes):
+            digest.update(b"bytes\0" + data)
+        else:
+            digest.update(b"text\0" + data.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Receipt, str]]:
+        """Return the cached (receipt, raw_response) for `key`, or None on a miss."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT receipt_json, raw_response FROM extraction_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.conn.execute('UPDATE extraction_cache SET last_accessed = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        return Receipt.from_dict(json.loads(row[0])), row[1]
+
+    def put(self, key: str, receipt: Receipt, raw_response: str, model: str = RECEIPT_EXTRACTION_MODEL, prompt_version: str = RECEIPT_PROMPT_VERSION):
+        receipt_json = json.dumps(receipt.to_dict())
+        size = len(receipt_json) + len(raw_response)
+        now = time.time()
+
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO extraction_cache (
+                    key, model, prompt_version, raw_response, receipt_json, size, created_at, last_accessed
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (key, model, prompt_version, raw_response, receipt_json, size, now, now))
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        count, total_size = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache'
+        ).fetchone()
+        if count <= self.max_entries and total_size <= self.max_bytes:
+            return
+
+        # Walk entries from least recently used and drop until both limits hold again
+        to_delete = []
+        for key, size in self.conn.execute('SELECT key, size FROM extraction_cache ORDER BY last_accessed ASC'):
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total_size -= size
+
+        self.conn.executemany('DELETE FROM extraction_cache WHERE key = ?', to_delete)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total_size = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": count,
+            "bytes": total_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM extraction_cache')
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def extract_receipt_info_cached(openai_client: "OpenAI", data: bytes | str | List[bytes | str], cache: ExtractionCache, model: str = RECEIPT_EXTRACTION_MODEL) -> Receipt:
+    """Same contract as `extract_receipt_info`, but duplicate receipts are served from `cache`."""
+    key = cache.make_key(data, model=model)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached[0]
+
+    content = None
+    try:
+        content = request_receipt_extraction(openai_client, data, model=model)
+        receipt = parse_receipt_response(content)
+
+    except json.JSONDecodeError as e:
+        print(f"Failed to parse JSON response: {e}")
+        return {"error": "Failed to parse receipt information", "raw_response": content}
+
+    except Exception as e:
+        print(f"Error extracting receipt information: {e}")
+        return {"error": str(e)}
+
+    # Only successful extractions are cached so failures get retried next time
+    cache.put(key, receipt, content, model=model)
+    return receipt
@@ -0,0 +1,113 @@
+import io
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from PIL import Image, ImageOps
+
+
+@dataclass
+class PreprocessedImage:
+    data: bytes
+    original_bytes: int
+    original_size: Tuple[int, int]
+    size: Tuple[int, int]
+
+    @property
+    def byte_reduction(self) -> float:
+        """Fraction of bytes removed, 0.0 when the original was kept."""
+        return 1 - len(self.data) / self.original_bytes if self.original_bytes else 0.0
+
+    @property
+    def pixel_reduction(self) -> float:
+        original_pixels = self.original_size[0] * self.original_size[1]
+        return 1 - (self.size[0] * self.size[1]) / original_pixels if original_pixels else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.original_bytes / 1024:.1f} KB -> {len(self.data) / 1024:.1f} KB ({self.byte_reduction:.0%} smaller), "
+            f"{self.original_size[0]}x{self.original_size[1]} -> {self.size[0]}x{self.size[1]} px ({self.pixel_reduction:.0%} fewer pixels)"
+        )
+
+
+def find_receipt_bbox(image: Image.Image, tolerance: int = 40, min_fraction: float = 0.1, padding: float = 0.02) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box of the region that stands out from the border colour, or None if no useful crop exists."""
+    # Work on a small grayscale copy, the box only needs to be approximate
+    gray = image.convert("L")
+    scale = max(gray.size) / 256
+    small = gray.resize((max(1, int(gray.width / scale)), max(1, int(gray.height / scale)))) if scale > 1 else gray
+    scale = gray.width / small.width
+
+    width, height = small.size
+    pixels = small.load()
+    border = sorted(
+        [pixels[x, 0] for x in range(width)] + [pixels[x, height - 1] for x in range(width)]
+        + [pixels[0, y] for y in range(height)] + [pixels[width - 1, y] for y in range(height)]
+    )
+    background = border[len(border) // 2]
+
+    mask = small.point(lambda p: 255 if abs(p - background) > tolerance else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return None
+
+    left, top, right, bottom = bbox
+    if (right - left) * (bottom - top) < min_fraction * width * height:
+        return None
+
+    pad_x, pad_y = padding * width, padding * height
+    return (
+        max(0, int((left - pad_x) * scale)),
+        max(0, int((top - pad_y) * scale)),
+        min(image.width, int((right + pad_x) * scale)),
+        min(image.height, int((bottom + pad_y) * scale)),
+    )
+
+
+def preprocess_receipt_image(
+    data: bytes,
+    max_long_edge: int = 1600,
+    grayscale: bool = True,
+    crop: bool = True,
+    image_format: str = "JPEG",
+    quality: int = 85,
+) -> PreprocessedImage:
+    """Rotate, crop, grayscale, downscale and re-encode a receipt photo before sending it to the vision model.
+
+    The original bytes are kept whenever re-encoding would not make the payload smaller.
+    The request's MIME type is sniffed from the bytes, see `detect_image_mime_type`.
+    """
+    with Image.open(io.BytesIO(data)) as opened:
+        original_size = opened.size
+        image = ImageOps.exif_transpose(opened)
+
+    if crop:
+        bbox = find_receipt_bbox(image)
+        if bbox is not None:
+            image = image.crop(bbox)
+
+    if grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    if max(image.size) > max_long_edge:
+        image.thumbnail((max_long_edge, max_long_edge), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=quality, optimize=True)
+    output = buffer.getvalue()
+
+    if len(output) >= len(data) and image.size == original_size:
+        return PreprocessedImage(
+            data=data,
+            original_bytes=len(data),
+            original_size=original_size,
+            size=original_size,
+        )
+
+    return PreprocessedImage(
+        data=output,
+        original_bytes=len(data),
+        original_size=original_size,
+        size=image.size,
+    )
@@ -0,0 +1,151 @@
+import time
+import uuid
+import threading
+import dataclasses
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait as wait_for_futures
+from typing import Dict, List, Optional
+
+from src.models.receipt import Receipt
+from src.database.local_database import ReceiptDatabase
+from src.extraction.batch import BatchReceiptExtractor
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class ExtractionJob:
+    id: str
+    name: str
+    status: str = QUEUED
+    receipt: Optional[Receipt] = None
+    error: Optional[str] = None
+    stored: bool = False
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from submission until the job finished, or until now while it is pending."""
+        return (self.finished_at or time.time()) - self.submitted_at
+
+
+class ExtractionJobQueue:
+    """Runs receipt extractions on a worker pool so callers never wait on the vision model.
+
+    `submit` returns a job id straight away; `get` and `jobs` return snapshots of job status
+    for polling. Finished receipts are handed to the database by `store`, or as soon as they
+    are extracted with `auto_store`. Extraction itself (templates, cache, retries and rate
+    limit) is the extractor's. Only the `max_finished` most recent finished jobs are kept.
+    """
+
+    def __init__(
+        self,
+        extractor: BatchReceiptExtractor,
+        database: Optional[ReceiptDatabase] = None,
+        max_workers: int = 4,
+        auto_store: bool = False,
+        max_finished: int = 1000,
+    ):
+        self.extractor = extractor
+        self.database = database
+        self.auto_store = auto_store
+        self.max_finished = max_finished
+
+        self._jobs: Dict[str, ExtractionJob] = {}
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="receipt-extraction")
+
+    def submit(self, name: str, data: bytes) -> str:
+        job = ExtractionJob(id=str(uuid.uuid4()), name=name, submitted_at=time.time())
+        with self._lock:
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(self._run, job, data, name.lower().endswith(".pdf"))
+        return job.id
+
+    def _run(self, job: ExtractionJob, data: bytes, is_pdf: bool):
+        with self._lock:
+            job.status, job.started_at = RUNNING, time.time()
+
+        try:
+            receipt = self.extractor.extract_bytes(data, is_pdf=is_pdf)
+        except Exception as e:
+            with self._lock:
+                job.status, job.error, job.finished_at = FAILED, str(e), time.time()
+        else:
+            with self._lock:
+                job.status, job.receipt, job.finished_at = DONE, receipt, time.time()
+            if self.auto_store and self.database is not None:
+                try:
+                    self.store(job.id)
+                except Exception as e:
+                    # The receipt is still there for a later `store`
+                    with self._lock:
+                        job.error = f"database insert failed: {e}"
+        finally:
+            with self._lock:
+                self._futures.pop(job.id, None)
+                self._forget_finished()
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[ExtractionJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dataclasses.replace(job) if job is not None else None
+
+    def jobs(self, job_ids: Optional[List[str]] = None) -> List[ExtractionJob]:
+        """Snapshots of the given jobs, or of all jobs, in submission order. Unknown ids are skipped."""
+        with self._lock:
+            selected = self._jobs.values() if job_ids is None else [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+            return [dataclasses.replace(job) for job in selected]
+
+    def wait(self, job_ids: Optional[List[str]] = None, timeout: Optional[float] = None) -> List[ExtractionJob]:
+        with self._lock:
+            futures = [future for job_id, future in self._futures.items() if job_ids is None or job_id in job_ids]
+        wait_for_futures(futures, timeout=timeout)
+        return self.jobs(job_ids)
+
+    def store(self, job_id: str) -> bool:
+        """Insert a finished job's receipt into the database, once. Returns False if there is nothing to store."""
+        if self.database is None:
+            raise RuntimeError("This queue has no database to store receipts in")
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != DONE or job.stored:
+                return False
+            # Claimed before the write so a second caller can't insert it again
+            job.stored = True
+
+        try:
+            self.database.insert_receipt(job.receipt)
+        except Exception:
+            with self._lock:
+                job.stored = False
+            raise
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            counts["stored"] = sum(job.stored for job in self._jobs.values())
+            return counts
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,128 @@
+import os
+import multiprocessing
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+
+# Pages with fewer non-whitespace characters than this are treated as scanned images
+MIN_TEXT_CHARS = 20
+
+# Documents shorter than this are not worth the cost of starting worker processes
+PARALLEL_PAGE_THRESHOLD = 16
+
+
+@dataclass
+class PdfPage:
+    index: int
+    text: str = ""
+    image: Optional[bytes] = None
+
+    @property
+    def has_text(self) -> bool:
+        return self.image is None
+
+
+@dataclass
+class PdfContent:
+    pages: List[PdfPage] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "".join(page.text for page in self.pages if page.has_text)
+
+    @property
+    def images(self) -> List[bytes]:
+        return [page.image for page in self.pages if not page.has_text]
+
+    @property
+    def payload(self) -> bytes | str | List[bytes | str]:
+        """What to send to `extract_receipt_info`.
+
+        The text layer when every page has one, the image when the only page is scanned, and
+        otherwise every page in order, with consecutive text pages joined and scanned pages as images.
+        """
+        if not self.images:
+            return self.text if self.text.strip() else ""
+        if len(self.pages) == 1:
+            return self.images[0]
+
+        parts = []
+        for page in self.pages:
+            if not page.has_text:
+                parts.append(page.image)
+            elif parts and isinstance(parts[-1], str):
+                parts[-1] += page.text
+            elif page.text.strip():
+                parts.append(page.text)
+        return parts
+
+
+def has_text_layer(text: str, min_chars: int = MIN_TEXT_CHARS) -> bool:
+    return len("".join(text.split())) >= min_chars
+
+
+def _extract_page(page, min_text_chars: int, dpi: int, rasterize: bool) -> PdfPage:
+    text = page.get_text()
+    if has_text_layer(text, min_text_chars) or not rasterize:
+        return PdfPage(index=page.number, text=text)
+
+    # No usable text layer, fall back to an image for the vision path
+    pixmap = page.get_pixmap(dpi=dpi)
+    return PdfPage(index=page.number, image=pixmap.tobytes("png"))
+
+
+def _extract_page_range(data_bytes: bytes, start: int, stop: int, min_text_chars: int, dpi: int, rasterize: bool) -> List[PdfPage]:
+    import fitz
+
+    # Runs in a worker process, so it reopens the document from bytes
+    with fitz.open(stream=data_bytes, filetype="pdf") as doc:
+        return [_extract_page(doc[i], min_text_chars, dpi, rasterize) for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    data_bytes: bytes,
+    min_text_chars: int = MIN_TEXT_CHARS,
+    dpi: int = 150,
+    rasterize: bool = True,
+    max_workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_PAGE_THRESHOLD,
+    pages_per_task: int = 8,
+) -> Iterator[PdfPage]:
+    """Yield pages in order, rasterizing only pages without a usable text layer.
+
+    Documents with at least `parallel_threshold` pages are split into ranges of
+    `pages_per_task` pages and extracted across a process pool.
+    Raises on invalid PDFs, unlike `extract_text_from_pdf`.
+    """
+    import fitz
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with fitz.open(stream=data_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if page_count < parallel_threshold or max_workers < 2:
+            for page in doc:
+                yield _extract_page(page, min_text_chars, dpi, rasterize)
+            return
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    # Spawn rather than fork, the app process runs database and Streamlit threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(ranges)), mp_context=context) as executor:
+        chunks = executor.map(
+            _extract_page_range,
+            [data_bytes] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+            [min_text_chars] * len(ranges),
+            [dpi] * len(ranges),
+            [rasterize] * len(ranges),
+        )
+        # executor.map preserves order, so pages stream out as each range completes
+        for chunk in chunks:
+            yield from chunk
+
+
+def extract_pdf_content(data_bytes: bytes, **kwargs) -> PdfContent:
+    return PdfContent(pages=list(iter_pdf_pages(data_bytes, **kwargs)))
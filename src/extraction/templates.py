@@ -0,0 +1,260 @@
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.models.receipt import Receipt, Restaurant, Delivery, Item, Payment, AdditionalInfo
+
+
+class TemplateParseError(Exception):
+    """Raised when text matches a template but cannot be parsed or fails validation."""
+
+
+def parse_amount(value: str) -> float:
+    """Parse an IDR amount such as 'Rp75.300' or '-Rp6.100' into a number."""
+    cleaned = value.strip().replace("Rp", "").replace(" ", "").replace(".", "").replace(",", ".")
+    if not re.fullmatch(r"-?\d+(\.\d+)?", cleaned):
+        raise TemplateParseError(f"Not an amount: {value!r}")
+    return float(cleaned)
+
+
+def validate_receipt(receipt: Receipt, tolerance: float = 1.0):
+    """Check that a template-parsed receipt is complete and that its totals add up."""
+    for field_name, value in [
+        ("transaction_id", receipt.transaction_id),
+        ("date", receipt.date),
+        ("restaurant.name", receipt.restaurant.name),
+        ("delivery.address", receipt.delivery.address),
+    ]:
+        if not value:
+            raise TemplateParseError(f"Missing {field_name}")
+
+    if not receipt.items:
+        raise TemplateParseError("No items found")
+
+    for item in receipt.items:
+        if item.total_price is not None and abs(item.quantity * item.unit_price - item.total_price) > tolerance:
+            raise TemplateParseError(f"Item total does not match quantity x unit price for {item.name!r}")
+
+    items_total = sum(item.total_price or item.quantity * item.unit_price for item in receipt.items)
+    if abs(items_total - receipt.payment.subtotal) > tolerance:
+        raise TemplateParseError("Item totals do not add up to the subtotal")
+
+    payment = receipt.payment
+    expected_total = payment.subtotal + payment.delivery_fee + (payment.service_fee or 0) - payment.discount
+    if abs(expected_total - payment.total) > tolerance:
+        raise TemplateParseError("Subtotal, fees and discount do not add up to the total")
+
+
+class TemplateParser:
+    """Base class for deterministic parsers of a fixed receipt text layout."""
+
+    name = "base"
+
+    def matches(self, text: str) -> bool:
+        raise NotImplementedError("matches method not implemented.")
+
+    def parse(self, text: str) -> Receipt:
+        raise NotImplementedError("parse method not implemented.")
+
+
+class GoFoodReceiptParser(TemplateParser):
+    """Parser for the text layer of GoFood e-receipt PDFs."""
+
+    name = "gofood"
+
+    def matches(self, text: str) -> bool:
+        return "Thanks for using GoFood" in text and "Transaction ID:" in text and "Transaction details" in text
+
+    @staticmethod
+    def _section(lines: List[str], start: str, end: str) -> List[str]:
+        try:
+            begin = lines.index(start) + 1
+            return lines[begin:lines.index(end, begin)]
+        except ValueError:
+            raise TemplateParseError(f"Section {start!r} .. {end!r} not found")
+
+    @staticmethod
+    def _strip_repeated_heading(lines: List[str]) -> str:
+        # The bold heading above an address is repeated as the first part of the full address
+        for k in range(1, len(lines)):
+            heading, rest = " ".join(lines[:k]), " ".join(lines[k:])
+            if rest.startswith(heading):
+                return rest
+        return " ".join(lines)
+
+    def _parse_items(self, lines: List[str]):
+        items = []
+        i = 0
+        while i < len(lines):
+            match = re.fullmatch(r"(\d+)(?:\s+(.+))?", lines[i])
+            if match is None:
+                if items:
+                    items[-1]["notes"].append(lines[i])
+                i += 1
+                continue
+
+            quantity = int(match.group(1))
+            name_parts = [match.group(2)] if match.group(2) else []
+            i += 1
+            while i < len(lines) and not lines[i].startswith("@Rp"):
+                name_parts.append(lines[i])
+                i += 1
+            if i + 1 >= len(lines):
+                raise TemplateParseError("Item price not found")
+
+            items.append({
+                "name": " ".join(name_parts),
+                "quantity": quantity,
+                "unit_price": parse_amount(lines[i][1:]),
+                "total_price": parse_amount(lines[i + 1]),
+                "notes": [],
+            })
+            i += 2
+
+        return items
+
+    def parse(self, text: str) -> Receipt:
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+        transaction_match = re.search(r"Transaction ID:\s*(\S+)", text)
+        customer_match = re.search(r"^Hi (.+),$", text, re.MULTILINE)
+        try:
+            date = datetime.strptime(lines[0].split(", ", 1)[1], "%d %B %Y").strftime("%Y-%m-%d")
+        except (IndexError, ValueError):
+            raise TemplateParseError(f"Unrecognised date line: {lines[0]!r}")
+
+        # Items, with any line that isn't an item attached to the item above it
+        special_instructions = None
+        items = []
+        for item in self._parse_items(self._section(lines, "Transaction details", "Total Price")):
+            item_notes = []
+            for note in item.pop("notes"):
+                if "single-use" in note or "cutlery" in note:
+                    special_instructions = note
+                else:
+                    item_notes.append(note)
+            items.append(Item(notes=" ".join(item_notes) or None, **item))
+
+        # Fee lines come in label/amount pairs between the subtotal and the total
+        fees = self._section(lines, "Total Price", "Total payment")
+        subtotal = parse_amount(fees[0])
+        delivery_fee, service_fee, discount = 0.0, 0.0, 0.0
+        for label, amount in zip(fees[1::2], fees[2::2]):
+            value = parse_amount(amount)
+            if label == "Handling and delivery fee":
+                delivery_fee = value
+            elif label.startswith("Discount"):
+                discount += abs(value)
+            else:
+                service_fee += value
+
+        payment_lines = self._section(lines, "Total payment", "Delivery details")
+        total = parse_amount(payment_lines[0])
+        method = payment_lines[1].removeprefix("Paid with ").strip() if len(payment_lines) > 1 else ""
+
+        # Driver, distance and timing
+        delivery_lines = self._section(lines, "Delivery details", "Help")
+        driver_name = delivery_lines[0]
+        driver_vehicle = delivery_lines[1].rstrip(" •") or None
+        joined = "\n".join(delivery_lines)
+        distance_match = re.search(r"Distance (.+)", joined)
+        duration_match = re.search(r"Delivery time (\d+)\s+(\w+)", joined)
+        pickup_match = re.search(r"Delivered on .+ at\n(\d{1,2}:\d{2}) from", joined)
+        received_match = re.search(r"Received on .+ at\n(\d{1,2}:\d{2}) at", joined)
+        if pickup_match is None or received_match is None:
+            raise TemplateParseError("Delivery timing not found")
+
+        # Restaurant block: the name ends at the first line containing a comma (e.g. "KFC, Kemang")
+        restaurant_lines = self._section(delivery_lines, pickup_match.group(1) + " from", received_match.group(0).split("\n")[0])
+        name_end = next((i for i, line in enumerate(restaurant_lines) if "," in line), 0)
+        restaurant_name = " ".join(restaurant_lines[:name_end + 1])
+        restaurant_location = " ".join(restaurant_lines[name_end + 1:]) or None
+
+        address_start = delivery_lines.index(received_match.group(1) + " at") + 1
+        delivery_address = self._strip_repeated_heading(delivery_lines[address_start:])
+
+        receipt = Receipt(
+            platform="GoFood",
+            transaction_id=transaction_match.group(1) if transaction_match else "",
+            date=date,
+            time=pickup_match.group(1),
+            restaurant=Restaurant(name=restaurant_name, location=restaurant_location),
+            delivery=Delivery(
+                address=delivery_address,
+                fee=delivery_fee,
+                driver_name=driver_name,
+                driver_vehicle=driver_vehicle,
+                distance=distance_match.group(1).strip() if distance_match else None,
+                actual_delivery_time=received_match.group(1),
+                pickup_time=pickup_match.group(1),
+                estimated_time=" ".join(duration_match.groups()) if duration_match else None,
+            ),
+            items=items,
+            payment=Payment(
+                subtotal=subtotal,
+                delivery_fee=delivery_fee,
+                service_fee=service_fee or None,
+                discount=discount,
+                total=total,
+                method=method,
+            ),
+            customer_name=customer_match.group(1) if customer_match else None,
+            special_instructions=special_instructions,
+            order_status="Delivered",
+            additional_info=AdditionalInfo(
+                thank_you_message="Thanks for using GoFood",
+                environmental_note=special_instructions,
+            ),
+        )
+        validate_receipt(receipt)
+        return receipt
+
+
+class TemplateRegistry:
+    """Tries each registered parser in order and keeps fast-path hit metrics."""
+
+    def __init__(self, parsers: Optional[List[TemplateParser]] = None):
+        self.parsers = list(parsers or [])
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.hits: Dict[str, int] = {}
+        self.validation_failures: Dict[str, int] = {}
+
+    def register(self, parser: TemplateParser):
+        self.parsers.append(parser)
+
+    def parse(self, text: str) -> Optional[Receipt]:
+        """Return a Receipt from the first matching parser, or None to fall back to the LLM."""
+        with self._lock:
+            self.attempts += 1
+
+        for parser in self.parsers:
+            if not parser.matches(text):
+                continue
+            try:
+                receipt = parser.parse(text)
+            except (TemplateParseError, ValueError, IndexError) as e:
+                print(f"Template parser '{parser.name}' failed, falling back to LLM: {e}")
+                with self._lock:
+                    self.validation_failures[parser.name] = self.validation_failures.get(parser.name, 0) + 1
+                continue
+
+            with self._lock:
+                self.hits[parser.name] = self.hits.get(parser.name, 0) + 1
+            return receipt
+
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total_hits = sum(self.hits.values())
+            return {
+                "attempts": self.attempts,
+                "hits": dict(self.hits),
+                "validation_failures": dict(self.validation_failures),
+                "hit_rate": total_hits / self.attempts if self.attempts else 0.0,
+            }
+
+
+default_registry = TemplateRegistry([GoFoodReceiptParser()])
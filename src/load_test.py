@@ -0,0 +1,489 @@
+import sys
+import json
+import time
+import zlib
+import random
+import tempfile
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.embeddings.embedder_base import EmbeddingBaseModel
+from src.embeddings.batching_embedder import MicroBatchingEmbedder
+
+
+# Relative frequency of each operation in a simulated session
+DEFAULT_MIX = {"retrieve": 6, "add_document": 1, "chat": 2, "insert_receipt": 1}
+
+DEFAULT_LEVELS = [1, 2, 4, 8, 16, 32]
+
+# A level that adds less than this much throughput per doubling of sessions counts as saturated
+SATURATION_GAIN = 0.1
+
+# Acquisitions that waited longer than this count as contended
+CONTENDED_WAIT = 0.001
+
+WORDS = [
+    "nasi", "goreng", "ayam", "bakar", "es", "teh", "manis", "kopi", "susu", "mie", "bakso", "sate",
+    "delivery", "fee", "discount", "voucher", "gofood", "grabfood", "shopeefood", "jakarta", "pedas",
+    "extra", "cheese", "sambal", "promo", "restaurant", "order", "total", "payment", "gopay", "ovo",
+]
+
+# Agent SQL as the model would write it: repeated questions are served from the query cache,
+# the transaction id ones miss it
+CHAT_QUERIES = [
+    "SELECT COUNT(*) AS n FROM receipts",
+    "SELECT platform, SUM(total_spend) AS spend FROM daily_platform_spend GROUP BY platform",
+    "SELECT item_name, order_count FROM restaurant_item_stats ORDER BY order_count DESC LIMIT 5",
+    "SELECT ri.item_name FROM receipt_items_fts JOIN receipt_items AS ri ON ri.id = receipt_items_fts.rowid WHERE receipt_items_fts MATCH 'cheese'",
+    "SELECT COUNT(*) AS n FROM receipts WHERE transaction_id > 'F-{n:010d}'",
+]
+
+
+class StubEmbedder(EmbeddingBaseModel):
+    """Offline embedder: bag-of-words hashing vectors, after `latency` seconds per call like a remote API.
+
+    With `max_concurrent` set, only that many calls run at once, like a provider's per-key limit.
+    """
+
+    def __init__(self, vector_size: int = 256, latency: float = 0.0, max_concurrent: Optional[int] = None):
+        super().__init__("stub", vector_size)
+        self.latency = latency
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self.calls = 0
+
+    def _wait_upstream(self):
+        self.calls += 1
+        if self._slots is None:
+            time.sleep(self.latency)
+            return
+        with self._slots:
+            time.sleep(self.latency)
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.vector_size)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.encode()) % self.vector_size] += 1
+        return vector.tolist()
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self._wait_upstream()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, query: str) -> List[float]:
+        self._wait_upstream()
+        return self._embed(query)
+
+
+def build_stub_model_provider(latency: float = 0.0):
+    """A model provider for the agents SDK that answers offline.
+
+    Its model calls run_query with the last line of the user message as SQL, then streams
+    a short answer. Each response takes `latency` seconds, like a remote model.
+    """
+    import asyncio
+    from agents.items import ModelResponse
+    from agents.models.interface import Model, ModelProvider
+    from agents.usage import Usage
+    from openai.types.responses import (
+        Response,
+        ResponseCompletedEvent,
+        ResponseFunctionToolCall,
+        ResponseOutputMessage,
+        ResponseOutputText,
+        ResponseTextDeltaEvent,
+    )
+
+    def output_for(input) -> list:
+        items = input if isinstance(input, list) else [{"role": "user", "content": input}]
+        if not any(isinstance(item, dict) and item.get("type") == "function_call_output" for item in items):
+            question = next(item["content"] for item in reversed(items) if isinstance(item, dict) and item.get("role") == "user")
+            return [ResponseFunctionToolCall(
+                type="function_call", call_id="call_1", name="run_query",
+                arguments=json.dumps({"query": question.splitlines()[-1]}), id="fc_1", status="completed",
+            )]
+        return [ResponseOutputMessage(
+            id="msg_1", role="assistant", status="completed", type="message",
+            content=[ResponseOutputText(text="Here is what I found.", type="output_text", annotations=[])],
+        )]
+
+    class StubModel(Model):
+
+        async def get_response(self, system_instructions, input, *args, **kwargs):
+            await asyncio.sleep(latency)
+            return ModelResponse(output=output_for(input), usage=Usage(), response_id=None)
+
+        async def stream_response(self, system_instructions, input, *args, **kwargs):
+            await asyncio.sleep(latency)
+            output = output_for(input)
+            if isinstance(output[0], ResponseOutputMessage):
+                yield ResponseTextDeltaEvent(
+                    type="response.output_text.delta", item_id="msg_1", output_index=0,
+                    content_index=0, delta=output[0].content[0].text, sequence_number=0, logprobs=[],
+                )
+            response = Response(
+                id="resp_1", created_at=0, model="stub", object="response", output=output,
+                parallel_tool_calls=False, tool_choice="auto", tools=[],
+            )
+            yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=1)
+
+    class StubModelProvider(ModelProvider):
+
+        def __init__(self):
+            self.model = StubModel()
+
+        def get_model(self, model_name):
+            return self.model
+
+    return StubModelProvider()
+
+
+class TimedLock:
+    """Stands in for a Lock or RLock and records how long each acquisition waited."""
+
+    def __init__(self, lock, name: str):
+        self._inner = lock
+        self.name = name
+        self._stats_lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._stats_lock:
+            self.acquisitions = 0
+            self.contended = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._inner.acquire(blocking=False):
+            wait, acquired = 0.0, True
+        elif not blocking:
+            return False
+        else:
+            start = time.perf_counter()
+            acquired = self._inner.acquire(timeout=timeout)
+            wait = time.perf_counter() - start
+
+        if acquired:
+            with self._stats_lock:
+                self.acquisitions += 1
+                self.contended += wait > CONTENDED_WAIT
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+        return acquired
+
+    def release(self):
+        self._inner.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "acquisitions": self.acquisitions,
+                "contended": self.contended,
+                "total_wait": self.total_wait,
+                "max_wait": self.max_wait,
+            }
+
+
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies) + self.error_count
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def percentile(self, q: float) -> float:
+        return float(np.percentile(self.latencies, q)) if self.latencies else 0.0
+
+
+@dataclass
+class LevelResult:
+    concurrency: int
+    duration: float
+    operations: Dict[str, OperationStats]
+    locks: Dict[str, dict] = field(default_factory=dict)
+
+    @property
+    def total(self) -> OperationStats:
+        combined = OperationStats()
+        for stats in self.operations.values():
+            combined.latencies.extend(stats.latencies)
+            for error, count in stats.errors.items():
+                combined.errors[error] = combined.errors.get(error, 0) + count
+        return combined
+
+    @property
+    def throughput(self) -> float:
+        return len(self.total.latencies) / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        total = self.total
+        return total.error_count / total.count if total.count else 0.0
+
+
+class LoadTarget:
+    """The retrieval and chat stack wired as the pages wire it, with stub embedder and model.
+
+    One instance is shared by every simulated session, like the `st.cache_resource` objects
+    a Streamlit process shares between its sessions. The locks sessions meet are wrapped
+    in TimedLock so contention shows up in the report.
+    """
+
+    def __init__(self, workdir: str, documents: int = 200, receipts: int = 200, embed_latency: float = 0.0, model_latency: float = 0.0, memory_budget: Optional[int] = None, embed_concurrency: Optional[int] = None, embed_batch_window: Optional[float] = None, seed: int = 0):
+        # Imported here so `--help` stays fast; these pull in pandas, pydantic and sqlite setup
+        from agents import RunConfig
+        from src.chatbot.receipt_agent import build_receipt_agent
+        from src.database.local_database import ReceiptDatabase
+        from src.database.query_guard import GuardedQueryRunner
+        from src.retriever.vector_search import VectorSearchRetriever
+        from src.vectorstore.custom_vectordb import CustomVectorDB
+
+        self._random = random.Random(seed)
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+        self.embedder = StubEmbedder(latency=embed_latency, max_concurrent=embed_concurrency)
+        if embed_batch_window is not None:
+            self.embedder = MicroBatchingEmbedder(self.embedder, window=embed_batch_window)
+        self.vector_store = CustomVectorDB(f"{workdir}/vectors.csv", memory_budget=memory_budget)
+        self.retriever = VectorSearchRetriever(self.vector_store, self.embedder)
+        self.database = ReceiptDatabase(f"{workdir}/receipts.db")
+        self.query_runner = GuardedQueryRunner(self.database)
+        self.agent = build_receipt_agent(self.query_runner, self.database.get_schema())
+        self.run_config = RunConfig(model_provider=build_stub_model_provider(model_latency), tracing_disabled=True)
+
+        self.locks = {
+            "vectordb": TimedLock(self.vector_store._lock, "vectordb"),
+            "query_cache": TimedLock(self.query_runner._lock, "query_cache"),
+            "db_generation": TimedLock(self.database._generation_lock, "db_generation"),
+        }
+        self.vector_store._lock = self.locks["vectordb"]
+        self.query_runner._lock = self.locks["query_cache"]
+        self.database._generation_lock = self.locks["db_generation"]
+
+        # Seeding goes through the same write paths, then the lock counters start over
+        self.retriever.add_documents([self.make_document() for _ in range(documents)])
+        self.database.insert_receipts([self.make_receipt() for _ in range(receipts)])
+        for lock in self.locks.values():
+            lock.reset()
+
+    def next_number(self) -> int:
+        with self._counter_lock:
+            self._counter += 1
+            return self._counter
+
+    def make_text(self, rng: random.Random, words: int = 60) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words))
+
+    def make_document(self, rng: Optional[random.Random] = None):
+        from src.models.document import Document
+
+        return Document(payload={"content": self.make_text(rng or self._random), "source": "load-test"}, vector=[])
+
+    def make_receipt(self):
+        from src.models.receipt import Receipt
+
+        n = self.next_number()
+        return Receipt.from_dict({
+            "platform": ["GoFood", "GrabFood", "ShopeeFood"][n % 3],
+            "transaction_id": f"L-{n:010d}",
+            "customer_name": "Load Test",
+            "date": f"2025-01-{n % 28 + 1:02d}",
+            "time": "12:30",
+            "restaurant": {"name": f"Warung {n % 20}", "location": "Jl. Sudirman No. 1, Jakarta"},
+            "delivery": {"address": "Jl. Thamrin No. 2, Jakarta", "fee": 10000},
+            "items": [
+                {"name": "Nasi Goreng", "quantity": 2, "unit_price": 25000, "total_price": 50000, "notes": "extra cheese"},
+                {"name": "Es Teh", "quantity": 1, "unit_price": 5000, "total_price": 5000, "notes": None},
+            ],
+            "payment": {"subtotal": 55000, "delivery_fee": 10000, "service_fee": 2000, "discount": 0, "total": 67000, "method": "GoPay"},
+        })
+
+    def retrieve(self, rng: random.Random):
+        self.retriever.retrieve(self.make_text(rng, words=5), top_k=5)
+
+    def add_document(self, rng: random.Random):
+        self.retriever.add_document(self.make_document(rng))
+
+    def chat(self, rng: random.Random):
+        from src.chatbot.receipt_agent import iter_agent_events
+
+        query = rng.choice(CHAT_QUERIES).format(n=rng.randrange(1_000_000))
+        for event in iter_agent_events(self.agent, query, run_config=self.run_config):
+            # The query runner reports SQL failures to the model instead of raising
+            if event.type == "tool_output" and '"error"' in event.data:
+                raise RuntimeError(event.data)
+
+    def insert_receipt(self, rng: random.Random):
+        self.database.insert_receipt(self.make_receipt())
+
+    def operation(self, name: str) -> Callable[[random.Random], Any]:
+        return getattr(self, name)
+
+    def close(self):
+        if isinstance(self.embedder, MicroBatchingEmbedder):
+            self.embedder.close()
+        self.database.close()
+
+
+def run_level(target: LoadTarget, concurrency: int, duration: float, mix: Dict[str, float] = DEFAULT_MIX, seed: int = 0) -> LevelResult:
+    """Run `concurrency` sessions for `duration` seconds, each picking operations from `mix`."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    operations = {name: OperationStats() for name in names}
+    results_lock = threading.Lock()
+    for lock in target.locks.values():
+        lock.reset()
+
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def session(index: int):
+        rng = random.Random(seed * 1000 + index)
+        latencies = {name: [] for name in names}
+        errors = {name: {} for name in names}
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                target.operation(name)(rng)
+            except Exception as e:
+                errors[name][type(e).__name__] = errors[name].get(type(e).__name__, 0) + 1
+            else:
+                latencies[name].append(time.perf_counter() - started)
+
+        with results_lock:
+            for name in names:
+                operations[name].latencies.extend(latencies[name])
+                for error, count in errors[name].items():
+                    operations[name].errors[error] = operations[name].errors.get(error, 0) + count
+
+    threads = [threading.Thread(target=session, args=(i,), name=f"load-session-{i}", daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + duration
+    started = time.perf_counter()
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+
+    # Sessions finish the operation in flight at the deadline, so measure the real span
+    elapsed = time.perf_counter() - started
+    return LevelResult(concurrency, elapsed, operations, {name: lock.stats() for name, lock in target.locks.items()})
+
+
+def run_ramp(target: LoadTarget, levels: List[int] = DEFAULT_LEVELS, duration: float = 5.0, mix: Dict[str, float] = DEFAULT_MIX, report: Optional[Callable[[LevelResult], None]] = None) -> List[LevelResult]:
+    results = []
+    for level, concurrency in enumerate(levels):
+        result = run_level(target, concurrency, duration, mix, seed=level)
+        results.append(result)
+        if report is not None:
+            report(result)
+    return results
+
+
+def find_saturation(results: List[LevelResult], min_gain: float = SATURATION_GAIN) -> Optional[int]:
+    """The concurrency past which more sessions stopped adding throughput, or None if it kept scaling.
+
+    Gain is measured per doubling of sessions, so uneven steps between levels compare fairly.
+    """
+    for previous, current in zip(results, results[1:]):
+        if previous.throughput <= 0 or current.concurrency <= previous.concurrency:
+            continue
+        doublings = np.log2(current.concurrency / previous.concurrency)
+        gain = (current.throughput / previous.throughput) ** (1 / doublings) - 1
+        if gain < min_gain:
+            return previous.concurrency
+    return None
+
+
+def print_level(result: LevelResult):
+    total = result.total
+    print(
+        f"\n{result.concurrency:>3} sessions: {result.throughput:8.1f} ops/s  "
+        f"p50 {total.percentile(50) * 1000:7.1f} ms  p95 {total.percentile(95) * 1000:7.1f} ms  "
+        f"p99 {total.percentile(99) * 1000:7.1f} ms  errors {result.error_rate:.1%}"
+    )
+    for name, stats in result.operations.items():
+        errors = f"  {stats.errors}" if stats.errors else ""
+        print(
+            f"      {name:<15} {stats.count:6d} ops  p50 {stats.percentile(50) * 1000:7.1f} ms  "
+            f"p95 {stats.percentile(95) * 1000:7.1f} ms  p99 {stats.percentile(99) * 1000:7.1f} ms{errors}"
+        )
+    for name, lock in result.locks.items():
+        if lock["acquisitions"]:
+            print(
+                f"      lock {name:<10} {lock['contended']}/{lock['acquisitions']} contended  "
+                f"waited {lock['total_wait'] * 1000:.1f} ms total, {lock['max_wait'] * 1000:.1f} ms max"
+            )
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ramp up simulated sessions against the retrieval and chat stack, offline")
+    parser.add_argument("--levels", default=",".join(map(str, DEFAULT_LEVELS)), help="Comma-separated session counts to ramp through")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run each level")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Operation weights, e.g. retrieve=6,chat=2")
+    parser.add_argument("--documents", type=int, default=200, help="Documents stored before the run")
+    parser.add_argument("--receipts", type=int, default=200, help="Receipts stored before the run")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per stub embedding call")
+    parser.add_argument("--model-latency", type=float, default=0.2, help="Seconds per stub model response")
+    parser.add_argument("--memory-budget", type=int, default=None, help="CustomVectorDB memory budget in bytes")
+    parser.add_argument("--embed-concurrency", type=int, default=None, help="Stub embedding calls allowed in flight at once")
+    parser.add_argument("--embed-batch-window", type=float, default=None, help="Micro-batch embedding calls within this many seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Exit 1 if any level has a higher error rate")
+    args = parser.parse_args(argv)
+    levels = [int(level) for level in args.levels.split(",")]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"Seeding {args.documents} documents and {args.receipts} receipts in {workdir}")
+        target = LoadTarget(workdir, args.documents, args.receipts, args.embed_latency, args.model_latency, args.memory_budget, args.embed_concurrency, args.embed_batch_window)
+        try:
+            results = run_ramp(target, levels, args.duration, args.mix, report=print_level)
+            if isinstance(target.embedder, MicroBatchingEmbedder):
+                print(f"\nEmbedding batches: {target.embedder.stats()}")
+        finally:
+            target.close()
+
+    saturation = find_saturation(results)
+    if saturation is None:
+        print("\nThroughput kept scaling up to the highest level")
+    else:
+        print(f"\nThroughput saturates at about {saturation} sessions")
+
+    failing = [result.concurrency for result in results if result.error_rate > args.max_error_rate]
+    if failing:
+        print(f"Error rate above {args.max_error_rate:.1%} at {', '.join(map(str, failing))} sessions")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
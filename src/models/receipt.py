@@ -3,13 +3,13 @@ from typing import List, Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class Restaurant:
     name: str
     location: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Delivery:
     address: str
     fee: float
@@ -21,7 +21,7 @@ class Delivery:
     pickup_time: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     name: str
     quantity: int
@@ -36,7 +36,7 @@ class Item:
         return self.unit_price
 
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     subtotal: float
     delivery_fee: float
@@ -46,14 +46,14 @@ class Payment:
     method: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class AdditionalInfo:
     thank_you_message: Optional[str] = None
     environmental_note: Optional[str] = None
     final_note: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Receipt:
     platform: str
     transaction_id: str
@@ -0,0 +1,274 @@
+import math
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from src.models.receipt import Receipt, Restaurant, Delivery, Item, Payment, AdditionalInfo
+
+
+# Receipt columns in the order of the receipts table insert, with the path to each value in receipt JSON
+RECEIPT_COLUMNS = {
+    'platform': ('platform',),
+    'transaction_id': ('transaction_id',),
+    'customer_name': ('customer_name',),
+    'date': ('date',),
+    'time': ('time',),
+    'restaurant_name': ('restaurant', 'name'),
+    'restaurant_location': ('restaurant', 'location'),
+    'delivery_address': ('delivery', 'address'),
+    'delivery_fee': ('delivery', 'fee'),
+    'driver_name': ('delivery', 'driver_name'),
+    'driver_vehicle': ('delivery', 'driver_vehicle'),
+    'distance': ('delivery', 'distance'),
+    'estimated_time': ('delivery', 'estimated_time'),
+    'actual_delivery_time': ('delivery', 'actual_delivery_time'),
+    'pickup_time': ('delivery', 'pickup_time'),
+    'payment_subtotal': ('payment', 'subtotal'),
+    'payment_delivery_fee': ('payment', 'delivery_fee'),
+    'payment_service_fee': ('payment', 'service_fee'),
+    'payment_discount': ('payment', 'discount'),
+    'payment_total': ('payment', 'total'),
+    'payment_method': ('payment', 'method'),
+    'special_instructions': ('special_instructions',),
+    'order_status': ('order_status',),
+    'additional_info_thank_you': ('additional_info', 'thank_you_message'),
+    'additional_info_environmental': ('additional_info', 'environmental_note'),
+    'additional_info_final_note': ('additional_info', 'final_note'),
+}
+
+# Numeric columns are stored as float64 arrays with NaN for missing values, the rest as lists
+FLOAT_COLUMNS = {
+    'delivery_fee', 'payment_subtotal', 'payment_delivery_fee',
+    'payment_service_fee', 'payment_discount', 'payment_total',
+}
+
+# Defaults matching Receipt.from_dict and the dataclass defaults
+COLUMN_DEFAULTS = {
+    'time': '',
+    'payment_discount': 0.0,
+    'payment_total': 0.0,
+    'payment_method': '',
+}
+
+ITEM_COLUMNS = ['item_name', 'quantity', 'unit_price', 'total_price', 'notes']
+
+# Item columns stored as float64 so a missing value can be NaN, but handed back as ints
+INT_ITEM_COLUMNS = {'quantity'}
+
+
+def _float(value) -> float:
+    """None and unparseable text become NaN; numeric text such as "2" or "25.000" parses as
+    SQLite would store it from a Receipt, and IDR text such as "Rp 25.000" as whole rupiah."""
+    if value is None:
+        return math.nan
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            cleaned = value.strip().replace('Rp', '').replace(' ', '').replace('.', '').replace(',', '.')
+            try:
+                return float(cleaned)
+            except ValueError:
+                return math.nan
+    return float(value)
+
+
+def _nullable(values: np.ndarray, as_int: bool = False) -> list:
+    # Back to Python values with None for NaN, as SQLite and the dataclasses expect
+    if as_int:
+        return [None if value != value else int(value) for value in values.tolist()]
+    return [None if value != value else value for value in values.tolist()]
+
+
+class ReceiptBatch:
+    """Many receipts held as column arrays, with items flattened and indexed by offsets.
+
+    Items of receipt `i` are rows `item_offsets[i]:item_offsets[i + 1]` of the item columns.
+    Built straight from parsed JSON, it feeds `ReceiptDatabase.insert_receipts` and simple
+    aggregations without creating a `Receipt` per row; `receipt(i)` materializes one on demand.
+    """
+
+    def __init__(self, columns: Dict[str, list | np.ndarray], has_additional_info: np.ndarray,
+                 item_columns: Dict[str, list | np.ndarray], item_offsets: np.ndarray):
+        self.columns = columns
+        self.has_additional_info = has_additional_info
+        self.item_columns = item_columns
+        self.item_offsets = item_offsets
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[dict]) -> 'ReceiptBatch':
+        """Build a batch from receipt dicts as produced by the extractor or `Receipt.to_dict`."""
+        columns = {name: [] for name in RECEIPT_COLUMNS}
+        has_additional_info = []
+        item_columns = {name: [] for name in ITEM_COLUMNS}
+        item_offsets = [0]
+
+        for record in records:
+            sections = {
+                'restaurant': record.get('restaurant') or {},
+                'delivery': record.get('delivery') or {},
+                'payment': record.get('payment') or {},
+                'additional_info': record.get('additional_info') or {},
+            }
+            for name, path in RECEIPT_COLUMNS.items():
+                source = record if len(path) == 1 else sections[path[0]]
+                columns[name].append(source.get(path[-1], COLUMN_DEFAULTS.get(name)))
+            has_additional_info.append(bool(record.get('additional_info')))
+
+            items = record.get('items', [])
+            for item in items:
+                item_columns['item_name'].append(item.get('name', ''))
+                item_columns['quantity'].append(item.get('quantity', 1))
+                # Older extractions used 'price' for the unit price
+                item_columns['unit_price'].append(item.get('unit_price', item.get('price', 0.0)))
+                item_columns['total_price'].append(item.get('total_price'))
+                item_columns['notes'].append(item.get('notes'))
+            item_offsets.append(item_offsets[-1] + len(items))
+
+        return cls._from_lists(columns, has_additional_info, item_columns, item_offsets)
+
+    @classmethod
+    def from_receipts(cls, receipts: Iterable[Receipt]) -> 'ReceiptBatch':
+        return cls.from_dicts(receipt.to_dict() for receipt in receipts)
+
+    @classmethod
+    def _from_lists(cls, columns: dict, has_additional_info: list, item_columns: dict, item_offsets: list) -> 'ReceiptBatch':
+        for name in FLOAT_COLUMNS:
+            columns[name] = np.fromiter((_float(value) for value in columns[name]), dtype=np.float64, count=len(columns[name]))
+
+        item_count = item_offsets[-1]
+        for name in ('quantity', 'unit_price', 'total_price'):
+            item_columns[name] = np.fromiter((_float(value) for value in item_columns[name]), dtype=np.float64, count=item_count)
+
+        return cls(
+            columns=columns,
+            has_additional_info=np.array(has_additional_info, dtype=bool),
+            item_columns=item_columns,
+            item_offsets=np.array(item_offsets, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.item_offsets) - 1
+
+    @property
+    def item_count(self) -> int:
+        return int(self.item_offsets[-1])
+
+    def slice(self, start: int, stop: int) -> 'ReceiptBatch':
+        """Receipts `start:stop` as a new batch; numeric columns are views, not copies."""
+        stop = min(stop, len(self))
+        item_start, item_stop = int(self.item_offsets[start]), int(self.item_offsets[stop])
+        return ReceiptBatch(
+            columns={name: values[start:stop] for name, values in self.columns.items()},
+            has_additional_info=self.has_additional_info[start:stop],
+            item_columns={name: values[item_start:item_stop] for name, values in self.item_columns.items()},
+            item_offsets=self.item_offsets[start:stop + 1] - item_start,
+        )
+
+    def _column_values(self, columns: dict, name: str) -> list:
+        values = columns[name]
+        if not isinstance(values, np.ndarray):
+            return list(values)
+        # tolist() turns numpy scalars into Python ones, which sqlite3 can bind
+        return _nullable(values, as_int=name in INT_ITEM_COLUMNS) if values.dtype == np.float64 else values.tolist()
+
+    def receipt_rows(self) -> List[tuple]:
+        """One tuple per receipt in receipts table column order, ready for `executemany`."""
+        return list(zip(*(self._column_values(self.columns, name) for name in RECEIPT_COLUMNS)))
+
+    def item_rows(self) -> List[List[tuple]]:
+        """Item tuples (name, quantity, unit_price, total_price, notes) grouped per receipt."""
+        rows = list(zip(*(self._column_values(self.item_columns, name) for name in ITEM_COLUMNS)))
+        offsets = self.item_offsets.tolist()
+        return [rows[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+    @staticmethod
+    def _value(values: list | np.ndarray, index: int, as_int: bool = False):
+        if not isinstance(values, np.ndarray):
+            return values[index]
+        value = values[index].item()
+        if value != value:
+            return None
+        return int(value) if as_int else value
+
+    def receipt(self, index: int) -> Receipt:
+        """Materialize a single receipt."""
+        row = {name: self._value(values, index) for name, values in self.columns.items()}
+        start, stop = int(self.item_offsets[index]), int(self.item_offsets[index + 1])
+        items = [
+            Item(
+                name=self.item_columns['item_name'][i],
+                quantity=self._value(self.item_columns['quantity'], i, as_int=True),
+                unit_price=self._value(self.item_columns['unit_price'], i),
+                total_price=self._value(self.item_columns['total_price'], i),
+                notes=self.item_columns['notes'][i],
+            )
+            for i in range(start, stop)
+        ]
+        return Receipt(
+            platform=row['platform'],
+            transaction_id=row['transaction_id'],
+            date=row['date'],
+            time=row['time'],
+            restaurant=Restaurant(name=row['restaurant_name'], location=row['restaurant_location']),
+            delivery=Delivery(
+                address=row['delivery_address'],
+                fee=row['delivery_fee'],
+                driver_name=row['driver_name'],
+                driver_vehicle=row['driver_vehicle'],
+                distance=row['distance'],
+                estimated_time=row['estimated_time'],
+                actual_delivery_time=row['actual_delivery_time'],
+                pickup_time=row['pickup_time'],
+            ),
+            items=items,
+            payment=Payment(
+                subtotal=row['payment_subtotal'],
+                delivery_fee=row['payment_delivery_fee'],
+                service_fee=row['payment_service_fee'],
+                discount=row['payment_discount'],
+                total=row['payment_total'],
+                method=row['payment_method'],
+            ),
+            customer_name=row['customer_name'],
+            special_instructions=row['special_instructions'],
+            order_status=row['order_status'],
+            additional_info=AdditionalInfo(
+                thank_you_message=row['additional_info_thank_you'],
+                environmental_note=row['additional_info_environmental'],
+                final_note=row['additional_info_final_note'],
+            ) if self.has_additional_info[index] else None,
+        )
+
+    def __iter__(self) -> Iterator[Receipt]:
+        for index in range(len(self)):
+            yield self.receipt(index)
+
+    def item_receipt_index(self) -> np.ndarray:
+        """For each item row, the index of the receipt it belongs to."""
+        return np.repeat(np.arange(len(self)), np.diff(self.item_offsets))
+
+    def item_totals(self) -> np.ndarray:
+        """Item line totals, falling back to quantity x unit price where total_price is missing."""
+        totals = self.item_columns['total_price']
+        return np.where(np.isnan(totals), self.item_columns['quantity'] * self.item_columns['unit_price'], totals)
+
+    @staticmethod
+    def _sum_by(keys: list, values: np.ndarray) -> Dict[Optional[str], float]:
+        index = {}
+        codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys))
+        sums = np.bincount(codes, weights=np.nan_to_num(values), minlength=len(index))
+        return dict(zip(index, sums.tolist()))
+
+    def spend_by(self, column: str = 'platform') -> Dict[Optional[str], float]:
+        """Total payment per value of a receipt column, e.g. platform, date or restaurant_name."""
+        return self._sum_by(self.columns[column], self.columns['payment_total'])
+
+    def item_spend_by(self, column: str = 'item_name') -> Dict[Optional[str], float]:
+        """Total item spend per value of an item column, or of a receipt column such as restaurant_name."""
+        if column in self.item_columns:
+            keys = self.item_columns[column]
+        else:
+            receipt_values = self.columns[column]
+            keys = [receipt_values[i] for i in self.item_receipt_index().tolist()]
+        return self._sum_by(list(keys), self.item_totals())
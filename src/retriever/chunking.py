@@ -0,0 +1,125 @@
+import re
+import math
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.embeddings.embedder_base import EmbeddingBaseModel
+
+
+# Encoding used by the text-embedding-3 models
+DEFAULT_ENCODING = "cl100k_base"
+
+# Pieces the fallback counter treats as tokens; long words count as several, like BPE splits them
+_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(encoding_name: str):
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        # tiktoken downloads encodings on first use, which fails offline
+        print(f"tiktoken encoding {encoding_name} unavailable ({type(e).__name__}), using approximate token counts")
+        return None
+
+
+class TextChunker:
+    """Splits text into windows of at most `max_tokens` tokens, overlapping by `overlap_tokens`.
+
+    Tokens are counted with tiktoken when its encoding is available, otherwise approximated as
+    one token per four characters of each word or punctuation mark, which overestimates for
+    English text so chunks stay under the model limit.
+    """
+
+    def __init__(self, max_tokens: int = 512, overlap_tokens: int = 64, encoding_name: Optional[str] = DEFAULT_ENCODING):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding = _get_encoding(encoding_name) if encoding_name else None
+
+    def count_tokens(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return sum(self._piece_costs(text)[1])
+
+    @staticmethod
+    def _piece_costs(text: str) -> tuple:
+        pieces = list(_PIECE_PATTERN.finditer(text))
+        return pieces, [math.ceil(len(piece.group()) / 4) for piece in pieces]
+
+    def split(self, text: str) -> List[str]:
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())
+            if len(tokens) <= self.max_tokens:
+                return [text] if text.strip() else []
+            step = self.max_tokens - self.overlap_tokens
+            return [self.encoding.decode(tokens[start:start + self.max_tokens]) for start in range(0, len(tokens) - self.overlap_tokens, step)]
+
+        pieces, costs = self._piece_costs(text)
+        if sum(costs) <= self.max_tokens:
+            return [text] if text.strip() else []
+
+        chunks = []
+        start = 0
+        while start < len(pieces):
+            end, total = start, 0
+            # Always take at least one piece, even one longer than max_tokens
+            while end < len(pieces) and (end == start or total + costs[end] <= self.max_tokens):
+                total += costs[end]
+                end += 1
+            chunks.append(text[pieces[start].start():pieces[end - 1].end()])
+            if end == len(pieces):
+                break
+
+            # Step back over up to overlap_tokens worth of pieces for the next window
+            next_start, overlap = end, 0
+            while next_start - 1 > start and overlap + costs[next_start - 1] <= self.overlap_tokens:
+                next_start -= 1
+                overlap += costs[next_start]
+            start = next_start
+        return chunks
+
+
+def _batches(texts: List[str], batch_size: int, max_batch_tokens: int, chunker: TextChunker) -> List[List[int]]:
+    batches, current, current_tokens = [], [], 0
+    for position, text in enumerate(texts):
+        tokens = chunker.count_tokens(text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > max_batch_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(position)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_in_batches(
+    embedder: EmbeddingBaseModel,
+    texts: List[str],
+    chunker: TextChunker,
+    batch_size: int = 64,
+    max_batch_tokens: int = 100_000,
+    max_workers: int = 4,
+) -> List[List[float]]:
+    """Embed `texts` with concurrent `embed_texts` calls, returning vectors in input order.
+
+    Batches are bounded by count and by total tokens. A failing batch is retried by the
+    embedder on its own without redoing the others.
+    """
+    batches = _batches(texts, batch_size, max_batch_tokens, chunker)
+    vectors = [None] * len(texts)
+    if not batches:
+        return vectors
+
+    # Embedding calls wait on the network, so threads overlap them without extra processes
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        results = executor.map(lambda batch: embedder.embed_texts([texts[position] for position in batch]), batches)
+        for batch, batch_vectors in zip(batches, results):
+            for position, vector in zip(batch, batch_vectors):
+                vectors[position] = vector
+    return vectors
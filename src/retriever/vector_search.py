@@ -1,31 +1,96 @@
+import uuid
+from typing import Any, Dict, List, Optional
 
 from src.models.document import Document
 from src.vectorstore.vectorstore_base import VectorStoreBase
-from src.vectorstore.qdrant_client import Qdrant
-from src.embeddings.openai_embedder import OpenAIEmbeddingModel
+from src.embeddings.embedder_base import EmbeddingBaseModel
+from src.retriever.chunking import TextChunker, embed_in_batches
 
 
 class VectorSearchRetriever:
+    """Stores documents as token-bounded chunks and retrieves whole documents.
 
-    def __init__(self, vector_store: VectorStoreBase, embedder: OpenAIEmbeddingModel):
+    Each chunk is stored as its own vector, with the parent document's payload (minus its
+    content) and `parent_id`, `chunk_index` and `chunk_count` in the chunk's payload. Search
+    fetches `fetch_factor * top_k` chunks and collapses them into their parents.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStoreBase,
+        embedder: EmbeddingBaseModel,
+        chunker: Optional[TextChunker] = None,
+        embed_batch_size: int = 64,
+        max_workers: int = 4,
+        fetch_factor: int = 4,
+    ):
         self.vector_store = vector_store
         self.embedder = embedder
+        self.chunker = chunker or TextChunker()
+        self.embed_batch_size = embed_batch_size
+        self.max_workers = max_workers
+        self.fetch_factor = fetch_factor
 
         self.setup()
 
     def setup(self):
         self.vector_store.setup()
-    
-    def retrieve(self, query: str, top_k: int = 5):
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Return up to `top_k` parent documents, each scored by its best matching chunk.
+
+        Every result is {"id", "payload", "score", "chunks"}, where chunks lists the matching
+        chunks as {"chunk_index", "content", "score"}, best first.
+        """
         query_vector = self.embedder.embed_query(query)
-        results = self.vector_store.search_vectors(query_vector, top_k=top_k)
-        return results
-    
+        hits = self.vector_store.search_vectors(query_vector, top_k=top_k * self.fetch_factor)
+        return self._collapse(hits)[:top_k]
+
+    @staticmethod
+    def _collapse(hits: list) -> List[Dict[str, Any]]:
+        parents = {}
+        for hit in hits:
+            # Qdrant returns ScoredPoint objects, the CSV store returns dicts
+            if isinstance(hit, dict):
+                hit_id, payload, score = hit["id"], hit.get("payload") or {}, hit["score"]
+            else:
+                hit_id, payload, score = hit.id, hit.payload or {}, hit.score
+
+            # Documents stored before chunking have no parent and stand for themselves
+            parent_id = payload.get("parent_id", hit_id)
+            chunk = {"chunk_index": payload.get("chunk_index", 0), "content": payload.get("content"), "score": score}
+            if parent_id not in parents:
+                parent_payload = {key: value for key, value in payload.items() if key not in ("parent_id", "chunk_index", "chunk_count", "content")}
+                parents[parent_id] = {"id": parent_id, "payload": parent_payload, "score": score, "chunks": []}
+            parents[parent_id]["chunks"].append(chunk)
+
+        # Hits arrive best first, so each parent's first chunk carries its score
+        return sorted(parents.values(), key=lambda parent: parent["score"], reverse=True)
+
     def add_document(self, document: Document) -> dict:
-        vector = self.embedder.embed_texts([document.payload["content"]])[0]
-        document.vector = vector
-        result = self.vector_store.add_vectors(
-            vectors=[document.vector],
-            payloads=[document.payload],
-        )
-        return result
+        return self.add_documents([document])[0]
+
+    def add_documents(self, documents: List[Document]) -> List[dict]:
+        """Chunk, embed and store documents. Returns {"id", "chunks", "result"} per document."""
+        texts, payloads, counts = [], [], []
+        for document in documents:
+            document.id = document.id or str(uuid.uuid4())
+            chunks = self.chunker.split(document.payload.get("content") or "")
+            metadata = {key: value for key, value in document.payload.items() if key != "content"}
+            for chunk_index, chunk in enumerate(chunks):
+                texts.append(chunk)
+                payloads.append({**metadata, "content": chunk, "parent_id": document.id, "chunk_index": chunk_index, "chunk_count": len(chunks)})
+            counts.append(len(chunks))
+
+        vectors = embed_in_batches(self.embedder, texts, self.chunker, batch_size=self.embed_batch_size, max_workers=self.max_workers)
+
+        results, start = [], 0
+        for document, count in zip(documents, counts):
+            result = None
+            if count:
+                result = self.vector_store.add_vectors(vectors=vectors[start:start + count], payloads=payloads[start:start + count])
+                if count == 1:
+                    document.vector = vectors[start]
+            results.append({"id": document.id, "chunks": count, "result": result})
+            start += count
+        return results
@@ -0,0 +1,167 @@
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+# The Streamlit entry point and its pages
+ENTRY_POINTS = ["streamlit_app.py", "main.py", "pages/chat.py", "pages/custom_vectordb.py", "pages/qdrant_vectordb.py"]
+
+DEFAULT_BASELINE = "data/startup_baseline.json"
+
+# Allowed growth over the baseline before an entry point counts as regressed
+DEFAULT_THRESHOLD = 0.25
+
+# Differences below this are timing noise, however large relative to a small baseline
+MIN_REGRESSION_MS = 50
+
+_MARKER = "startup-profiler: begin"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+@dataclass
+class ImportTiming:
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+@dataclass
+class StartupProfile:
+    entry_point: str
+    imports: List[str]
+    timings: List[ImportTiming] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def total_ms(self) -> float:
+        # Top-level lines already include everything imported beneath them
+        return sum(timing.cumulative_ms for timing in self.timings if timing.depth == 0)
+
+    def slowest(self, count: int = 15) -> List[ImportTiming]:
+        return sorted(self.timings, key=lambda timing: timing.cumulative_ms, reverse=True)[:count]
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """Parse `python -X importtime` output, keeping only imports after the profiler's marker if present."""
+    lines = output.splitlines()
+    if _MARKER in lines:
+        lines = lines[lines.index(_MARKER) + 1:]
+
+    timings = []
+    for line in lines:
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            # Nesting is shown as two extra spaces per level after a single leading space
+            timings.append(ImportTiming(module, int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2))
+    return timings
+
+
+def entry_point_imports(path: str) -> List[str]:
+    """Modules imported at the top level of `path`, in order. Imports inside functions are left out."""
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def profile_imports(entry_point: str, modules: List[str], cwd: str = ".") -> StartupProfile:
+    """Import `modules` in a fresh interpreter with -X importtime and return the breakdown."""
+    script = "\n".join([
+        "import sys, importlib",
+        f"sys.stderr.write({_MARKER!r} + '\\n')",
+        f"for name in {modules!r}:",
+        "    try:",
+        "        importlib.import_module(name)",
+        "    except ImportError:",
+        "        print(name)",
+    ])
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [os.path.abspath(cwd), os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", script], cwd=cwd, env=env, capture_output=True, text=True)
+    return StartupProfile(entry_point, modules, parse_importtime(completed.stderr), completed.stdout.split())
+
+
+def profile_entry_point(path: str, repeat: int = 3, cwd: str = ".") -> StartupProfile:
+    """Profile the top-level imports of an entry point, keeping the fastest of `repeat` cold runs."""
+    modules = entry_point_imports(os.path.join(cwd, path))
+    runs = [profile_imports(path, modules, cwd=cwd) for _ in range(repeat)]
+    return min(runs, key=lambda profile: profile.total_ms)
+
+
+def check_regressions(profiles: List[StartupProfile], baseline: Dict[str, float], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Messages for entry points whose import time grew more than `threshold` over the baseline."""
+    regressions = []
+    for profile in profiles:
+        previous = baseline.get(profile.entry_point)
+        if previous is None:
+            continue
+        limit = max(previous * (1 + threshold), previous + MIN_REGRESSION_MS)
+        if profile.total_ms > limit:
+            regressions.append(f"{profile.entry_point}: {profile.total_ms:.0f} ms, baseline {previous:.0f} ms (limit {limit:.0f} ms)")
+    return regressions
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, profiles: List[StartupProfile]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({profile.entry_point: round(profile.total_ms, 1) for profile in profiles}, f, indent=2)
+
+
+def print_profile(profile: StartupProfile, top: int):
+    print(f"\n{profile.entry_point}: {profile.total_ms:.0f} ms importing {', '.join(profile.imports)}")
+    if profile.missing:
+        print(f"  not installed: {', '.join(profile.missing)}")
+    for timing in profile.slowest(top):
+        print(f"  {timing.cumulative_ms:8.1f} ms cumulative {timing.self_ms:8.1f} ms self  {'  ' * timing.depth}{timing.module}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Break down import time of the app entry points and check for regressions")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS, help="Entry point files to profile")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports shown per entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="Cold runs per entry point, the fastest is kept")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON file of import time per entry point in ms")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative growth over the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Record this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_entry_point(path, repeat=args.repeat) for path in args.entry_points]
+    for profile in profiles:
+        print_profile(profile, args.top)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, profiles)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    regressions = check_regressions(profiles, load_baseline(args.baseline), args.threshold)
+    if regressions:
+        print("\nStartup time regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
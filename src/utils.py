@@ -2,29 +2,32 @@
 import re
 import json
 import base64
+import hashlib
 import sqlite3
 import os
 
-import fitz
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 from datetime import datetime
 from src.models.receipt import Receipt
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 
 def extract_text_from_pdf(data_bytes: bytes):
-    text = ""
+    import fitz
+
     try:
         with fitz.open(stream=data_bytes, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text()
-        return text
+            return "".join(page.get_text() for page in doc)
     
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
 
-def extract_receipt_info(openai_client: OpenAI, data: bytes | str) -> Receipt:
-    prompt = """
+
+RECEIPT_EXTRACTION_MODEL = "gpt-4.1"
+
+RECEIPT_EXTRACTION_PROMPT = """
     Please extract the following information from this food delivery receipt and return it as a JSON object:
 
     {
@@ -83,51 +86,80 @@ def extract_receipt_info(openai_client: OpenAI, data: bytes | str) -> Receipt:
     - Any special notes about environmental sustainability or special instructions
     - Exact timing information for pickup and delivery
     """
-    
+
+# Changes whenever the prompt text changes, so cached extractions never outlive their prompt
+RECEIPT_PROMPT_VERSION = hashlib.sha256(RECEIPT_EXTRACTION_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+
+def detect_image_mime_type(data: bytes) -> str:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
+
+
+def _receipt_content_part(data: bytes | str) -> dict:
+    if isinstance(data, bytes):
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": f"data:{detect_image_mime_type(data)};base64,{base64.b64encode(data).decode('utf-8')}"
+            }
+        }
+    return {
+        "type": "text",
+        "text": data
+    }
+
+
+def request_receipt_extraction(openai_client: "OpenAI", data: bytes | str | List[bytes | str], model: str = RECEIPT_EXTRACTION_MODEL) -> str:
+    """Send the receipt to the model and return its raw text response.
+
+    `data` is an image, text, or a list of both in page order, e.g. a PDF with scanned pages.
+    """
+    # assert filename.split('.')[-1].lower() in ["png", "jpg", "jpeg", "pdf"], "data_type must be either 'image' or 'pdf'"
+    # is_pdf = filename.lower().endswith(".pdf")
+    parts = data if isinstance(data, list) else [data]
+
+    response = openai_client.chat.completions.create(
+        model=model,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": RECEIPT_EXTRACTION_PROMPT
+                    },
+                    *(_receipt_content_part(part) for part in parts),
+                ]
+            }
+        ],
+        # max_completion_tokens=2000,
+        # temperature=0,
+    )
+    return response.choices[0].message.content
+
+
+def parse_receipt_response(content: str) -> Receipt:
+    """Parse the model's raw response into a Receipt."""
+    # Try to extract JSON from the response
+    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+    if json_match:
+        json_str = json_match.group()
+        receipt_data = json.loads(json_str)
+    else:
+        receipt_data = json.loads(content)
+
+    return Receipt.from_dict(receipt_data)
+
+
+def extract_receipt_info(openai_client: "OpenAI", data: bytes | str | List[bytes | str]) -> Receipt:
+    content = None
     try:
-        # assert filename.split('.')[-1].lower() in ["png", "jpg", "jpeg", "pdf"], "data_type must be either 'image' or 'pdf'"
-        # is_pdf = filename.lower().endswith(".pdf")
-
-        response = openai_client.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64.b64encode(data).decode('utf-8')}"
-                            }
-                        } if isinstance(data, bytes) else
-                        {
-                            "type": "text",
-                            "text": data
-                        },
-                    ]
-                }
-            ],
-            # max_completion_tokens=2000,
-            # temperature=0,
-        )
-        
-        # Extract the JSON from the response
-        content = response.choices[0].message.content
-        
-        # Try to extract JSON from the response
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group()
-            receipt_data = json.loads(json_str)
-        else:
-            receipt_data = json.loads(content)
-            
-        # return receipt_data
-        return Receipt.from_dict(receipt_data)
+        content = request_receipt_extraction(openai_client, data)
+        return parse_receipt_response(content)
         
     except json.JSONDecodeError as e:
         print(f"Failed to parse JSON response: {e}")
@@ -1,85 +1,441 @@
+import io
 import os
+import csv
+import sys
 import json
 import uuid
+import threading
+from array import array
+from contextlib import contextmanager
 import numpy as np
+from itertools import islice
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional
 
 from .vectorstore_base import VectorStoreBase
+from .dedup import VectorDeduplicator
+from .vector_index import VectorIndex
+from .file_lock import FileLock
+from .document_cache import DocumentTable, estimate_document_bytes
+
+
+CSV_COLUMNS = ['id', 'payload', 'vector']
+
+# Bytes of CSV parsed at a time while loading, which bounds the memory a load needs
+LOAD_BLOCK_BYTES = 8 * 1024 * 1024
+
+
+class _Stale(Exception):
+    """A file was replaced by a rewrite while it was being read incrementally."""
+
+
+def _complete_lines(data: bytes) -> bytes:
+    # Drop a trailing partial line that a writer is still appending
+    return data[:data.rfind(b'\n') + 1]
+
+
+def _batched(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _parse_vector(value: Any) -> Optional[List[float]]:
+    if value and isinstance(value, str) and value != 'null':
+        # Handle vector stored as string representation
+        return np.fromstring(value.strip('[]'), sep=',').tolist()
+    return None
+
+
+def _parse_payload(value: Any) -> Dict[str, Any]:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value == '':
+        return {}
+    try:
+        return json.loads(value) or {}
+    except json.JSONDecodeError:
+        return {"content": str(value)}
 
 
 class CustomVectorDB(VectorStoreBase):
+    """Vector store kept in a CSV file, with an in-memory index for search.
+
+    The CSV is append-only: writes append rows, and a later row for an id replaces earlier
+    ones. Deletes append (row, id) tombstones to `<filepath>.tombstones` and clear the row's
+    bit in the index, so neither rewrites the file. Once more than `compact_threshold` of
+    the rows are dead (and at least `compact_min_rows` of them), the live rows are rewritten
+    to a new file and index which then replace the old ones.
+
+    Several processes can share one file. Writers hold an exclusive lock on
+    `<filepath>.lock` and first catch up with what other processes wrote. Readers never
+    wait: each read picks up rows and tombstones appended since the last one by reading
+    only the new bytes, and searches run against the index that was current when they
+    started. Every full rewrite starts a new generation, recorded in `<filepath>.meta`,
+    and a reader that sees a new generation reloads once the writer is done.
+
+    With `memory_budget` (bytes) set, half of it may hold the vector matrix, beyond which
+    vectors move to a memory-mapped file next to the CSV, and the other half caches parsed
+    documents, least recently used out first. Evicted documents are re-read from their
+    CSV row by byte offset. Loading parses the CSV in blocks, so neither loading nor
+    searching needs the whole store in memory. Without a budget everything stays resident.
+    """
 
-    def __init__(self, filepath: str):
+    def __init__(
+        self,
+        filepath: str,
+        dedup: Optional[VectorDeduplicator] = None,
+        compact_threshold: float = 0.3,
+        compact_min_rows: int = 1000,
+        memory_budget: Optional[int] = None,
+    ):
         super().__init__()
 
         # CSV Path
         self.filepath = filepath
         assert self.filepath, "Filepath for CSV storage must be provided."
         assert self.filepath.endswith('.csv'), "Filepath must point to a CSV file."
+        self.tombstones_path = f"{filepath}.tombstones"
+        self.meta_path = f"{filepath}.meta"
+
+        self.compact_threshold = compact_threshold
+        self.compact_min_rows = compact_min_rows
+        self.compactions = 0
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(f"{filepath}.lock")
+        self.memory_budget = memory_budget
+
+        # Row i of the index is data row i of the CSV, starting at byte _row_offsets[i]
+        self._index = self._new_index()
+        self._row_of = {}
+        self._row_offsets = array('q')
+        self._columns = None
+
+        # How far this process has read each file, and which file (inode) it was
+        self.generation = 0
+        self._csv_inode = None
+        self._csv_offset = 0
+        self._tombstones_inode = None
+        self._tombstones_offset = 0
+
+        self.dedup = None
+        self.documents = self._new_documents()
 
         # Load existing vectors from CSV
         self.documents = self.load_vectors()
 
-    def load_vectors(self):
-        if not os.path.exists(self.filepath):
+        # Optional near-duplicate check on add_vectors, indexed over what is already stored
+        self.dedup = dedup
+        if self.dedup is not None:
+            for ids in _batched(list(self.documents), 10_000):
+                self.dedup.add(ids, [self._get_documents(ids)[doc_id]['vector'] for doc_id in ids])
+
+    def _new_index(self) -> VectorIndex:
+        max_resident_bytes = self.memory_budget // 2 if self.memory_budget is not None else None
+        return VectorIndex(max_resident_bytes=max_resident_bytes, spill_dir=os.path.dirname(self.filepath) or None)
+
+    def _new_documents(self) -> Dict[Any, Dict[str, Any]]:
+        if self.memory_budget is None:
             return {}
+        return DocumentTable(self._read_document, capacity_bytes=self.memory_budget - self.memory_budget // 2)
+
+    def load_vectors(self, blocking: bool = True):
+        """Read the whole file under a shared lock and return its live documents.
+
+        Also resets the index and read positions to match. With `blocking=False` the current
+        documents are returned unchanged if a writer holds the lock.
+        """
+        if not os.path.exists(self.filepath):
+            return self._new_documents()
 
         try:
-            df = pd.read_csv(self.filepath)
-            documents = {}
-            
-            for _, row in df.iterrows():
-                doc_id = row['id']
-                # Parse vector from string representation
-                vector_str = row.get('vector', None)
-                vector = None
-                if vector_str and isinstance(vector_str, str) and vector_str != 'null':
-                    # Handle vector stored as string representation
-                    vector = np.fromstring(vector_str.strip('[]'), sep=',').tolist()
-                
-                # Parse payload JSON
-                payload = {}
-                if 'payload' in row and pd.notna(row['payload']):
-                    try:
-                        payload = json.loads(row['payload'])
-                    except json.JSONDecodeError:
-                        payload = {"content": str(row['payload'])}
-                
-                documents[doc_id] = {
-                    "id": doc_id,
-                    "payload": payload,
-                    "vector": vector,
-                }
-            
-            return documents
+            if not self._file_lock.acquire(shared=True, blocking=blocking):
+                return self.documents
+            try:
+                return self._load()
+            finally:
+                self._file_lock.release()
 
         except FileNotFoundError:
-            return {}
+            return self._new_documents()
 
         except Exception as e:
             print(f"Error loading vectors: {e}")
-            return {}
+            return self._new_documents()
 
-    def _save_to_csv(self):
-        if not self.documents:
-            return
-        
-        # Convert documents to DataFrame format
-        rows = []
-        for doc in self.documents.values():
-            row = {
-                'id': doc['id'],
-                'payload': json.dumps(doc['payload']) if doc['payload'] else '{}',
-                'vector': json.dumps(doc['vector']) if doc['vector'] else 'null',
-            }
-            rows.append(row)
-        
-        df = pd.DataFrame(rows)
-        
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-        df.to_csv(self.filepath, index=False)
+    def _load(self, index_dedup: bool = True) -> Dict[Any, Dict[str, Any]]:
+        meta = self._read_meta()
+        self._index, self._row_of, self._row_offsets, self._columns = self._new_index(), {}, array('q'), None
+        documents = self._new_documents()
+
+        with open(self.filepath, 'rb') as f:
+            csv_inode = os.fstat(f.fileno()).st_ino
+            header = f.readline()
+            offset = len(header)
+            if header.endswith(b'\n'):
+                self._columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+                while True:
+                    block = f.read(LOAD_BLOCK_BYTES)
+                    if not block.endswith(b'\n'):
+                        # Finish the last line of the block, unless a writer is still appending it
+                        block = _complete_lines(block + f.readline())
+                    if not block:
+                        break
+                    self._ingest(block, offset, documents, index_dedup)
+                    offset += len(block)
+                    f.seek(offset)
+            else:
+                offset = 0
+
+        tombstones, tombstones_inode, tombstones_data = self._read_tombstones(None, 0)
+        self._apply_tombstones(tombstones, documents)
+
+        self.generation = meta["generation"]
+        self._csv_inode, self._csv_offset = csv_inode, offset
+        self._tombstones_inode, self._tombstones_offset = tombstones_inode, len(tombstones_data)
+        return documents
+
+    def _ingest(self, data: bytes, offset: int, documents: Dict[Any, Dict[str, Any]], index_dedup: bool = True):
+        """Apply complete CSV lines that start at byte `offset` of the file."""
+        line_ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))
+        starts = np.concatenate([[0], line_ends[:-1] + 1]) + offset
+        df = pd.read_csv(io.BytesIO(data), names=self._columns, header=None)
+        self._apply_rows(df, documents, starts.tolist(), index_dedup)
+
+    def _read_document(self, doc_id: Any) -> Optional[Dict[str, Any]]:
+        """Parse one document back from its CSV row, for documents evicted from memory."""
+        row = self._row_of.get(doc_id)
+        if row is None:
+            return None
+        try:
+            with open(self.filepath, 'rb') as f:
+                f.seek(self._row_offsets[row])
+                line = f.readline().decode()
+        except (OSError, IndexError):
+            return None
+
+        fields = dict(zip(self._columns, next(csv.reader([line]), [])))
+        # A rewrite may have moved the row since the offset was recorded
+        if fields.get('id') != str(doc_id):
+            return None
+        return {
+            "id": doc_id,
+            "payload": _parse_payload(fields.get('payload')),
+            "vector": _parse_vector(fields.get('vector')),
+        }
+
+    def _read_meta(self) -> dict:
+        if not os.path.exists(self.meta_path):
+            return {"generation": 0}
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: dict):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_tombstones(self, inode: Optional[int], offset: int) -> tuple:
+        """Return (tombstones, inode, bytes read) for complete lines past `offset`.
+
+        Raises _Stale if the file is no longer the one identified by `inode`.
+        """
+        try:
+            f = open(self.tombstones_path, 'rb')
+        except FileNotFoundError:
+            if inode is not None:
+                raise _Stale()
+            return [], None, b''
+
+        with f:
+            current_inode = os.fstat(f.fileno()).st_ino
+            if inode is not None and current_inode != inode:
+                raise _Stale()
+            f.seek(offset)
+            data = _complete_lines(f.read())
+
+        tombstones = []
+        for line in data.splitlines():
+            # A line that does not parse was never completely written
+            try:
+                row, doc_id = json.loads(line)
+            except ValueError:
+                continue
+            tombstones.append((row, doc_id))
+        return tombstones, current_inode, data
+
+    def _apply_rows(self, df: pd.DataFrame, documents: Dict[Any, Dict[str, Any]], offsets: List[int], index_dedup: bool = True) -> List[Any]:
+        ids, vectors, parsed = [], [], []
+        for _, row in df.iterrows():
+            doc_id = row['id']
+            vector = _parse_vector(row.get('vector', None))
+            parsed.append({
+                "id": doc_id,
+                "payload": _parse_payload(row.get('payload', None)),
+                "vector": vector,
+            })
+            ids.append(doc_id)
+            vectors.append(vector)
+
+        rows = self._index.append(ids, vectors)
+        self._row_offsets.extend(offsets)
+        for document, row in zip(parsed, rows):
+            # A later row for the same id supersedes the earlier one
+            doc_id = document["id"]
+            if doc_id in self._row_of:
+                self._index.delete([self._row_of[doc_id]])
+            self._row_of[doc_id] = row
+            documents[doc_id] = document
+
+        if index_dedup and self.dedup is not None:
+            self.dedup.add(ids, vectors)
+        return ids
+
+    def _apply_tombstones(self, tombstones: List[tuple], documents: Dict[Any, Dict[str, Any]]):
+        removed = []
+        for row, doc_id in tombstones:
+            # Tombstones name the row, so one for an id that was re-added later is ignored
+            if self._row_of.get(doc_id) == row:
+                self._index.delete([row])
+                del self._row_of[doc_id]
+                del documents[doc_id]
+                removed.append(doc_id)
+
+        if removed and self.dedup is not None:
+            self.dedup.remove(removed)
+
+    def refresh(self, blocking: bool = False) -> bool:
+        """Pick up what other processes wrote since the last read. Returns True if anything changed.
+
+        Appended rows and tombstones are read incrementally. A new generation needs a full
+        reload, which is skipped (keeping the current snapshot) while a writer holds the lock
+        unless `blocking` is set. Also skipped while another thread of this process is writing.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            try:
+                csv_stat = os.stat(self.filepath)
+            except FileNotFoundError:
+                return False
+
+            if csv_stat.st_ino == self._csv_inode:
+                if csv_stat.st_size == self._csv_offset and not self._tombstones_changed():
+                    return False
+                try:
+                    self._read_appended()
+                    return True
+                except _Stale:
+                    pass
+
+            documents = self.load_vectors(blocking=blocking)
+            if documents is not self.documents:
+                if self.dedup is not None:
+                    self.dedup.remove([doc_id for doc_id in self.documents if doc_id not in documents])
+                self.documents = documents
+                return True
+            return False
+        finally:
+            self._lock.release()
+
+    def _tombstones_changed(self) -> bool:
+        try:
+            tombstones_stat = os.stat(self.tombstones_path)
+        except FileNotFoundError:
+            return self._tombstones_inode is not None
+        return tombstones_stat.st_ino != self._tombstones_inode or tombstones_stat.st_size != self._tombstones_offset
+
+    def _read_appended(self):
+        # Tombstones first: every row they name was written before them, so it is in the CSV read next
+        tombstones, tombstones_inode, tombstones_data = self._read_tombstones(self._tombstones_inode, self._tombstones_offset)
+
+        with open(self.filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_ino != self._csv_inode:
+                raise _Stale()
+            f.seek(self._csv_offset)
+            data = _complete_lines(f.read())
+
+        # A rewrite replaces the CSV before it removes the tombstones, so if the CSV is still the
+        # same file the tombstones read above belong to this generation
+        if os.stat(self.filepath).st_ino != self._csv_inode:
+            raise _Stale()
+
+        if data:
+            self._ingest(data, self._csv_offset, self.documents)
+        self._apply_tombstones(tombstones, self.documents)
+        self._csv_offset += len(data)
+        self._tombstones_inode = tombstones_inode
+        self._tombstones_offset += len(tombstones_data)
+
+    @contextmanager
+    def _writing(self):
+        """Hold the thread and file locks and catch up with other writers first."""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.filepath) or '.', exist_ok=True)
+            with self._file_lock:
+                self.refresh(blocking=True)
+                yield
+
+    @staticmethod
+    def _csv_row(doc: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            'id': doc['id'],
+            'payload': json.dumps(doc['payload']) if doc['payload'] else '{}',
+            'vector': json.dumps(doc['vector']) if doc['vector'] else 'null',
+        }
+
+    def _live_documents(self) -> Iterable[Dict[str, Any]]:
+        for doc_id in self.documents:
+            document = self.documents.get(doc_id)
+            if document is not None:
+                yield document
+
+    def _save_to_csv(self, documents: Optional[Iterable[Dict[str, Any]]] = None):
+        """Rewrite the whole file as a new generation, dropping the tombstones, and reload it.
+
+        Writes `documents`, by default the live documents, streaming them one row at a time.
+        """
+        with self._writing():
+            tmp_path = f"{self.filepath}.tmp"
+            with open(tmp_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, lineterminator='\n')
+                writer.writeheader()
+                writer.writerows(self._csv_row(doc) for doc in (documents if documents is not None else self._live_documents()))
+
+            os.replace(tmp_path, self.filepath)
+            if os.path.exists(self.tombstones_path):
+                os.remove(self.tombstones_path)
+            self.generation += 1
+            self._write_meta({"generation": self.generation})
+
+            # Row numbers and byte offsets all changed; callers keep the dedup index up to date
+            self.documents = self._load(index_dedup=False)
+
+    def _append_to_csv(self, documents: List[Dict[str, Any]]) -> List[int]:
+        """Append rows and return the byte offset each one starts at."""
+        new_file = not os.path.exists(self.filepath) or os.path.getsize(self.filepath) == 0
+        if new_file:
+            self._columns = list(CSV_COLUMNS)
+
+        # Appended rows follow the existing header's column order
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self._columns, extrasaction='ignore', lineterminator='\n')
+        if new_file:
+            writer.writeheader()
+        lines = [buffer.getvalue().encode()]
+        for doc in documents:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(self._csv_row(doc))
+            lines.append(buffer.getvalue().encode())
+
+        with open(self.filepath, 'ab') as f:
+            position = f.seek(0, os.SEEK_END) + len(lines[0])
+            offsets = []
+            for line in lines[1:]:
+                offsets.append(position)
+                position += len(line)
+            f.write(b''.join(lines))
+            self._csv_inode, self._csv_offset = os.fstat(f.fileno()).st_ino, f.tell()
+        return offsets
 
     def add_vectors(self, vectors: List[List[float]], payloads: Optional[List[Dict[str, Any]]] = None):
         ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
@@ -87,71 +443,176 @@ class CustomVectorDB(VectorStoreBase):
         if payloads is None:
             payloads = [{}] * len(vectors)
         
+        if len(vectors) != len(payloads):
+            raise ValueError("Vectors, ids, and payloads must have the same length")
+
+        if self.dedup is None:
+            self._write_documents(ids, vectors, payloads)
+            return ids
+
+        # Check against what other processes have stored too
+        self.refresh(blocking=True)
+
+        # Duplicates resolve to the id of the document they matched
+        decisions = self.dedup.deduplicate(ids, vectors, payloads, self._get_documents)
+        writes = {decision.id: decision for decision in decisions if decision.action != "skip"}
+        self._write_documents(
+            list(writes),
+            [decision.vector for decision in writes.values()],
+            [decision.payload for decision in writes.values()],
+        )
+
+        duplicates = len(decisions) - sum(decision.action == "insert" for decision in decisions)
+        if duplicates:
+            print(f"Found {duplicates} near-duplicate vectors ({self.dedup.policy})")
+
+        return [decision.id for decision in decisions]
+
+    def _get_documents(self, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        documents = {doc_id: self.documents.get(doc_id) for doc_id in ids}
+        return {doc_id: document for doc_id, document in documents.items() if document is not None}
+
+    def upsert_documents(self, ids: List[Any], vectors: List[Optional[List[float]]], payloads: List[Dict[str, Any]]):
+        if self.dedup is not None:
+            self.dedup.add(ids, vectors)
+        self._write_documents(ids, vectors, payloads)
+
+    def _write_documents(self, ids: List[Any], vectors: List[Optional[List[float]]], payloads: List[Dict[str, Any]]):
         if len(vectors) != len(ids) or len(vectors) != len(payloads):
             raise ValueError("Vectors, ids, and payloads must have the same length")
-        
-        for i, (vector, doc_id, payload) in enumerate(zip(vectors, ids, payloads)):
-            # Create document following the schema
-            document = {
-                "id": doc_id,
-                "payload": payload,
-                "vector": vector,
-            }
-            
-            self.documents[doc_id] = document
-        
-        # Save to CSV
-        self._save_to_csv()
+        if not ids:
+            return
 
-        return ids
+        with self._writing():
+            documents = []
+            for vector, doc_id, payload in zip(vectors, ids, payloads):
+                # Create document following the schema
+                documents.append({
+                    "id": doc_id,
+                    "payload": payload,
+                    "vector": vector,
+                })
+
+            if self._columns is None or not set(CSV_COLUMNS) <= set(self._columns):
+                # The file is missing or has no usable header, start it over
+                updates = {document["id"]: document for document in documents}
+                existing = [updates.pop(doc_id, None) or self.documents.get(doc_id) for doc_id in self.documents]
+                self._save_to_csv([document for document in existing if document is not None] + list(updates.values()))
+                return
+
+            # The index checks dimensions before it changes, so a bad batch never reaches the file
+            rows = self._index.append(ids, vectors)
+            try:
+                offsets = self._append_to_csv(documents)
+            except OSError:
+                self.documents = self._load(index_dedup=False)
+                raise
+            self._row_offsets.extend(offsets)
+            for document, row in zip(documents, rows):
+                doc_id = document["id"]
+                if doc_id in self._row_of:
+                    self._index.delete([self._row_of[doc_id]])
+                self._row_of[doc_id] = row
+                self.documents[doc_id] = document
+
+            self._maybe_compact()
+
+    def scroll_documents(self, limit: int = 1000, offset: Optional[int] = None):
+        self.refresh()
+        # Offsets are positions in insertion order
+        start = offset or 0
+        documents = [self.documents.get(doc_id) for doc_id in islice(self.documents, start, start + limit)]
+        documents = [document for document in documents if document is not None]
+        next_offset = start + limit if start + limit < len(self.documents) else None
+        return documents, next_offset
 
     def search_vectors(self, query_vector: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
-        if not self.documents:
-            return []
-        
-        query_vector = np.array(query_vector)
+        self.refresh()
+
+        # No lock: the index is only ever replaced whole, and tombstoned rows are masked out
         results = []
-        
-        for doc in self.documents.values():
-            if doc['vector'] is None:
+        for doc_id, similarity in self._index.search(query_vector, top_k):
+            doc = self.documents.get(doc_id)
+            if doc is None:
                 continue
-                
-            doc_vector = np.array(doc['vector'])
-            
-            # Compute cosine similarity
-            dot_product = np.dot(query_vector, doc_vector)
-            norm_query = np.linalg.norm(query_vector)
-            norm_doc = np.linalg.norm(doc_vector)
-            
-            if norm_query == 0 or norm_doc == 0:
-                similarity = 0
-            else:
-                similarity = dot_product / (norm_query * norm_doc)
-            
+
             # Create result document with score
             result_doc = doc.copy()
-            result_doc['score'] = float(similarity)
+            result_doc['score'] = similarity
             results.append(result_doc)
-        
-        # Sort by score (descending) and return top_k
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:top_k]
+
+        return results
 
     def delete_vectors(self, ids: List[str]):
-        for doc_id in ids:
-            if doc_id in self.documents:
-                del self.documents[doc_id]
-        
-        # Save updated data to CSV
-        self._save_to_csv()
+        if self.dedup is not None:
+            self.dedup.remove(ids)
+
+        with self._writing():
+            tombstones = []
+            for doc_id in ids:
+                if doc_id in self.documents:
+                    row = self._row_of.pop(doc_id)
+                    self._index.delete([row])
+                    del self.documents[doc_id]
+                    tombstones.append((row, doc_id))
+
+            if not tombstones:
+                return
+
+            with open(self.tombstones_path, 'a') as f:
+                f.writelines(json.dumps([row, doc_id]) + "\n" for row, doc_id in tombstones)
+                self._tombstones_inode, self._tombstones_offset = os.fstat(f.fileno()).st_ino, f.tell()
+
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._index.dead >= self.compact_min_rows and self._index.dead_fraction > self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the file and index with only the live rows, reclaiming tombstoned space."""
+        with self._writing():
+            dead = self._index.dead
+            self._save_to_csv()
+            self.compactions += 1
+            print(f"Compacted {self.filepath}: dropped {dead} dead rows, {len(self.documents)} remain")
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "rows": len(index),
+            "live": len(index) - index.dead,
+            "dead": index.dead,
+            "dead_fraction": index.dead_fraction,
+            "compactions": self.compactions,
+            "generation": self.generation,
+        }
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Approximate bytes held in RAM by the store, by part, next to the configured budget."""
+        usage = self._index.memory_usage()
+        usage["row_offsets"] = len(self._row_offsets) * self._row_offsets.itemsize
+        if isinstance(self.documents, DocumentTable):
+            usage["documents_cached"] = self.documents.cached_bytes
+            usage["document_cache"] = self.documents.stats()
+        else:
+            usage["documents_cached"] = sum(estimate_document_bytes(document) for document in self.documents.values())
+        # The id objects, shared by the document table, row map and index, plus the row map itself
+        usage["ids"] = sum(sys.getsizeof(doc_id) for doc_id in self._row_of) + sys.getsizeof(self._row_of)
+        usage["total_resident"] = sum(usage[key] for key in ("vectors_resident", "index", "row_offsets", "documents_cached", "ids"))
+        usage["budget"] = self.memory_budget
+        return usage
 
     def get_document_by_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        self.refresh()
         return self.documents.get(doc_id)
 
     def list_all_documents(self) -> List[Dict[str, Any]]:
-        return list(self.documents.values())
+        self.refresh()
+        return list(self._live_documents())
 
     def count_documents(self) -> int:
+        self.refresh()
         return len(self.documents)
 
     def setup(self):
@@ -159,10 +620,11 @@ class CustomVectorDB(VectorStoreBase):
         os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
         
         # If file doesn't exist, create an empty CSV with proper headers
-        if not os.path.exists(self.filepath):
-            empty_df = pd.DataFrame(columns=['id', 'payload', 'vector'])
-            empty_df.to_csv(self.filepath, index=False)
-            print(f"Created new CSV file at {self.filepath}")
+        with self._writing():
+            if not os.path.exists(self.filepath):
+                empty_df = pd.DataFrame(columns=['id', 'payload', 'vector'])
+                empty_df.to_csv(self.filepath, index=False)
+                print(f"Created new CSV file at {self.filepath}")
         
         print(f"CustomVectorDB setup completed for file '{self.filepath}'")
         return True
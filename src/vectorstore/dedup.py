@@ -0,0 +1,197 @@
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+DEDUP_POLICIES = ("skip", "merge", "replace")
+
+
+@dataclass
+class DedupDecision:
+    """What to do with one incoming vector.
+
+    action is "insert" for new documents, or the policy applied to a duplicate of `id`.
+    """
+
+    action: str
+    id: Any
+    vector: Optional[List[float]]
+    payload: Dict[str, Any]
+    similarity: Optional[float] = None
+
+
+class VectorDeduplicator:
+    """Random-hyperplane LSH over a store's vectors, used to catch near-duplicates on insert.
+
+    Each of `num_tables` tables hashes a vector to the sign pattern of `bits_per_table` random
+    projections, so similar vectors share a bucket in at least one table with high probability.
+    Only vectors in the incoming vector's buckets are compared exactly, which keeps the check
+    sub-linear in the size of the store. A candidate with cosine similarity of at least
+    `threshold` is a duplicate and is handled by `policy`:
+
+    - "skip": drop the incoming document and keep the existing one
+    - "merge": keep the existing vector and id, and update its payload with the incoming one
+    - "replace": overwrite the existing document's vector and payload, keeping its id
+    """
+
+    def __init__(self, threshold: float = 0.97, policy: str = "skip", num_tables: int = 10, bits_per_table: int = 12, seed: int = 0):
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown dedup policy {policy!r}, expected one of {DEDUP_POLICIES}")
+        self.threshold = threshold
+        self.policy = policy
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.seed = seed
+
+        # Hyperplanes are created once the vector dimension is known
+        self._planes = None
+        self._powers = 1 << np.arange(bits_per_table, dtype=np.int64)
+        self._tables = [defaultdict(set) for _ in range(num_tables)]
+        self._keys = {}
+        self._lock = threading.Lock()
+
+        self.checked = 0
+        self.counts = {policy: 0 for policy in DEDUP_POLICIES}
+
+    def _ensure_planes(self, dimension: int):
+        if self._planes is None:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal((self.num_tables * self.bits_per_table, dimension))
+        elif self._planes.shape[1] != dimension:
+            raise ValueError(f"Vector dimension {dimension} does not match indexed dimension {self._planes.shape[1]}")
+
+    def bucket_keys(self, vectors: np.ndarray) -> np.ndarray:
+        """Bucket key of each vector in each table, shape (len(vectors), num_tables)."""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        self._ensure_planes(vectors.shape[1])
+        bits = (vectors @ self._planes.T > 0).reshape(len(vectors), self.num_tables, self.bits_per_table)
+        return bits @ self._powers
+
+    def _add(self, doc_id: Any, keys: np.ndarray):
+        self._remove(doc_id)
+        keys = tuple(keys.tolist())
+        for table, key in zip(self._tables, keys):
+            table[key].add(doc_id)
+        self._keys[doc_id] = keys
+
+    def _remove(self, doc_id: Any):
+        keys = self._keys.pop(doc_id, None)
+        if keys is None:
+            return
+        for table, key in zip(self._tables, keys):
+            bucket = table[key]
+            bucket.discard(doc_id)
+            if not bucket:
+                del table[key]
+
+    def add(self, ids: List[Any], vectors: List[Optional[List[float]]]):
+        """Index documents that were written without going through `deduplicate`, e.g. on load."""
+        rows = [(doc_id, vector) for doc_id, vector in zip(ids, vectors) if vector is not None]
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+            if rows:
+                keys = self.bucket_keys([vector for _, vector in rows])
+                for (doc_id, _), row_keys in zip(rows, keys):
+                    self._add(doc_id, row_keys)
+
+    def remove(self, ids: Iterable[Any]):
+        with self._lock:
+            for doc_id in ids:
+                self._remove(doc_id)
+
+    def _candidates(self, keys: np.ndarray) -> set:
+        candidates = set()
+        for table, key in zip(self._tables, keys.tolist()):
+            candidates.update(table.get(key, ()))
+        return candidates
+
+    def deduplicate(
+        self,
+        ids: List[Any],
+        vectors: List[Optional[List[float]]],
+        payloads: List[Dict[str, Any]],
+        get_documents: Callable[[List[Any]], Dict[Any, dict]],
+    ) -> List[DedupDecision]:
+        """Decide, in order, what to write for each incoming document and index the result.
+
+        `get_documents(ids)` returns the stored {"vector", "payload"} documents for candidate ids.
+        Duplicates within the batch are caught too, since accepted vectors are indexed as they go.
+        """
+        decisions = []
+        pending = {}  # documents accepted earlier in this batch, not yet in the store
+
+        with self._lock:
+            vectors_array = [vector for vector in vectors if vector is not None]
+            all_keys = iter(self.bucket_keys(vectors_array)) if vectors_array else iter(())
+
+            for doc_id, vector, payload in zip(ids, vectors, payloads):
+                if vector is None:
+                    decisions.append(DedupDecision("insert", doc_id, vector, payload))
+                    continue
+
+                self.checked += 1
+                keys = next(all_keys)
+                match_id, similarity = self._best_match(vector, self._candidates(keys), pending, get_documents)
+                existing = None
+                if match_id is not None:
+                    # The match may have been deleted since it was indexed, which makes it no match
+                    existing = pending.get(match_id) or get_documents([match_id]).get(match_id)
+
+                if existing is None:
+                    decision = DedupDecision("insert", doc_id, vector, payload)
+                    self._add(doc_id, keys)
+                else:
+                    self.counts[self.policy] += 1
+                    if self.policy == "skip":
+                        decision = DedupDecision("skip", match_id, existing["vector"], existing["payload"], similarity)
+                    elif self.policy == "merge":
+                        merged_payload = {**(existing["payload"] or {}), **(payload or {})}
+                        decision = DedupDecision("merge", match_id, existing["vector"], merged_payload, similarity)
+                    else:
+                        decision = DedupDecision("replace", match_id, vector, payload, similarity)
+                        self._add(match_id, keys)
+
+                pending[decision.id] = {"vector": decision.vector, "payload": decision.payload}
+                decisions.append(decision)
+
+        return decisions
+
+    def _best_match(self, vector: List[float], candidates: set, pending: dict, get_documents) -> tuple:
+        if not candidates:
+            return None, None
+
+        candidate_ids = list(candidates)
+        stored = get_documents([doc_id for doc_id in candidate_ids if doc_id not in pending])
+        candidate_vectors = []
+        for doc_id in candidate_ids:
+            document = pending.get(doc_id) or stored.get(doc_id)
+            candidate_vectors.append(document["vector"] if document and document["vector"] is not None else None)
+
+        usable = [(doc_id, candidate) for doc_id, candidate in zip(candidate_ids, candidate_vectors) if candidate is not None]
+        if not usable:
+            return None, None
+
+        matrix = np.asarray([candidate for _, candidate in usable], dtype=np.float64)
+        query = np.asarray(vector, dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarities = np.divide(matrix @ query, norms, out=np.zeros(len(usable)), where=norms > 0)
+
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None, None
+        return usable[best][0], float(similarities[best])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "indexed": len(self._keys),
+                "checked": self.checked,
+                "duplicates": sum(self.counts.values()),
+                "skipped": self.counts["skip"],
+                "merged": self.counts["merge"],
+                "replaced": self.counts["replace"],
+            }
@@ -0,0 +1,99 @@
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def estimate_document_bytes(document: Dict[str, Any]) -> int:
+    """Rough in-memory size of a parsed document: a list of Python floats plus its payload."""
+    vector = document.get("vector")
+    payload = document.get("payload")
+    # A float in a list costs a pointer plus a 24-byte float object
+    return 200 + (32 * len(vector) if vector is not None else 0) + 2 * len(json.dumps(payload, default=str))
+
+
+class DocumentTable(MutableMapping):
+    """The id -> document mapping of a store, keeping at most `capacity_bytes` of documents parsed.
+
+    Ids are always held, in insertion order. Documents beyond the budget are dropped least
+    recently used first and re-read with `load(doc_id)` when asked for again, so the most
+    requested payloads stay resident. With `capacity_bytes=None` every document stays parsed
+    and this behaves like a dict.
+    """
+
+    def __init__(self, load: Callable[[Any], Optional[Dict[str, Any]]], capacity_bytes: Optional[int] = None):
+        self.load = load
+        self.capacity_bytes = capacity_bytes
+        self._ids = {}
+        self._cache = OrderedDict()
+        self._sizes = {}
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(list(self._ids))
+
+    def __contains__(self, doc_id: Any) -> bool:
+        return doc_id in self._ids
+
+    def __getitem__(self, doc_id: Any) -> Dict[str, Any]:
+        if doc_id not in self._ids:
+            raise KeyError(doc_id)
+
+        with self._lock:
+            document = self._cache.get(doc_id)
+            if document is not None:
+                self._cache.move_to_end(doc_id)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        document = self.load(doc_id)
+        if document is None:
+            raise KeyError(doc_id)
+        with self._lock:
+            if doc_id in self._ids:
+                self._put(doc_id, document)
+        return document
+
+    def __setitem__(self, doc_id: Any, document: Dict[str, Any]):
+        with self._lock:
+            self._ids[doc_id] = None
+            self._put(doc_id, document)
+
+    def __delitem__(self, doc_id: Any):
+        with self._lock:
+            del self._ids[doc_id]
+            self._drop(doc_id)
+
+    def _put(self, doc_id: Any, document: Dict[str, Any]):
+        self._drop(doc_id)
+        size = estimate_document_bytes(document) if self.capacity_bytes is not None else 0
+        self._cache[doc_id] = document
+        self._sizes[doc_id] = size
+        self.cached_bytes += size
+        if self.capacity_bytes is None:
+            return
+        while self.cached_bytes > self.capacity_bytes and len(self._cache) > 1:
+            evicted, _ = self._cache.popitem(last=False)
+            self.cached_bytes -= self._sizes.pop(evicted)
+
+    def _drop(self, doc_id: Any):
+        if self._cache.pop(doc_id, None) is not None:
+            self.cached_bytes -= self._sizes.pop(doc_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ids),
+                "cached": len(self._cache),
+                "cached_bytes": self.cached_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
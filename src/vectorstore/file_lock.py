@@ -0,0 +1,51 @@
+try:
+    import fcntl
+except ImportError:
+    # Windows: locks are then no-ops and only threads in one process are serialized
+    fcntl = None
+
+
+class FileLock:
+    """Advisory `flock` on `path`, shared or exclusive, for coordinating processes.
+
+    Re-entrant within one instance: nested acquires succeed immediately and the lock is
+    released with the outermost release, so an exclusive holder can call code that asks
+    for a shared lock. Not thread-safe on its own; callers guard it with a thread lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def acquire(self, shared: bool = False, blocking: bool = True) -> bool:
+        if self._depth:
+            self._depth += 1
+            return True
+
+        if fcntl is not None:
+            f = open(self.path, 'a')
+            flags = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+            try:
+                fcntl.flock(f, flags)
+            except BlockingIOError:
+                f.close()
+                return False
+            self._file = f
+
+        self._depth = 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
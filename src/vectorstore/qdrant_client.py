@@ -1,21 +1,27 @@
 import os
 import uuid
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
 from .vectorstore_base import VectorStoreBase
+from .dedup import VectorDeduplicator
 
 
 class Qdrant(VectorStoreBase):
 
-    def __init__(self, host: str = "localhost", port: int = 6333, collection_name: str = "default_collection", vector_size: int = 1536):
+    def __init__(self, host: str = "localhost", port: int = 6333, collection_name: str = "default_collection", vector_size: int = 1536, dedup: Optional[VectorDeduplicator] = None):
         self.host = host or os.getenv("QDRANT_HOST", "localhost")
         self.port = port or int(os.getenv("QDRANT_PORT", 6333))
         self.collection_name = collection_name
         self.vector_size = vector_size
+
+        # Imported here, qdrant_client takes about a second to import
+        from qdrant_client import QdrantClient
+
         self.client = QdrantClient(host=self.host, port=self.port)
 
+        # Optional near-duplicate check on add_vectors; indexed over the collection in setup()
+        self.dedup = dedup
+
     def setup_collection(self, collection_name: str, vector_size: int):
         # Qdrant collection
         if self.client.collection_exists(collection_name=collection_name):
@@ -24,6 +30,8 @@ class Qdrant(VectorStoreBase):
             # TODO: Ensure vector size matches
             return
 
+        from qdrant_client.models import Distance, VectorParams
+
         created = self.client.create_collection(
             collection_name=collection_name,
             vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
@@ -38,23 +46,41 @@ class Qdrant(VectorStoreBase):
         # Setup collection
         self.setup_collection(collection_name=self.collection_name, vector_size=self.vector_size)
 
+        if self.dedup is not None:
+            documents, offset = self.scroll_documents(limit=1000)
+            while True:
+                self.dedup.add([doc["id"] for doc in documents], [doc["vector"] for doc in documents])
+                if offset is None:
+                    break
+                documents, offset = self.scroll_documents(limit=1000, offset=offset)
+
     def get_collections(self):
         return [collection.name for collection in self.client.get_collections().collections]
     
-    def list_all_documents(self):
-        search_result = self.client.scroll(
+    def scroll_documents(self, limit: int = 1000, offset=None):
+        records, next_offset = self.client.scroll(
             collection_name=self.collection_name,
-            limit=1000,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
             with_vectors=True,
         )
 
         documents = []
-        for record in search_result[0]:
+        for record in records:
             documents.append({
                 "id": record.id,
                 "payload": record.payload,
                 "vector": record.vector,
             })
+        return documents, next_offset
+
+    def list_all_documents(self):
+        # Page through the whole collection rather than stopping at the first page
+        documents, offset = self.scroll_documents(limit=1000)
+        while offset is not None:
+            page, offset = self.scroll_documents(limit=1000, offset=offset)
+            documents.extend(page)
         return documents
 
     def add_vectors(self, vectors: List[List[float]], payloads: List[Dict[str, Any]] = None):
@@ -64,9 +90,23 @@ class Qdrant(VectorStoreBase):
         if len(vectors) != len(payloads):
             raise ValueError("Vectors and payloads must have the same length")
         
+        ids = [str(uuid.uuid4()) for _ in range(len(vectors))]
+        if self.dedup is not None:
+            # Skipped duplicates aren't written; merged and replaced ones overwrite the matched point
+            decisions = self.dedup.deduplicate(ids, vectors, payloads, self._get_documents)
+            writes = {decision.id: decision for decision in decisions if decision.action != "skip"}
+            ids = list(writes)
+            vectors = [decision.vector for decision in writes.values()]
+            payloads = [decision.payload for decision in writes.values()]
+
+            duplicates = len(decisions) - sum(decision.action == "insert" for decision in decisions)
+            if duplicates:
+                print(f"Found {duplicates} near-duplicate vectors ({self.dedup.policy})")
+
+        from qdrant_client.models import PointStruct
+
         points = []
-        for i, (vector, payload) in enumerate(zip(vectors, payloads)):
-            point_id = str(uuid.uuid4())
+        for i, (point_id, vector, payload) in enumerate(zip(ids, vectors, payloads)):
             point = PointStruct(
                 id=point_id,
                 vector=vector,
@@ -82,6 +122,35 @@ class Qdrant(VectorStoreBase):
         print(f"Added {len(points)} vectors to collection: {self.collection_name}")
         return operation_info.model_dump()
 
+    def _get_documents(self, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        if not ids:
+            return {}
+        records = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=True,
+            with_vectors=True,
+        )
+        return {record.id: {"id": record.id, "payload": record.payload, "vector": record.vector} for record in records}
+
+    def upsert_documents(self, ids: List[Any], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        if self.dedup is not None:
+            self.dedup.add(ids, vectors)
+
+        from qdrant_client.models import PointStruct
+
+        # Point ids must be unsigned integers or UUID strings
+        points = [
+            PointStruct(id=point_id, vector=vector, payload=payload)
+            for point_id, vector, payload in zip(ids, vectors, payloads)
+        ]
+        operation_info = self.client.upsert(
+            collection_name=self.collection_name,
+            points=points,
+            wait=True,
+        )
+        return operation_info.model_dump()
+
     def search_vectors(self, query_vector: List[float], top_k: int = 5):
         results = self.client.search(
             collection_name=self.collection_name,
@@ -91,6 +160,9 @@ class Qdrant(VectorStoreBase):
         return results
 
     def delete_vectors(self, ids: List[str]):
+        if self.dedup is not None:
+            self.dedup.remove(ids)
+
         operation_info = self.client.delete(
             collection_name=self.collection_name,
             points_selector=ids
@@ -0,0 +1,272 @@
+import os
+import json
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+SNAPSHOT_FORMAT = "vector-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Ids that are neither UUIDs nor unsigned ints are imported as uuid5(MIGRATED_ID_NAMESPACE, str(id)),
+# with the original id kept in the payload under ORIGINAL_ID_KEY
+MIGRATED_ID_NAMESPACE = uuid.UUID("6f1c1d2e-8b1a-5c4e-9a57-3f0d7c2b9e41")
+ORIGINAL_ID_KEY = "original_id"
+
+
+def _write_json_atomic(path: str, data: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class SnapshotWriter:
+    """Writes documents to a snapshot directory one chunk at a time.
+
+    Each chunk is a float32 `.npy` matrix of vectors plus a `.jsonl` file with one
+    {"id", "payload"} record per row. The manifest is rewritten after every chunk together
+    with the source's scroll cursor, so an interrupted export resumes after the last chunk.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.manifest = _read_json(os.path.join(path, MANIFEST_NAME)) or {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "dimension": None,
+            "dtype": "float32",
+            "count": 0,
+            "chunks": [],
+            "cursor": None,
+            "complete": False,
+        }
+
+    @property
+    def complete(self) -> bool:
+        return self.manifest["complete"]
+
+    @property
+    def cursor(self) -> Any:
+        return self.manifest["cursor"]
+
+    def write_chunk(self, documents: List[Dict[str, Any]], cursor: Any = None):
+        """Write one chunk and record `cursor` as where the next chunk starts in the source."""
+        dimension = self.manifest["dimension"]
+        for document in documents:
+            if document.get("vector") is not None:
+                dimension = dimension or len(document["vector"])
+                if len(document["vector"]) != dimension:
+                    raise ValueError(f"Vector for id {document['id']!r} has dimension {len(document['vector'])}, expected {dimension}")
+
+        vectors = np.zeros((len(documents), dimension or 0), dtype=np.float32)
+        records = []
+        for row, document in enumerate(documents):
+            record = {"id": document["id"], "payload": document.get("payload") or {}}
+            if document.get("vector") is None:
+                # Kept as a zero row so rows and records stay aligned
+                record["vector"] = False
+            else:
+                vectors[row] = document["vector"]
+            records.append(record)
+
+        index = len(self.manifest["chunks"])
+        name = f"chunk-{index:05d}"
+        np.save(os.path.join(self.path, f"{name}.npy"), vectors)
+        with open(os.path.join(self.path, f"{name}.jsonl"), "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+        self.manifest["dimension"] = dimension
+        self.manifest["count"] += len(documents)
+        self.manifest["chunks"].append({"index": index, "count": len(documents), "vectors": f"{name}.npy", "records": f"{name}.jsonl"})
+        self.manifest["cursor"] = cursor
+        self._save_manifest()
+
+    def finish(self):
+        self.manifest["complete"] = True
+        self.manifest["cursor"] = None
+        self._save_manifest()
+
+    def _save_manifest(self):
+        _write_json_atomic(os.path.join(self.path, MANIFEST_NAME), self.manifest)
+
+
+class SnapshotReader:
+    """Reads a snapshot chunk by chunk; vectors are memory-mapped rather than loaded whole."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.manifest = _read_json(os.path.join(path, MANIFEST_NAME))
+        if self.manifest is None or self.manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"No vector snapshot found at {path}")
+        if self.manifest["version"] > SNAPSHOT_VERSION:
+            raise ValueError(f"Snapshot version {self.manifest['version']} is newer than supported version {SNAPSHOT_VERSION}")
+        if not self.manifest["complete"]:
+            raise ValueError(f"Snapshot at {path} is incomplete; resume the export first")
+
+    @property
+    def count(self) -> int:
+        return self.manifest["count"]
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self.manifest["dimension"]
+
+    def iter_batches(self, batch_size: int = 1000, start_chunk: int = 0) -> Iterator[tuple]:
+        """Yield (chunk_index, ids, vectors, payloads) in batches of at most `batch_size` rows.
+
+        A vector is None where the source document had none.
+        """
+        for chunk in self.manifest["chunks"][start_chunk:]:
+            vectors = np.load(os.path.join(self.path, chunk["vectors"]), mmap_mode="r")
+            with open(os.path.join(self.path, chunk["records"])) as f:
+                batch = []
+                for row, line in enumerate(f):
+                    batch.append((row, json.loads(line)))
+                    if len(batch) >= batch_size:
+                        yield self._batch(chunk["index"], vectors, batch)
+                        batch = []
+                if batch:
+                    yield self._batch(chunk["index"], vectors, batch)
+
+    @staticmethod
+    def _batch(chunk_index: int, vectors: np.ndarray, batch: list) -> tuple:
+        rows = vectors[batch[0][0]:batch[-1][0] + 1].tolist()
+        return (
+            chunk_index,
+            [record["id"] for _, record in batch],
+            [None if record.get("vector") is False else vector for (_, record), vector in zip(batch, rows)],
+            [record["payload"] for _, record in batch],
+        )
+
+
+def point_id(doc_id: Any) -> Any:
+    """`doc_id` if Qdrant accepts it as a point id (unsigned int or UUID string), else a stable uuid5 of it."""
+    if isinstance(doc_id, int) and not isinstance(doc_id, bool) and doc_id >= 0:
+        return doc_id
+    if isinstance(doc_id, str):
+        try:
+            return str(uuid.UUID(doc_id))
+        except ValueError:
+            pass
+    return str(uuid.uuid5(MIGRATED_ID_NAMESPACE, str(doc_id)))
+
+
+def _prepare_batch(ids: list, vectors: list, payloads: list, remap_ids: bool, skip_missing_vectors: bool) -> tuple:
+    kept_ids, kept_vectors, kept_payloads, skipped = [], [], [], []
+    for doc_id, vector, payload in zip(ids, vectors, payloads):
+        if vector is None and skip_missing_vectors:
+            skipped.append(doc_id)
+            continue
+        if remap_ids:
+            new_id = point_id(doc_id)
+            if new_id != doc_id:
+                payload = {**payload, ORIGINAL_ID_KEY: doc_id}
+            doc_id = new_id
+        kept_ids.append(doc_id)
+        kept_vectors.append(vector)
+        kept_payloads.append(payload)
+    return kept_ids, kept_vectors, kept_payloads, skipped
+
+
+def export_snapshot(store, path: str, chunk_size: int = 10_000) -> dict:
+    """Stream every document of `store` into a snapshot at `path`, resuming a partial export."""
+    writer = SnapshotWriter(path)
+    if writer.complete:
+        print(f"Snapshot at {path} is already complete with {writer.manifest['count']} documents")
+        return writer.manifest
+
+    if writer.manifest["chunks"]:
+        print(f"Resuming export at chunk {len(writer.manifest['chunks'])} ({writer.manifest['count']} documents written)")
+
+    cursor = writer.cursor
+    while True:
+        documents, next_cursor = store.scroll_documents(limit=chunk_size, offset=cursor)
+        if documents:
+            writer.write_chunk(documents, cursor=next_cursor)
+        if next_cursor is None or not documents:
+            break
+        cursor = next_cursor
+
+    writer.finish()
+    print(f"Exported {writer.manifest['count']} documents to {path}")
+    return writer.manifest
+
+
+def import_snapshot(
+    store,
+    path: str,
+    batch_size: int = 1000,
+    checkpoint_path: Optional[str] = None,
+    remap_ids: bool = False,
+    skip_missing_vectors: bool = False,
+) -> int:
+    """Upsert every document of the snapshot at `path` into `store`, keeping the original ids.
+
+    Progress is checkpointed per chunk in `checkpoint_path` (by default next to the snapshot),
+    so an interrupted import restarts at the first unfinished chunk. Upserts by id make
+    replaying a partly imported chunk harmless. With `remap_ids`, ids a Qdrant point cannot
+    have are replaced by `point_id(id)` and kept in the payload under ORIGINAL_ID_KEY; with
+    `skip_missing_vectors`, documents without a vector are left out and their ids printed.
+    Returns the number of documents imported.
+    """
+    reader = SnapshotReader(path)
+    checkpoint_path = checkpoint_path or os.path.join(path, "import_checkpoint.json")
+    checkpoint = _read_json(checkpoint_path) or {"chunks_done": 0}
+    chunk_counts = [chunk["count"] for chunk in reader.manifest["chunks"]]
+    if checkpoint["chunks_done"]:
+        print(f"Resuming import at chunk {checkpoint['chunks_done']} of {len(chunk_counts)}")
+
+    imported = 0
+    skipped = []
+    current_chunk = None
+    for chunk_index, ids, vectors, payloads in reader.iter_batches(batch_size, start_chunk=checkpoint["chunks_done"]):
+        if current_chunk is not None and chunk_index != current_chunk:
+            _write_json_atomic(checkpoint_path, {"chunks_done": current_chunk + 1})
+        current_chunk = chunk_index
+        ids, vectors, payloads, batch_skipped = _prepare_batch(ids, vectors, payloads, remap_ids, skip_missing_vectors)
+        skipped.extend(batch_skipped)
+        if ids:
+            store.upsert_documents(ids, vectors, payloads)
+        imported += len(ids)
+
+    if current_chunk is not None:
+        _write_json_atomic(checkpoint_path, {"chunks_done": current_chunk + 1})
+
+    if skipped:
+        print(f"Skipped {len(skipped)} documents without a vector: {skipped[:10]}{' ...' if len(skipped) > 10 else ''}")
+    print(f"Imported {imported} documents from {path}")
+    return imported
+
+
+def migrate_vector_store(
+    source,
+    target,
+    path: str,
+    chunk_size: int = 10_000,
+    batch_size: int = 1000,
+    remap_ids: bool = True,
+    skip_missing_vectors: bool = True,
+) -> int:
+    """Copy all documents from `source` to `target` through a snapshot at `path`.
+
+    UUID and unsigned int ids are kept. By default any other id is mapped to `point_id(id)`
+    with the original in the payload, and documents without a vector are skipped and reported,
+    so the copy works for Qdrant targets too. Both halves resume from their checkpoints when
+    re-run after an interruption.
+    """
+    export_snapshot(source, path, chunk_size=chunk_size)
+    return import_snapshot(
+        target, path, batch_size=batch_size, remap_ids=remap_ids, skip_missing_vectors=skip_missing_vectors,
+    )
@@ -0,0 +1,166 @@
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+
+# Rows scored per step of a search, which bounds the temporary memory a search needs
+SCAN_ROWS = 65_536
+
+
+@dataclass(frozen=True)
+class _IndexState:
+    vectors: np.ndarray
+    norms: np.ndarray
+    searchable: np.ndarray
+    ids: list
+    size: int
+
+
+class VectorIndex:
+    """Append-only rows of vectors with a tombstone bitmap, searched in bounded-size blocks.
+
+    Deleting a row only clears its bit in `searchable`, so deletes never move data. Rows are
+    appended into preallocated capacity and every mutation publishes a new immutable state,
+    which lets searches run without locks against whatever state they started with.
+    Callers serialize writes themselves.
+
+    With `max_resident_bytes` set, a vector matrix that would outgrow it is moved to a
+    float32 memory-mapped file in `spill_dir` (deleted once mapped). The OS then keeps the
+    pages that searches touch most in memory and evicts the rest, and a search only ever
+    holds `SCAN_ROWS` rows of scores at a time.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, capacity: int = 64, max_resident_bytes: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.dimension = dimension
+        self.dead = 0
+        self.max_resident_bytes = max_resident_bytes
+        self.spill_dir = spill_dir
+        self._state = self._allocate(capacity, dimension or 0)
+
+    @property
+    def mapped(self) -> bool:
+        return isinstance(self._state.vectors, np.memmap)
+
+    def _new_matrix(self, capacity: int, dimension: int) -> np.ndarray:
+        resident_bytes = capacity * dimension * np.dtype(np.float64).itemsize
+        if self.max_resident_bytes is None or resident_bytes <= self.max_resident_bytes:
+            return np.zeros((capacity, dimension), dtype=np.float64)
+
+        fd, path = tempfile.mkstemp(suffix=".vectors", dir=self.spill_dir)
+        os.close(fd)
+        matrix = np.memmap(path, dtype=np.float32, mode="w+", shape=(capacity, dimension))
+        try:
+            # The mapping keeps the data reachable; unlinking fails on Windows while mapped
+            os.remove(path)
+        except OSError:
+            pass
+        return matrix
+
+    def _allocate(self, capacity: int, dimension: int, previous: Optional[_IndexState] = None) -> _IndexState:
+        vectors = self._new_matrix(capacity, dimension)
+        norms = np.zeros(capacity, dtype=np.float64)
+        searchable = np.zeros(capacity, dtype=bool)
+        ids, size = [], 0
+        if previous is not None:
+            size = previous.size
+            # Rows added before the dimension was known have no vector, so they stay zero
+            if previous.vectors.shape[1] == dimension:
+                for start in range(0, size, SCAN_ROWS):
+                    stop = min(start + SCAN_ROWS, size)
+                    vectors[start:stop] = previous.vectors[start:stop]
+            norms[:size] = previous.norms[:size]
+            searchable[:size] = previous.searchable[:size]
+            ids = previous.ids
+        return _IndexState(vectors, norms, searchable, ids, size)
+
+    def __len__(self) -> int:
+        return self._state.size
+
+    @property
+    def dead_fraction(self) -> float:
+        return self.dead / len(self) if len(self) else 0.0
+
+    def append(self, ids: List[Any], vectors: List[Optional[List[float]]]) -> List[int]:
+        """Add rows and return their row numbers. Rows without a vector are never searchable."""
+        for vector in vectors:
+            if vector is not None:
+                if self.dimension is None:
+                    self.dimension = len(vector)
+                    self._state = self._allocate(len(self._state.norms), self.dimension, self._state)
+                elif len(vector) != self.dimension:
+                    raise ValueError(f"Vector dimension {len(vector)} does not match index dimension {self.dimension}")
+
+        state = self._state
+        needed = state.size + len(ids)
+        if needed > len(state.norms):
+            state = self._allocate(max(needed, 2 * len(state.norms)), self.dimension or 0, state)
+
+        start = state.size
+        for row, (doc_id, vector) in enumerate(zip(ids, vectors), start=start):
+            if vector is not None:
+                state.vectors[row] = vector
+                state.norms[row] = np.linalg.norm(state.vectors[row])
+                state.searchable[row] = True
+            state.ids.append(doc_id)
+
+        # Readers of the previous state only look at rows below its size, so they are unaffected
+        self._state = _IndexState(state.vectors, state.norms, state.searchable, state.ids, needed)
+        return list(range(start, needed))
+
+    def delete(self, rows: List[int]):
+        """Tombstone rows; they stay in place until the owner compacts."""
+        state = self._state
+        for row in rows:
+            if row < state.size and state.ids[row] is not None:
+                state.searchable[row] = False
+                state.ids[row] = None
+                self.dead += 1
+
+    def search(self, query_vector: List[float], top_k: int = 5) -> List[Tuple[Any, float]]:
+        """Return (id, cosine similarity) of the best `top_k` live rows."""
+        state = self._state
+        if state.size == 0 or self.dimension is None or top_k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float64)
+        query_norm = np.linalg.norm(query)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0)
+
+        for start in range(0, state.size, SCAN_ROWS):
+            stop = min(start + SCAN_ROWS, state.size)
+            searchable = state.searchable[start:stop]
+            if not searchable.any():
+                continue
+
+            norms = state.norms[start:stop] * query_norm
+            scores = np.divide(state.vectors[start:stop] @ query, norms, out=np.zeros(stop - start), where=norms > 0)
+            scores[~searchable] = -np.inf
+
+            # Keep a running top_k across blocks instead of scores for every row
+            rows = np.concatenate([best_rows, np.arange(start, stop)])
+            scores = np.concatenate([best_scores, scores])
+            if len(scores) > top_k:
+                keep = np.argpartition(-scores, top_k - 1)[:top_k]
+                rows, scores = rows[keep], scores[keep]
+            best_rows, best_scores = rows, scores
+
+        order = np.argsort(-best_scores, kind='stable')
+        return [
+            (state.ids[row], float(score))
+            for row, score in zip(best_rows[order], best_scores[order])
+            if score != -np.inf and state.ids[row] is not None
+        ]
+
+    def memory_usage(self) -> dict:
+        """Bytes of the index held in RAM, and bytes of vectors served from the mapped file."""
+        state = self._state
+        matrix_bytes = state.vectors.nbytes
+        return {
+            "vectors_resident": 0 if self.mapped else matrix_bytes,
+            "vectors_mapped": matrix_bytes if self.mapped else 0,
+            "index": state.norms.nbytes + state.searchable.nbytes + 8 * len(state.ids),
+        }
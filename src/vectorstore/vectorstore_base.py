@@ -1,3 +1,5 @@
+from . import snapshot
+
 
 class VectorStoreBase:
     """Base class for vector stores."""
@@ -13,4 +15,20 @@ class VectorStoreBase:
 
     def delete_vectors(self, ids):
         raise NotImplementedError("delete_vectors method not implemented.")
-    
\ No newline at end of file
+
+    def scroll_documents(self, limit=1000, offset=None):
+        """Return (documents, next_offset) for one page; next_offset is None after the last page."""
+        raise NotImplementedError("scroll_documents method not implemented.")
+
+    def upsert_documents(self, ids, vectors, payloads):
+        """Insert or overwrite documents under the given ids."""
+        raise NotImplementedError("upsert_documents method not implemented.")
+
+    def export_snapshot(self, path, chunk_size=10_000):
+        return snapshot.export_snapshot(self, path, chunk_size=chunk_size)
+
+    def import_snapshot(self, path, batch_size=1000, checkpoint_path=None, remap_ids=False, skip_missing_vectors=False):
+        return snapshot.import_snapshot(
+            self, path, batch_size=batch_size, checkpoint_path=checkpoint_path,
+            remap_ids=remap_ids, skip_missing_vectors=skip_missing_vectors,
+        )
@@ -1,8 +1,84 @@
 """pytest configuration file."""
 import sys
 import os
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
 
 # Add the scripts directory to Python path for testing
 scripts_path = os.path.join(os.path.dirname(__file__), '..', 'scripts')
 if scripts_path not in sys.path:
-    sys.path.insert(0, scripts_path)
\ No newline at end of file
+    sys.path.insert(0, scripts_path)
+
+
+SAMPLE_RECEIPT = {
+    "platform": "GoFood",
+    "transaction_id": "F-0000000001",
+    "customer_name": "Test Customer",
+    "date": "2025-01-15",
+    "time": "12:30",
+    "restaurant": {"name": "Warung Test", "location": "Jl. Sudirman No. 1, Jakarta"},
+    "delivery": {"address": "Jl. Thamrin No. 2, Jakarta", "fee": 10000},
+    "items": [
+        {"name": "Nasi Goreng", "quantity": 2, "unit_price": 25000, "total_price": 50000, "notes": "extra cheese"},
+        {"name": "Es Teh", "quantity": 1, "unit_price": 5000, "total_price": 5000, "notes": None},
+    ],
+    "payment": {"subtotal": 55000, "delivery_fee": 10000, "service_fee": 2000, "discount": 0, "total": 67000, "method": "GoPay"},
+}
+
+
+CUSTOMERS_CSV_HEADER = "Index,Customer Id,First Name,Last Name,Company,City,Country,Phone 1,Phone 2,Email,Subscription Date,Website\n"
+
+
+def write_customers_csv(path, count: int, countries=("Congo", "Korea", "Chile")):
+    """Write a customers CSV in the layout of data/customers-*.csv."""
+    with open(path, "w") as f:
+        f.write(CUSTOMERS_CSV_HEADER)
+        for i in range(count):
+            f.write(
+                f'{i + 1},id{i},Name{i % 7},Last{i % 5},"Company {i % 40}, Ltd",City{i % 13},{countries[i % len(countries)]},'
+                f'555-{i},555-{i},user{i}@example.com,2021-{i % 12 + 1:02d}-01,https://example.com/{i}\n'
+            )
+
+
+class FakeOpenAIClient:
+    """Minimal stand-in for `openai.OpenAI` that answers chat completions with a canned receipt."""
+
+    def __init__(self, receipt: dict = None, failures: int = 0):
+        self.receipt = receipt or SAMPLE_RECEIPT
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise RuntimeError("simulated upstream failure")
+        content = json.dumps(self.receipt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def sample_receipt() -> dict:
+    return json.loads(json.dumps(SAMPLE_RECEIPT))
+
+
+@pytest.fixture
+def fake_openai_client() -> FakeOpenAIClient:
+    return FakeOpenAIClient()
+
+
+@pytest.fixture
+def customers_csv_writer():
+    return write_customers_csv
+
+
+@pytest.fixture
+def customers_csv(tmp_path) -> str:
+    path = tmp_path / "customers-100.csv"
+    write_customers_csv(path, 100)
+    return str(path)
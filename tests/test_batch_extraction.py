@@ -0,0 +1,117 @@
+import os
+import json
+
+from PIL import Image
+
+from src.database.local_database import ReceiptDatabase
+from src.extraction import batch
+from src.extraction.batch import BatchReceiptExtractor, BatchState, find_receipt_files
+from src.extraction.cache import ExtractionCache
+from tests.conftest import FakeOpenAIClient, SAMPLE_RECEIPT
+
+
+def write_receipt_images(directory, count: int):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"receipt_{i}.png")
+        Image.new("RGB", (64, 96), color=(255, 255, i)).save(path)
+        paths.append(path)
+    return paths
+
+
+class FakeReceiptClient(FakeOpenAIClient):
+    """Returns a receipt with a unique transaction id per call."""
+
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        receipt = dict(SAMPLE_RECEIPT, transaction_id=f"F-{self.calls:010d}")
+        response.choices[0].message.content = json.dumps(receipt)
+        return response
+
+
+class TestBatchReceiptExtractor:
+
+    def test_find_receipt_files(self, tmp_path):
+        write_receipt_images(tmp_path, 2)
+        (tmp_path / "notes.txt").write_text("not a receipt")
+
+        paths = find_receipt_files(str(tmp_path))
+
+        assert [os.path.basename(p) for p in paths] == ["receipt_0.png", "receipt_1.png"]
+
+    def test_run_stores_receipts(self, tmp_path):
+        paths = write_receipt_images(tmp_path, 5)
+        database = ReceiptDatabase(db_path=str(tmp_path / "receipts.db"))
+        extractor = BatchReceiptExtractor(FakeReceiptClient(), database=database, max_workers=3, db_batch_size=2)
+
+        report = extractor.run(paths)
+
+        assert report.succeeded == 5
+        assert report.failed == 0
+        assert report.throughput > 0
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"] == 5
+        assert report.receipts == []
+        database.close()
+
+    def test_cache_hits_skip_preprocessing(self, tmp_path, monkeypatch):
+        [path] = write_receipt_images(tmp_path, 1)
+        with open(path, "rb") as f:
+            data = f.read()
+        preprocessed = []
+        preprocess = batch.preprocess_receipt_image
+        monkeypatch.setattr(batch, "preprocess_receipt_image", lambda image: preprocessed.append(image) or preprocess(image))
+        client = FakeReceiptClient()
+        cache = ExtractionCache(db_path=str(tmp_path / "cache.db"))
+        extractor = BatchReceiptExtractor(client, cache=cache)
+
+        first = extractor.extract_bytes(data)
+        second = extractor.extract_bytes(data)
+
+        assert first == second
+        assert client.calls == 1
+        assert len(preprocessed) == 1
+        assert cache.get(cache.make_key(data)) is not None
+        cache.close()
+
+    def test_run_streams_or_collects_receipts(self, tmp_path):
+        paths = write_receipt_images(tmp_path, 3)
+        streamed = []
+
+        streaming = BatchReceiptExtractor(FakeReceiptClient()).run(paths, on_receipt=lambda path, receipt: streamed.append(path))
+        collecting = BatchReceiptExtractor(FakeReceiptClient()).run(paths, collect_receipts=True)
+
+        assert sorted(streamed) == paths and streaming.receipts == []
+        assert len(collecting.receipts) == 3
+
+    def test_retries_failed_requests(self, tmp_path):
+        paths = write_receipt_images(tmp_path, 1)
+        client = FakeOpenAIClient(failures=2)
+        extractor = BatchReceiptExtractor(client, max_retries=3, retry_wait=0)
+
+        report = extractor.run(paths)
+
+        assert report.succeeded == 1
+        assert client.calls == 3
+
+    def test_failure_after_retries(self, tmp_path):
+        paths = write_receipt_images(tmp_path, 1)
+        extractor = BatchReceiptExtractor(FakeOpenAIClient(failures=10), max_retries=2, retry_wait=0)
+
+        report = extractor.run(paths)
+
+        assert report.failed == 1
+        assert "simulated upstream failure" in report.errors[paths[0]]
+
+    def test_resume_skips_completed_files(self, tmp_path):
+        paths = write_receipt_images(tmp_path, 4)
+        state_path = str(tmp_path / "state.jsonl")
+
+        first = BatchReceiptExtractor(FakeReceiptClient(), state_path=state_path).run(paths[:3])
+        client = FakeReceiptClient()
+        second = BatchReceiptExtractor(client, state_path=state_path).run(paths)
+
+        assert first.succeeded == 3
+        assert second.skipped == 3
+        assert second.succeeded == 1
+        assert client.calls == 1
+        assert len(BatchState(state_path).completed) == 4
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from src.embeddings.batching_embedder import MicroBatchingEmbedder
+from src.embeddings.embedder_base import EmbeddingBaseModel
+
+
+class RecordingEmbedder(EmbeddingBaseModel):
+    """Embeds a text as [len(text), index of its first letter], recording each upstream batch."""
+
+    def __init__(self, latency: float = 0.0, fail: bool = False, drop: bool = False):
+        super().__init__("recording", 2)
+        self.latency = latency
+        self.fail = fail
+        self.drop = drop
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def embed_texts(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        if self.drop:
+            return []
+        return [[float(len(text)), float(ord(text[0]) - ord("a"))] for text in texts]
+
+    def embed_query(self, query):
+        return self.embed_texts([query])[0]
+
+
+def call_concurrently(fn, arguments):
+    results = [None] * len(arguments)
+
+    def run(i):
+        results[i] = fn(arguments[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(arguments))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestMicroBatchingEmbedder:
+
+    def test_concurrent_queries_share_upstream_batches(self):
+        upstream = RecordingEmbedder(latency=0.05)
+        embedder = MicroBatchingEmbedder(upstream, window=0.05, max_batch_size=8)
+        queries = [chr(ord("a") + i % 26) * (i + 1) for i in range(32)]
+
+        results = call_concurrently(embedder.embed_query, queries)
+        embedder.close()
+        batches = list(upstream.batches)
+
+        assert results == [upstream.embed_query(query) for query in queries]
+        assert len(batches) <= 8
+        assert all(len(batch) <= 8 for batch in batches)
+        stats = embedder.stats()
+        assert stats["requests"] == 32 and stats["texts"] == 32
+        assert stats["batches"] <= 8
+        assert 0 < stats["mean_fill"] <= 1
+
+    def test_texts_calls_are_batched_whole_and_large_ones_pass_through(self):
+        upstream = RecordingEmbedder()
+        embedder = MicroBatchingEmbedder(upstream, window=0.05, max_batch_size=4)
+
+        results = call_concurrently(embedder.embed_texts, [["ab", "c"], ["def", "g"], ["hijkl"] * 5])
+        embedder.close()
+
+        assert results[0] == [[2.0, 0.0], [1.0, 2.0]]
+        assert results[1] == [[3.0, 3.0], [1.0, 6.0]]
+        assert len(results[2]) == 5
+        assert ["hijkl"] * 5 in upstream.batches
+        assert embedder.stats()["requests"] == 2
+
+    def test_lone_call_waits_about_one_window(self):
+        embedder = MicroBatchingEmbedder(RecordingEmbedder(), window=0.02)
+
+        start = time.perf_counter()
+        embedder.embed_query("alone")
+        elapsed = time.perf_counter() - start
+        embedder.close()
+
+        assert 0.015 <= elapsed < 0.2
+        assert embedder.stats()["max_wait_ms"] < 200
+
+    def test_upstream_errors_reach_every_caller(self):
+        embedder = MicroBatchingEmbedder(RecordingEmbedder(fail=True), window=0.01)
+
+        with pytest.raises(RuntimeError, match="upstream unavailable"):
+            embedder.embed_query("a")
+        embedder.close()
+        with pytest.raises(RuntimeError, match="closed"):
+            embedder.embed_query("a")
+
+    def test_short_upstream_response_fails_every_caller(self):
+        embedder = MicroBatchingEmbedder(RecordingEmbedder(drop=True), window=0.05)
+
+        results = call_concurrently(lambda query: pytest.raises(ValueError, embedder.embed_query, query), ["a", "b"])
+        embedder.close()
+
+        assert all("0 vectors for" in str(result.value) for result in results)
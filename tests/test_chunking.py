@@ -0,0 +1,93 @@
+import threading
+import zlib
+
+import numpy as np
+
+from src.embeddings.embedder_base import EmbeddingBaseModel
+from src.models.document import Document
+from src.retriever.chunking import TextChunker, embed_in_batches
+from src.retriever.vector_search import VectorSearchRetriever
+from src.vectorstore.custom_vectordb import CustomVectorDB
+
+
+class HashingEmbedder(EmbeddingBaseModel):
+    """Bag-of-words vectors, so texts sharing words are similar. Records each batch it embeds."""
+
+    def __init__(self, vector_size: int = 256):
+        super().__init__("hashing", vector_size)
+        self.batches = []
+        self.threads = set()
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.vector_size)
+        for word in text.lower().split():
+            vector[zlib.crc32(word.strip(".,").encode()) % self.vector_size] += 1
+        return vector.tolist()
+
+    def embed_texts(self, texts):
+        self.batches.append(len(texts))
+        self.threads.add(threading.get_ident())
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, query):
+        return self._embed(query)
+
+
+def words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+class TestTextChunker:
+
+    def test_chunks_respect_limit_and_overlap(self):
+        chunker = TextChunker(max_tokens=50, overlap_tokens=10, encoding_name=None)
+        text = words("w", 400)
+
+        chunks = chunker.split(text)
+
+        assert len(chunks) > 1
+        assert all(chunker.count_tokens(chunk) <= 50 for chunk in chunks)
+        for previous, current in zip(chunks, chunks[1:]):
+            assert previous.split()[-1] in current.split()[:10]
+        assert chunks[0].startswith("w0 ") and chunks[-1].endswith("w399")
+
+    def test_short_text_is_one_chunk(self):
+        chunker = TextChunker(max_tokens=50, overlap_tokens=10, encoding_name=None)
+        assert chunker.split("a short receipt note") == ["a short receipt note"]
+        assert chunker.split("   ") == []
+
+    def test_embeds_batches_in_parallel_and_in_order(self):
+        chunker = TextChunker(encoding_name=None)
+        embedder = HashingEmbedder()
+        texts = [f"text {i}" for i in range(100)]
+
+        vectors = embed_in_batches(embedder, texts, chunker, batch_size=8, max_workers=4)
+
+        assert sorted(embedder.batches) == [4] + [8] * 12
+        assert vectors == [embedder._embed(text) for text in texts]
+
+
+class TestChunkedRetrieval:
+
+    def test_chunk_hits_collapse_to_parents(self, tmp_path):
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"))
+        retriever = VectorSearchRetriever(store, HashingEmbedder(), chunker=TextChunker(max_tokens=40, overlap_tokens=5, encoding_name=None))
+
+        long_text = words("filler", 200) + " nasi goreng special " + words("more", 200)
+        results = retriever.add_documents([
+            Document(id="long", payload={"content": long_text, "source": "menu.pdf"}, vector=[]),
+            Document(id="short", payload={"content": "es teh manis"}, vector=[]),
+        ])
+
+        assert results[0]["chunks"] > 5 and results[1]["chunks"] == 1
+        stored = store.list_all_documents()
+        assert {doc["payload"]["parent_id"] for doc in stored} == {"long", "short"}
+        assert all(doc["payload"]["source"] == "menu.pdf" for doc in stored if doc["payload"]["parent_id"] == "long")
+
+        [best, *rest] = retriever.retrieve("nasi goreng special", top_k=2)
+        assert best["id"] == "long"
+        assert best["payload"] == {"source": "menu.pdf"}
+        assert "nasi goreng special" in best["chunks"][0]["content"]
+        # Several chunks of the long document matched, but it is returned once
+        assert len(best["chunks"]) > 1
+        assert "long" not in [parent["id"] for parent in rest]
@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from src.analytics.aggregation import (
+    GroupCount,
+    MonthlyCounts,
+    ValueCounts,
+    aggregate_chunks,
+    aggregate_file,
+)
+from src.analytics.customers import iter_customer_chunks, load_customers
+
+
+@pytest.fixture
+def customers_csv(tmp_path, customers_csv_writer) -> str:
+    path = tmp_path / "customers-1000.csv"
+    customers_csv_writer(path, 1000)
+    return str(path)
+
+
+def expected_results(csv_path: str) -> dict:
+    df = pd.read_csv(csv_path, parse_dates=["Subscription Date"])
+    monthly = df.groupby(df["Subscription Date"].dt.to_period("M")).size()
+    monthly.index = monthly.index.to_timestamp()
+    return {
+        "Country counts": df["Country"].value_counts(),
+        "Company counts": df["Company"].value_counts(),
+        "City counts": df["City"].value_counts(),
+        "Subscription Date by month": monthly,
+        "Company by Country": df.groupby("Country")["Company"].count(),
+    }
+
+
+def assert_matches(results: dict, expected: dict):
+    assert set(results) == set(expected)
+    for name, series in expected.items():
+        assert results[name].sort_index().to_dict() == series.sort_index().to_dict(), name
+
+
+class TestAggregationEngine:
+
+    @pytest.mark.parametrize("partition_bytes", [1 << 20, 4096, 997])
+    def test_csv_partitions_match_pandas(self, customers_csv, partition_bytes):
+        # Small partitions and blocks put range boundaries mid-line and on line starts
+        results = aggregate_file(customers_csv, max_workers=1, partition_bytes=partition_bytes, block_bytes=512)
+
+        assert_matches(results, expected_results(customers_csv))
+        assert results["Country counts"].is_monotonic_decreasing
+
+    def test_process_pool(self, customers_csv):
+        results = aggregate_file(customers_csv, max_workers=2, partition_bytes=8192)
+
+        assert_matches(results, expected_results(customers_csv))
+
+    def test_parquet_cache_and_chunks(self, customers_csv, tmp_path):
+        load_customers(customers_csv, cache_dir=str(tmp_path / "cache"), chunksize=100)
+        parquet_path = next((tmp_path / "cache").glob("*.parquet"))
+
+        from_parquet = aggregate_file(str(parquet_path), max_workers=1, partition_bytes=1)
+        from_chunks = aggregate_chunks(iter_customer_chunks(customers_csv, chunksize=64))
+
+        expected = expected_results(customers_csv)
+        assert_matches(from_parquet, expected)
+        assert_matches(from_chunks, expected)
+
+    def test_declarative_aggregations(self, customers_csv):
+        aggregations = [ValueCounts("Country", name="countries"), GroupCount(["Country", "City"]), MonthlyCounts("Subscription Date")]
+
+        results = aggregate_file(customers_csv, aggregations, max_workers=1, partition_bytes=4096)
+
+        df = pd.read_csv(customers_csv)
+        assert list(results) == ["countries", "rows by Country x City", "Subscription Date by month"]
+        assert results["rows by Country x City"].sort_index().to_dict() == df.groupby(["Country", "City"]).size().to_dict()
+        assert results["Subscription Date by month"].index.is_monotonic_increasing
+
+    def test_unknown_column(self, customers_csv):
+        with pytest.raises(ValueError):
+            aggregate_file(customers_csv, [ValueCounts("Region")], max_workers=1)
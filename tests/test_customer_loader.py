@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+from src.analytics.customers import load_customers, customers_cache_path, iter_customer_chunks
+
+
+class TestCustomerLoader:
+
+    def test_chunks_are_typed_and_pruned(self, customers_csv):
+        chunks = list(iter_customer_chunks(customers_csv, columns=["Country", "Subscription Date"], chunksize=30))
+
+        assert [len(chunk) for chunk in chunks] == [30, 30, 30, 10]
+        assert list(chunks[0].columns) == ["Country", "Subscription Date"]
+        assert isinstance(chunks[0]["Country"].dtype, pd.CategoricalDtype)
+        assert pd.api.types.is_datetime64_any_dtype(chunks[0]["Subscription Date"])
+
+    def test_matches_unoptimized_read(self, customers_csv, tmp_path):
+        expected = pd.read_csv(customers_csv)
+
+        for cache_dir in [None, str(tmp_path / "cache")]:
+            customers = load_customers(customers_csv, cache_dir=cache_dir, chunksize=30)
+
+            assert len(customers) == 100
+            assert "Customer Id" not in customers.columns
+            assert isinstance(customers["First Name"].dtype, pd.CategoricalDtype)
+            assert customers["Country"].astype(str).tolist() == expected["Country"].tolist()
+            assert customers["Subscription Date"].dt.strftime("%Y-%m-%d").tolist() == expected["Subscription Date"].tolist()
+
+    def test_second_load_reads_parquet_cache(self, customers_csv, tmp_path, monkeypatch):
+        cache_dir = str(tmp_path / "cache")
+        first = load_customers(customers_csv, cache_dir=cache_dir, chunksize=30)
+        assert os.path.exists(customers_cache_path(customers_csv, cache_dir=cache_dir))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("CSV should not be parsed again")
+
+        monkeypatch.setattr(pd, "read_csv", fail)
+        second = load_customers(customers_csv, cache_dir=cache_dir)
+
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_cache_is_rebuilt_when_csv_changes(self, customers_csv, customers_csv_writer, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        load_customers(customers_csv, cache_dir=cache_dir)
+
+        load_customers(customers_csv, columns=["Country"], cache_dir=cache_dir)
+        first_cache = customers_cache_path(customers_csv, cache_dir=cache_dir)
+
+        customers_csv_writer(customers_csv, 150, countries=("Peru",))
+        customers = load_customers(customers_csv, cache_dir=cache_dir)
+
+        assert len(customers) == 150
+        assert customers["Country"].cat.categories.tolist() == ["Peru"]
+        # The stale cache for the same columns is removed, other column selections are left alone
+        assert not os.path.exists(first_cache)
+        assert len(os.listdir(cache_dir)) == 2
+
+    def test_cache_handles_later_chunks_with_more_categories(self, customers_csv, customers_csv_writer, tmp_path):
+        # 200 countries in the second chunk need wider dictionary indices than the first chunk's one
+        countries = ("Chile",) * 200 + tuple(f"Country {i}" for i in range(200))
+        customers_csv_writer(customers_csv, 400, countries=countries)
+
+        customers = load_customers(customers_csv, cache_dir=str(tmp_path / "cache"), chunksize=200)
+
+        assert customers["Country"].tolist() == list(countries)
+        assert len(customers["Country"].cat.categories) == 201
@@ -0,0 +1,53 @@
+from src.extraction.cache import ExtractionCache, extract_receipt_info_cached
+from src.models.receipt import Receipt
+from tests.conftest import FakeOpenAIClient
+
+
+class TestExtractionCache:
+
+    def test_duplicate_receipt_served_from_cache(self, tmp_path, fake_openai_client):
+        cache = ExtractionCache(db_path=str(tmp_path / "cache.db"))
+
+        first = extract_receipt_info_cached(fake_openai_client, b"receipt image", cache)
+        second = extract_receipt_info_cached(fake_openai_client, b"receipt image", cache)
+
+        assert isinstance(second, Receipt)
+        assert second.to_dict() == first.to_dict()
+        assert fake_openai_client.calls == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_cache_persists_across_instances(self, tmp_path, fake_openai_client):
+        db_path = str(tmp_path / "cache.db")
+        extract_receipt_info_cached(fake_openai_client, "pdf text", ExtractionCache(db_path=db_path))
+
+        cached = ExtractionCache(db_path=db_path).get(ExtractionCache.make_key("pdf text"))
+
+        assert cached is not None
+        assert cached[0].transaction_id == "F-0000000001"
+        assert "F-0000000001" in cached[1]
+
+    def test_key_depends_on_model_and_content(self):
+        assert ExtractionCache.make_key(b"a") != ExtractionCache.make_key(b"b")
+        assert ExtractionCache.make_key(b"a") != ExtractionCache.make_key(b"a", model="other-model")
+        assert ExtractionCache.make_key(b"a") != ExtractionCache.make_key("a")
+
+    def test_failures_are_not_cached(self, tmp_path):
+        cache = ExtractionCache(db_path=str(tmp_path / "cache.db"))
+        client = FakeOpenAIClient(failures=1)
+
+        result = extract_receipt_info_cached(client, b"receipt", cache)
+
+        assert "error" in result
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path, fake_openai_client):
+        cache = ExtractionCache(db_path=str(tmp_path / "cache.db"), max_entries=2)
+
+        for data in [b"one", b"two"]:
+            extract_receipt_info_cached(fake_openai_client, data, cache)
+        cache.get(cache.make_key(b"one"))
+        extract_receipt_info_cached(fake_openai_client, b"three", cache)
+
+        assert cache.stats()["entries"] == 2
+        assert cache.get(cache.make_key(b"two")) is None
+        assert cache.get(cache.make_key(b"one")) is not None
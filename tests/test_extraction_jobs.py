@@ -0,0 +1,81 @@
+import io
+import time
+
+from PIL import Image
+
+from src.database.local_database import ReceiptDatabase
+from src.extraction.batch import BatchReceiptExtractor
+from src.extraction.jobs import ExtractionJobQueue
+from tests.test_batch_extraction import FakeReceiptClient
+
+
+class SlowReceiptClient(FakeReceiptClient):
+    """Takes `delay` seconds per request, like the vision model."""
+
+    def __init__(self, delay: float, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+
+    def create(self, **kwargs):
+        time.sleep(self.delay)
+        return super().create(**kwargs)
+
+
+def receipt_image(shade: int = 0) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 96), color=(255, 255, shade)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestExtractionJobQueue:
+
+    def test_submit_returns_immediately_and_runs_concurrently(self):
+        queue = ExtractionJobQueue(BatchReceiptExtractor(SlowReceiptClient(delay=0.3)), max_workers=4)
+
+        start = time.perf_counter()
+        job_ids = [queue.submit(f"receipt_{i}.png", receipt_image(i)) for i in range(4)]
+        submitted = time.perf_counter() - start
+        jobs = queue.wait(job_ids, timeout=10)
+        finished = time.perf_counter() - start
+        queue.shutdown()
+
+        assert submitted < 0.1
+        assert finished < 1.0
+        assert [job.status for job in jobs] == ["done"] * 4
+        assert [job.name for job in jobs] == [f"receipt_{i}.png" for i in range(4)]
+        assert len({job.receipt.transaction_id for job in jobs}) == 4
+
+    def test_status_polling_and_failures(self):
+        queue = ExtractionJobQueue(BatchReceiptExtractor(SlowReceiptClient(delay=0.2), max_retries=1), max_workers=1)
+
+        first = queue.submit("receipt.png", receipt_image())
+        empty = queue.submit("empty.png", b"")
+
+        assert queue.get(first).status in ("queued", "running")
+        assert queue.get(empty).status == "queued"
+        queue.wait()
+        assert queue.get(first).status == "done"
+        assert queue.get(empty).status == "failed" and queue.get(empty).error == "file is empty"
+        assert queue.get("unknown") is None
+        assert queue.stats() == {"queued": 0, "running": 0, "done": 1, "failed": 1, "stored": 0}
+        queue.shutdown()
+
+    def test_store_hands_receipts_to_database_once(self, tmp_path):
+        database = ReceiptDatabase(db_path=str(tmp_path / "receipts.db"))
+        extractor = BatchReceiptExtractor(FakeReceiptClient())
+        queue = ExtractionJobQueue(extractor, database=database)
+        job_id = queue.submit("receipt.png", receipt_image())
+        queue.wait([job_id])
+
+        assert queue.store(job_id)
+        assert not queue.store(job_id)
+        assert queue.get(job_id).stored
+
+        auto_queue = ExtractionJobQueue(extractor, database=database, auto_store=True)
+        auto_job = auto_queue.wait([auto_queue.submit("other.png", receipt_image(1))])[0]
+        assert auto_job.stored
+
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"] == 2
+        queue.shutdown()
+        auto_queue.shutdown()
+        database.close()
@@ -0,0 +1,67 @@
+import io
+
+from PIL import Image
+
+from src.utils import detect_image_mime_type
+from src.extraction.image import preprocess_receipt_image, find_receipt_bbox
+
+
+def make_receipt_photo(size=(3000, 4000), orientation=None) -> bytes:
+    """Dark table with a white receipt in the middle, saved as a phone-style JPEG."""
+    image = Image.new("RGB", size, color=(40, 30, 20))
+    width, height = size
+    image.paste((250, 250, 245), (width // 4, height // 8, 3 * width // 4, 7 * height // 8))
+
+    exif = Image.Exif()
+    if orientation is not None:
+        exif[0x0112] = orientation
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95, exif=exif)
+    return buffer.getvalue()
+
+
+class TestImagePreprocessing:
+
+    def test_reduces_bytes_and_pixels(self):
+        data = make_receipt_photo()
+
+        result = preprocess_receipt_image(data, max_long_edge=1600)
+
+        assert len(result.data) < len(data)
+        assert max(result.size) <= 1600
+        assert result.byte_reduction > 0
+        assert result.pixel_reduction > 0
+        assert detect_image_mime_type(result.data) == "image/jpeg"
+        assert "smaller" in result.summary()
+
+    def test_crops_to_receipt_region(self):
+        image = Image.open(io.BytesIO(make_receipt_photo(size=(400, 800))))
+
+        left, top, right, bottom = find_receipt_bbox(image)
+
+        assert abs(left - 100) < 20 and abs(right - 300) < 20
+        assert abs(top - 100) < 30 and abs(bottom - 700) < 30
+
+    def test_applies_exif_rotation(self):
+        # Orientation 6 means the camera was rotated 90 degrees, so portrait content was stored landscape
+        data = make_receipt_photo(size=(800, 400), orientation=6)
+
+        result = preprocess_receipt_image(data, crop=False)
+
+        assert result.size[1] > result.size[0]
+
+    def test_image_format(self):
+        result = preprocess_receipt_image(make_receipt_photo(size=(400, 800)), image_format="WEBP")
+
+        assert detect_image_mime_type(result.data) == "image/webp"
+
+    def test_keeps_original_when_nothing_to_gain(self):
+        buffer = io.BytesIO()
+        Image.new("L", (32, 32), color=255).save(buffer, format="PNG")
+        data = buffer.getvalue()
+
+        result = preprocess_receipt_image(data)
+
+        assert result.data == data
+        assert detect_image_mime_type(result.data) == "image/png"
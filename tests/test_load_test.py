@@ -0,0 +1,46 @@
+import threading
+import time
+
+from src.load_test import LevelResult, LoadTarget, OperationStats, TimedLock, find_saturation, run_ramp
+
+
+def level(concurrency: int, completed: int) -> LevelResult:
+    return LevelResult(concurrency, 1.0, {"retrieve": OperationStats(latencies=[0.01] * completed)})
+
+
+class TestLoadTest:
+
+    def test_ramp_runs_every_operation_offline(self, tmp_path):
+        target = LoadTarget(str(tmp_path), documents=20, receipts=20)
+        try:
+            results = run_ramp(target, levels=[1, 2], duration=0.5)
+        finally:
+            target.close()
+
+        assert [result.concurrency for result in results] == [1, 2]
+        for result in results:
+            assert result.error_rate == 0.0
+            assert result.throughput > 0
+            assert set(result.locks) == {"vectordb", "query_cache", "db_generation"}
+        assert all(stats.count > 0 for stats in results[-1].operations.values())
+
+    def test_timed_lock_records_contention(self):
+        lock = TimedLock(threading.Lock(), "test")
+        lock.acquire()
+        waiter = threading.Thread(target=lambda: (lock.acquire(), lock.release()))
+        waiter.start()
+        time.sleep(0.05)
+        lock.release()
+        waiter.join()
+
+        stats = lock.stats()
+        assert stats["acquisitions"] == 2
+        assert stats["contended"] == 1
+        assert stats["max_wait"] >= 0.04
+        assert lock.acquire(blocking=False)
+        assert not lock.acquire(blocking=False)
+        lock.release()
+
+    def test_saturation_is_where_throughput_stops_growing(self):
+        assert find_saturation([level(1, 100), level(2, 190), level(4, 360), level(8, 370)]) == 4
+        assert find_saturation([level(1, 100), level(4, 390)]) is None
@@ -0,0 +1,229 @@
+import copy
+import threading
+
+import pytest
+
+from src.database.local_database import ReceiptDatabase
+from src.models.receipt import Receipt
+
+
+def make_receipts(sample_receipt: dict, count: int) -> list[Receipt]:
+    receipts = []
+    for i in range(count):
+        data = copy.deepcopy(sample_receipt)
+        data["transaction_id"] = f"F-{i:010d}"
+        receipts.append(Receipt.from_dict(data))
+    return receipts
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = ReceiptDatabase(db_path=str(tmp_path / "receipts.db"))
+    yield database
+    database.close()
+
+
+class TestReceiptDatabase:
+
+    def test_uses_wal_journal(self, database):
+        assert database.execute_query("PRAGMA journal_mode")[0]["journal_mode"] == "wal"
+
+    def test_insert_receipts_bulk(self, database, sample_receipt):
+        stats = database.insert_receipts(make_receipts(sample_receipt, 250), batch_size=100)
+
+        assert stats["receipts"] == 250
+        assert stats["items"] == 500
+        assert stats["rows_per_second"] > 0
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"] == 250
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipt_items")[0]["n"] == 500
+
+    def test_bulk_upsert_matches_single_insert(self, tmp_path, sample_receipt):
+        original = Receipt.from_dict(sample_receipt)
+        updated_data = copy.deepcopy(sample_receipt)
+        updated_data["payment"]["total"] = 99000
+        updated_data["items"] = updated_data["items"][:1]
+        updated = Receipt.from_dict(updated_data)
+
+        single = ReceiptDatabase(db_path=str(tmp_path / "single.db"))
+        single.insert_receipt(original)
+        single.insert_receipt(updated)
+
+        bulk = ReceiptDatabase(db_path=str(tmp_path / "bulk.db"))
+        bulk.insert_receipts([original])
+        bulk.insert_receipts([updated, original, updated])
+
+        query = """
+            SELECT r.transaction_id, r.payment_total, ri.item_name
+            FROM receipts AS r JOIN receipt_items AS ri ON r.id = ri.receipt_id
+            ORDER BY ri.item_name
+        """
+        assert single.execute_query(query) == bulk.execute_query(query)
+        assert bulk.execute_query("SELECT COUNT(*) AS n FROM receipt_items")[0]["n"] == 1
+        assert bulk.execute_query(query)[0]["payment_total"] == 99000
+
+    def test_summary_tables_track_upserts(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 3))
+        replaced = copy.deepcopy(sample_receipt)
+        replaced["transaction_id"] = "F-0000000000"
+        replaced["payment"]["total"] = 1000
+        replaced["items"] = replaced["items"][:1]
+        database.insert_receipt(Receipt.from_dict(replaced))
+
+        spend = database.execute_query("SELECT * FROM daily_platform_spend")
+        assert spend == [{"date": "2025-01-15", "platform": "GoFood", "receipt_count": 3, "total_spend": 67000 * 2 + 1000}]
+
+        items = database.execute_query("SELECT item_name, order_count, total_quantity FROM restaurant_item_stats ORDER BY item_name")
+        assert items == [
+            {"item_name": "Es Teh", "order_count": 2, "total_quantity": 2},
+            {"item_name": "Nasi Goreng", "order_count": 3, "total_quantity": 6},
+        ]
+
+    def test_item_stats_match_items_after_deletes_and_renames(self, database, sample_receipt):
+        receipts = make_receipts(sample_receipt, 6)
+        for i, receipt in enumerate(receipts):
+            receipt.restaurant.name = f"Warung {i % 3}"
+        database.insert_receipts(receipts)
+
+        database.execute_query("DELETE FROM receipts WHERE transaction_id = ?", ("F-0000000000",))
+        database.execute_query("DELETE FROM receipts WHERE restaurant_name = ?", ("Warung 1",))
+        database.execute_query("UPDATE receipts SET restaurant_name = ? WHERE transaction_id = ?", ("Warung 0", "F-0000000002"))
+        replaced = copy.deepcopy(sample_receipt)
+        replaced["transaction_id"] = "F-0000000003"
+        replaced["items"] = replaced["items"][:1]
+        database.insert_receipt(Receipt.from_dict(replaced))
+
+        stats = database.execute_query("""
+            SELECT restaurant_name, item_name, order_count, total_quantity, total_spend
+            FROM restaurant_item_stats ORDER BY restaurant_name, item_name
+        """)
+        expected = database.execute_query("""
+            SELECT r.restaurant_name, ri.item_name, COUNT(*) AS order_count, SUM(ri.quantity) AS total_quantity,
+                   SUM(COALESCE(ri.total_price, ri.quantity * ri.unit_price)) AS total_spend
+            FROM receipt_items AS ri JOIN receipts AS r ON r.id = ri.receipt_id
+            GROUP BY r.restaurant_name, ri.item_name ORDER BY r.restaurant_name, ri.item_name
+        """)
+        assert stats == expected
+        assert {row["restaurant_name"] for row in stats} == {"Warung 0", "Warung 2", sample_receipt["restaurant"]["name"]}
+
+    def test_migrates_existing_database(self, tmp_path, sample_receipt):
+        db_path = str(tmp_path / "legacy.db")
+        database = ReceiptDatabase(db_path=db_path)
+        database.insert_receipts(make_receipts(sample_receipt, 2))
+        # Roll the file back to the pre-migration schema
+        database.pool.write(lambda conn: conn.executescript("""
+            DROP TABLE daily_platform_spend;
+            DROP TABLE restaurant_item_stats;
+            DROP INDEX idx_receipt_items_receipt_id;
+            CREATE INDEX idx_transaction_id ON receipts(transaction_id);
+            PRAGMA user_version = 0;
+        """))
+        database.close()
+
+        migrated = ReceiptDatabase(db_path=db_path)
+
+        indexes = {row["name"] for row in migrated.execute_query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "idx_receipt_items_receipt_id" in indexes
+        assert "idx_transaction_id" not in indexes
+        assert migrated.execute_query("SELECT receipt_count FROM daily_platform_spend")[0]["receipt_count"] == 2
+        plan = migrated.execute_query("EXPLAIN QUERY PLAN SELECT * FROM receipt_items WHERE receipt_id = 1")
+        assert "idx_receipt_items_receipt_id" in plan[0]["detail"]
+        migrated.close()
+
+    def test_full_text_search_tracks_upserts(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 2))
+        replaced = copy.deepcopy(sample_receipt)
+        replaced["transaction_id"] = "F-0000000000"
+        replaced["items"] = replaced["items"][1:]
+        database.insert_receipt(Receipt.from_dict(replaced))
+
+        query = """
+            SELECT r.transaction_id, ri.item_name
+            FROM receipt_items_fts
+            JOIN receipt_items AS ri ON ri.id = receipt_items_fts.rowid
+            JOIN receipts AS r ON r.id = ri.receipt_id
+            WHERE receipt_items_fts MATCH ?
+        """
+        assert database.execute_query(query, ("cheese",)) == [{"transaction_id": "F-0000000001", "item_name": "Nasi Goreng"}]
+        assert len(database.execute_query(query, ("gor*",))) == 1
+        restaurants = database.execute_query("SELECT rowid FROM receipts_fts WHERE receipts_fts MATCH 'sudirman'")
+        assert len(restaurants) == 2
+
+        plan = database.execute_query("EXPLAIN QUERY PLAN SELECT rowid FROM receipt_items_fts WHERE receipt_items_fts MATCH 'cheese'")
+        assert "VIRTUAL TABLE INDEX" in plan[0]["detail"]
+        assert "FTS5" in database.get_schema()["receipt_items_fts"]["item_name"]
+
+    def test_modifying_queries_go_to_writer(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 2))
+
+        database.execute_query("DELETE FROM receipts WHERE transaction_id = ?", ("F-0000000000",))
+
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"] == 1
+
+    def test_concurrent_readers_and_writers(self, database, sample_receipt):
+        writers, readers, receipts_per_writer = 8, 16, 25
+        errors = []
+
+        def write(writer_id: int):
+            try:
+                for i in range(receipts_per_writer):
+                    data = copy.deepcopy(sample_receipt)
+                    data["transaction_id"] = f"W{writer_id}-{i}"
+                    if i % 2:
+                        database.insert_receipt(Receipt.from_dict(data))
+                    else:
+                        database.insert_receipts([Receipt.from_dict(data)])
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                for _ in range(50):
+                    count = database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"]
+                    assert 0 <= count <= writers * receipts_per_writer
+                    database.get_schema()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+        threads += [threading.Thread(target=read) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert database.execute_query("SELECT COUNT(*) AS n FROM receipts")[0]["n"] == writers * receipts_per_writer
+        assert database.execute_query("SELECT SUM(receipt_count) AS n FROM daily_platform_spend")[0]["n"] == writers * receipts_per_writer
+
+    def test_execute_query_row_cap(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 30))
+
+        assert len(database.execute_query("SELECT * FROM receipts", max_rows=10)) == 10
+        assert len(database.execute_query("SELECT * FROM receipts", max_rows=None)) == 30
+        assert len(database.execute_query("SELECT * FROM receipts")) == 30
+        assert len(database.query_dataframe("SELECT * FROM receipts")) == 30
+
+    def test_iter_query_and_pages(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 25))
+        query = "SELECT transaction_id FROM receipts ORDER BY transaction_id"
+
+        streamed = [row["transaction_id"] for row in database.iter_query(query, batch_size=7)]
+        pages = [database.query_page(query, page=page, page_size=10) for page in range(3)]
+
+        assert len(streamed) == 25
+        assert [len(page) for page in pages] == [10, 10, 5]
+        assert [row["transaction_id"] for page in pages for row in page] == streamed
+
+        descending = database.query_page("SELECT transaction_id FROM receipts ORDER BY transaction_id DESC;\n", page=1, page_size=10)
+        assert [row["transaction_id"] for row in descending] == streamed[::-1][10:20]
+
+    def test_query_dataframe(self, database, sample_receipt):
+        database.insert_receipts(make_receipts(sample_receipt, 5))
+
+        df = database.query_dataframe(
+            "SELECT * FROM receipts AS r JOIN receipt_items AS ri ON r.id = ri.receipt_id", max_rows=4
+        )
+
+        assert len(df) == 4
+        assert "id" in df.columns and "id_1" in df.columns
+        assert df["payment_total"].dtype.kind == "f"
@@ -0,0 +1,77 @@
+import fitz
+import pytest
+
+from src.utils import extract_text_from_pdf
+from src.extraction.batch import BatchReceiptExtractor
+from src.extraction.pdf import extract_pdf_content, iter_pdf_pages
+from tests.conftest import FakeOpenAIClient
+
+
+class RecordingClient(FakeOpenAIClient):
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return super().create(**kwargs)
+
+
+def make_pdf(pages: list[str | None]) -> bytes:
+    """Build a PDF where each entry is the page text, or None for a page with no text layer."""
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        if text is None:
+            page.draw_rect(fitz.Rect(50, 50, 200, 200), color=(0, 0, 0), fill=(0.5, 0.5, 0.5))
+        else:
+            page.insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestPdfExtraction:
+
+    def test_text_pages_are_not_rasterized(self):
+        content = extract_pdf_content(make_pdf(["GoFood receipt total Rp 69.000"]))
+
+        assert content.images == []
+        assert "GoFood receipt" in content.text
+        assert isinstance(content.payload, str)
+
+    def test_scanned_pages_are_rasterized(self):
+        content = extract_pdf_content(make_pdf([None]))
+
+        assert len(content.images) == 1
+        assert content.images[0].startswith(b"\x89PNG")
+        assert content.payload == content.images[0]
+
+    def test_every_scanned_page_is_sent(self):
+        scanned = extract_pdf_content(make_pdf([None, None, None]))
+        mixed = extract_pdf_content(make_pdf(["GoFood receipt page one header", None, "Total Rp 69.000 paid by GoPay", "Thanks for ordering with GoFood"]))
+
+        assert scanned.payload == scanned.images and len(scanned.images) == 3
+        assert [type(part) for part in mixed.payload] == [str, bytes, str]
+        assert "GoFood receipt" in mixed.payload[0]
+        assert "Total Rp 69.000" in mixed.payload[2] and "Thanks for ordering" in mixed.payload[2]
+
+        client = RecordingClient()
+        BatchReceiptExtractor(client, preprocess_images=False).extract_bytes(make_pdf(["GoFood receipt page one header", None, None]), is_pdf=True)
+
+        content = client.requests[0]["messages"][0]["content"]
+        assert [part["type"] for part in content] == ["text", "text", "image_url", "image_url"]
+
+    def test_parallel_extraction_preserves_page_order(self):
+        texts = [f"Statement page number {i} with enough text" for i in range(10)]
+        data = make_pdf(texts)
+
+        pages = list(iter_pdf_pages(data, max_workers=2, parallel_threshold=4, pages_per_task=3))
+
+        assert [page.index for page in pages] == list(range(10))
+        assert "".join(page.text for page in pages) == extract_text_from_pdf(data)
+
+    def test_invalid_pdf_raises(self):
+        with pytest.raises(Exception):
+            extract_pdf_content(b"not a pdf")
+        assert extract_text_from_pdf(b"not a pdf") is None
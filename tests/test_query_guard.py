@@ -0,0 +1,77 @@
+import copy
+import json
+
+import pytest
+
+from src.database.local_database import ReceiptDatabase
+from src.database.query_guard import GuardedQueryRunner, is_read_only_sql, normalize_sql
+from src.models.receipt import Receipt
+
+
+@pytest.fixture
+def database(tmp_path, sample_receipt):
+    database = ReceiptDatabase(db_path=str(tmp_path / "receipts.db"))
+    receipts = []
+    for i in range(300):
+        data = copy.deepcopy(sample_receipt)
+        data["transaction_id"] = f"F-{i:010d}"
+        receipts.append(Receipt.from_dict(data))
+    database.insert_receipts(receipts)
+    yield database
+    database.close()
+
+
+class TestGuardedQueryRunner:
+
+    def test_normalize_sql_keeps_literals(self):
+        assert normalize_sql("SELECT *\n  FROM receipts WHERE platform = 'GoFood';") == \
+            normalize_sql("select * from receipts   where platform = 'GoFood'")
+        assert normalize_sql("SELECT 'GoFood'") != normalize_sql("SELECT 'gofood'")
+
+    def test_writing_cte_is_not_read_only(self, database):
+        reading = "WITH recent (id) AS (SELECT id FROM receipts WHERE date > '2025-01-01 (delete)') SELECT COUNT(*) FROM recent"
+        writing = "WITH old AS (SELECT id FROM receipts ORDER BY id LIMIT 10) DELETE FROM receipts WHERE id IN (SELECT id FROM old)"
+
+        assert is_read_only_sql(normalize_sql(reading))
+        assert not is_read_only_sql(normalize_sql(writing))
+        assert not is_read_only_sql(normalize_sql("with recursive x(n) as (select 1) update receipts set time = ''"))
+
+        runner = GuardedQueryRunner(database)
+        runner.run(writing)
+        runner.run(writing)
+        assert runner.stats() == {"entries": 0, "hits": 0, "misses": 0}
+        assert json.loads(runner.run("SELECT COUNT(*) AS n FROM receipts"))["rows"][0]["n"] == 280
+
+    def test_truncates_large_results(self, database):
+        runner = GuardedQueryRunner(database, max_rows=50)
+
+        result = json.loads(runner.run("SELECT * FROM receipts"))
+
+        assert result["row_count"] == 50
+        assert result["truncated"] is True
+        assert "first 50 rows" in result["note"]
+
+    def test_cache_hits_until_next_write(self, database, sample_receipt):
+        runner = GuardedQueryRunner(database)
+        query = "SELECT COUNT(*) AS n FROM receipts"
+
+        first = runner.run(query)
+        second = runner.run("select count(*) as n from receipts;")
+        assert first == second
+        assert runner.stats()["hits"] == 1
+
+        data = dict(sample_receipt, transaction_id="F-new")
+        database.insert_receipt(Receipt.from_dict(data))
+
+        assert json.loads(runner.run(query))["rows"][0]["n"] == 301
+
+    def test_cartesian_join_is_cancelled(self, database):
+        runner = GuardedQueryRunner(database, time_limit=0.2)
+
+        result = json.loads(runner.run(
+            "SELECT COUNT(*) FROM receipt_items a, receipt_items b, receipt_items c"
+        ))
+
+        assert "time budget" in result["error"]
+        # The reader connection is still usable afterwards
+        assert json.loads(runner.run("SELECT 1 AS ok"))["rows"] == [{"ok": 1}]
@@ -0,0 +1,109 @@
+import json
+import asyncio
+
+import pytest
+from agents import RunConfig
+from agents.items import ModelResponse
+from agents.models.interface import Model, ModelProvider
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+)
+
+from src.chatbot.receipt_agent import build_receipt_agent, iter_agent_events, run_agent
+from src.database.local_database import ReceiptDatabase
+from src.database.query_guard import GuardedQueryRunner
+from src.models.receipt import Receipt
+
+
+class StubModel(Model):
+    """Calls run_query once, then streams a fixed answer word by word."""
+
+    def __init__(self, answer: str, query: str):
+        self.answer = answer
+        self.query = query
+        self.system_instructions = []
+
+    def _output(self, input):
+        has_tool_output = isinstance(input, list) and any(
+            isinstance(item, dict) and item.get("type") == "function_call_output" for item in input
+        )
+        if not has_tool_output:
+            return [ResponseFunctionToolCall(
+                type="function_call", call_id="call_1", name="run_query",
+                arguments=json.dumps({"query": self.query}), id="fc_1", status="completed",
+            )]
+        return [ResponseOutputMessage(
+            id="msg_1", role="assistant", status="completed", type="message",
+            content=[ResponseOutputText(text=self.answer, type="output_text", annotations=[])],
+        )]
+
+    async def get_response(self, system_instructions, input, *args, **kwargs):
+        self.system_instructions.append(system_instructions)
+        return ModelResponse(output=self._output(input), usage=Usage(), response_id=None)
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        self.system_instructions.append(system_instructions)
+        output = self._output(input)
+        sequence = 0
+        if isinstance(output[0], ResponseOutputMessage):
+            for word in self.answer.split(" "):
+                yield ResponseTextDeltaEvent(
+                    type="response.output_text.delta", item_id="msg_1", output_index=0,
+                    content_index=0, delta=word + " ", sequence_number=sequence, logprobs=[],
+                )
+                sequence += 1
+        response = Response(
+            id="resp_1", created_at=0, model="stub", object="response", output=output,
+            parallel_tool_calls=False, tool_choice="auto", tools=[],
+        )
+        yield ResponseCompletedEvent(type="response.completed", response=response, sequence_number=sequence)
+
+
+class StubModelProvider(ModelProvider):
+
+    def __init__(self, model: StubModel):
+        self.model = model
+
+    def get_model(self, model_name):
+        return self.model
+
+
+@pytest.fixture
+def database(tmp_path, sample_receipt):
+    database = ReceiptDatabase(db_path=str(tmp_path / "receipts.db"))
+    database.insert_receipt(Receipt.from_dict(sample_receipt))
+    yield database
+    database.close()
+
+
+class TestReceiptAgent:
+
+    def test_streams_text_and_tool_events(self, database):
+        model = StubModel("You have one receipt", "SELECT COUNT(*) AS n FROM receipts")
+        agent = build_receipt_agent(GuardedQueryRunner(database), database.get_schema())
+        run_config = RunConfig(model_provider=StubModelProvider(model), tracing_disabled=True)
+
+        events = list(iter_agent_events(agent, "How many receipts do I have?", run_config=run_config))
+
+        assert [event.type for event in events[:2]] == ["tool_call", "tool_output"]
+        assert json.loads(events[1].data)["rows"] == [{"n": 1}]
+        assert "".join(event.data for event in events if event.type == "text").strip() == "You have one receipt"
+
+    def test_prompt_prefix_is_stable(self, database):
+        model = StubModel("Done", "SELECT 1")
+        agent = build_receipt_agent(GuardedQueryRunner(database), database.get_schema())
+        run_config = RunConfig(model_provider=StubModelProvider(model), tracing_disabled=True)
+
+        answer = asyncio.run(run_agent(agent, "first question", run_config=run_config))
+        list(iter_agent_events(agent, "second question", run_config=run_config))
+
+        assert answer == "Done"
+        assert len(set(model.system_instructions)) == 1
+        assert "Current time" not in model.system_instructions[0]
+        assert "receipt_items" in model.system_instructions[0]
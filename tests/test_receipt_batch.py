@@ -0,0 +1,125 @@
+import copy
+import json
+
+import pytest
+
+from src.database.local_database import ReceiptDatabase
+from src.models.receipt import Receipt
+from src.models.receipt_batch import ReceiptBatch
+
+
+def make_records(sample_receipt: dict, count: int) -> list[dict]:
+    records = []
+    for i in range(count):
+        data = copy.deepcopy(sample_receipt)
+        data["transaction_id"] = f"F-{i:010d}"
+        data["platform"] = "GoFood" if i % 2 else "GrabFood"
+        data["items"] = data["items"][:1 + i % 2]
+        records.append(data)
+    return records
+
+
+class TestReceiptBatch:
+
+    def test_receipt_dataclasses_are_slotted(self, sample_receipt):
+        receipt = Receipt.from_dict(sample_receipt)
+
+        assert not hasattr(receipt, "__dict__")
+        assert not hasattr(receipt.items[0], "__dict__")
+        with pytest.raises(AttributeError):
+            receipt.unknown_field = 1
+
+    def test_matches_receipt_from_dict(self, sample_receipt):
+        records = make_records(sample_receipt, 5)
+        records[2]["additional_info"] = {"thank_you_message": "Thanks"}
+        records[3]["items"][0] = {"name": "Legacy", "quantity": 3, "price": 1000}
+        records[3]["payment"].pop("service_fee")
+
+        batch = ReceiptBatch.from_dicts(json.loads(json.dumps(records)))
+
+        assert len(batch) == 5
+        assert batch.item_count == 7
+        assert list(batch) == [Receipt.from_dict(record) for record in records]
+        assert batch.slice(3, 5).receipt(0) == Receipt.from_dict(records[3])
+
+    def test_insert_matches_receipt_objects(self, tmp_path, sample_receipt):
+        records = make_records(sample_receipt, 7)
+        # A later duplicate in the same batch replaces the earlier one
+        duplicate = copy.deepcopy(records[0])
+        duplicate["payment"]["total"] = 1000
+        records.append(duplicate)
+
+        objects = ReceiptDatabase(db_path=str(tmp_path / "objects.db"))
+        objects.insert_receipts([Receipt.from_dict(record) for record in records], batch_size=3)
+        columnar = ReceiptDatabase(db_path=str(tmp_path / "columnar.db"))
+        stats = columnar.insert_receipts(ReceiptBatch.from_dicts(records), batch_size=3)
+
+        query = """
+            SELECT r.transaction_id, r.payment_total, r.payment_service_fee, ri.item_name, ri.quantity, ri.notes
+            FROM receipts AS r JOIN receipt_items AS ri ON r.id = ri.receipt_id
+            ORDER BY r.transaction_id, ri.item_name
+        """
+        assert columnar.execute_query(query) == objects.execute_query(query)
+        assert columnar.execute_query("SELECT * FROM daily_platform_spend ORDER BY platform") == \
+            objects.execute_query("SELECT * FROM daily_platform_spend ORDER BY platform")
+        assert stats["receipts"] == 8
+        objects.close()
+        columnar.close()
+
+    def test_aggregations(self, sample_receipt):
+        batch = ReceiptBatch.from_dicts(make_records(sample_receipt, 4))
+
+        assert batch.spend_by("platform") == {"GrabFood": 67000 * 2, "GoFood": 67000 * 2}
+        assert batch.item_spend_by("item_name") == {"Nasi Goreng": 50000 * 4, "Es Teh": 5000 * 2}
+        assert batch.item_spend_by("platform") == {"GrabFood": 50000 * 2, "GoFood": 55000 * 2}
+
+    def test_null_fields(self, sample_receipt):
+        records = make_records(sample_receipt, 2)
+        records[0]["items"][0].update({"quantity": None, "unit_price": None, "total_price": None})
+        records[1]["payment"]["discount"] = None
+        records[1]["delivery"]["fee"] = None
+
+        batch = ReceiptBatch.from_dicts(records)
+
+        assert list(batch) == [Receipt.from_dict(record) for record in records]
+        assert batch.item_spend_by("item_name")["Nasi Goreng"] == 50000
+        assert batch.item_rows()[0][0][1:4] == (None, None, None)
+
+    def test_string_fields_insert_like_receipt_objects(self, tmp_path, sample_receipt):
+        records = make_records(sample_receipt, 3)
+        records[0]["items"][0].update({"quantity": "3", "total_price": None})
+        records[1]["items"][0].update({"quantity": "2", "unit_price": "25.000", "total_price": "50.000"})
+        records[1]["payment"]["total"] = "25.000"
+
+        batch = ReceiptBatch.from_dicts(records)
+
+        assert batch.receipt(1).items[0].quantity == 2
+        assert batch.receipt(1).payment.total == 25.0
+        assert batch.spend_by("transaction_id")["F-0000000001"] == 25.0
+
+        objects = ReceiptDatabase(db_path=str(tmp_path / "objects.db"))
+        objects.insert_receipts([Receipt.from_dict(record) for record in records])
+        columnar = ReceiptDatabase(db_path=str(tmp_path / "columnar.db"))
+        columnar.insert_receipts(batch)
+
+        query = """
+            SELECT r.transaction_id, r.payment_total, ri.item_name, ri.quantity, ri.unit_price, ri.total_price
+            FROM receipts AS r JOIN receipt_items AS ri ON r.id = ri.receipt_id
+            ORDER BY r.transaction_id, ri.item_name
+        """
+        assert columnar.execute_query(query) == objects.execute_query(query)
+        assert columnar.execute_query("SELECT * FROM restaurant_item_stats") == \
+            objects.execute_query("SELECT * FROM restaurant_item_stats")
+        objects.close()
+        columnar.close()
+
+    def test_idr_amount_text(self, sample_receipt):
+        record = copy.deepcopy(sample_receipt)
+        record["items"][0].update({"unit_price": "Rp 12.500", "total_price": "Rp12.500"})
+        record["payment"]["total"] = "not an amount"
+
+        receipt = ReceiptBatch.from_dicts([record]).receipt(0)
+
+        assert receipt.items[0].unit_price == 12500
+        assert receipt.items[0].total_price == 12500
+        assert receipt.payment.total is None
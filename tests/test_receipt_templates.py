@@ -0,0 +1,60 @@
+import pytest
+
+from src.utils import extract_text_from_pdf
+from src.extraction.templates import (
+    GoFoodReceiptParser,
+    TemplateParseError,
+    TemplateRegistry,
+    parse_amount,
+    validate_receipt,
+)
+
+
+SAMPLE_PDF = "data/receipt_samples/F-2948328713.pdf"
+
+
+@pytest.fixture
+def gofood_text() -> str:
+    with open(SAMPLE_PDF, "rb") as f:
+        return extract_text_from_pdf(f.read())
+
+
+class TestReceiptTemplates:
+
+    def test_parse_amount(self):
+        assert parse_amount("Rp75.300") == 75300
+        assert parse_amount("-Rp6.100") == -6100
+        assert parse_amount("Rp0") == 0
+
+    def test_gofood_parser(self, gofood_text):
+        receipt = GoFoodReceiptParser().parse(gofood_text)
+
+        assert receipt.platform == "GoFood"
+        assert receipt.transaction_id == "F-2948328713"
+        assert receipt.date == "2025-08-16"
+        assert receipt.restaurant.name == "SeIndonesia (Sei Sapi Dan Ayam), Kemang"
+        assert receipt.items[0].name == "#B1G1 Reguler Sei Sapi x Sei Ayam"
+        assert receipt.payment.total == 75300
+        assert receipt.payment.discount == 6100
+        assert receipt.delivery.driver_name == "Eka Santi Ambarsari"
+        assert receipt.delivery.address.startswith("Jalan Batang Agam , No. 1, Duren Tiga")
+
+    def test_validation_rejects_inconsistent_totals(self, gofood_text):
+        receipt = GoFoodReceiptParser().parse(gofood_text)
+        receipt.payment.total += 1000
+
+        with pytest.raises(TemplateParseError):
+            validate_receipt(receipt)
+
+    def test_registry_falls_back_when_no_parser_matches(self, gofood_text):
+        registry = TemplateRegistry([GoFoodReceiptParser()])
+
+        assert registry.parse(gofood_text) is not None
+        assert registry.parse("GrabFood receipt with an unknown layout") is None
+        assert registry.parse(gofood_text.replace("Total payment", "Grand total")) is None
+
+        stats = registry.stats()
+        assert stats["attempts"] == 3
+        assert stats["hits"] == {"gofood": 1}
+        assert stats["validation_failures"] == {"gofood": 1}
+        assert stats["hit_rate"] == pytest.approx(1 / 3)
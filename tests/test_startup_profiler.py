@@ -0,0 +1,64 @@
+from src.startup_profiler import (
+    StartupProfile,
+    ImportTiming,
+    check_regressions,
+    entry_point_imports,
+    parse_importtime,
+    profile_imports,
+)
+
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+startup-profiler: begin
+import time:       300 |        300 |     numpy._core
+import time:       200 |        500 |   numpy
+import time:      1000 |       1500 | src.models.receipt_batch
+import time:       250 |        250 | src.extraction.templates
+"""
+
+
+class TestStartupProfiler:
+
+    def test_parses_importtime_after_marker(self):
+        timings = parse_importtime(IMPORTTIME_OUTPUT)
+
+        assert [(timing.module, timing.depth) for timing in timings] == [
+            ("numpy._core", 2), ("numpy", 1), ("src.models.receipt_batch", 0), ("src.extraction.templates", 0),
+        ]
+        profile = StartupProfile("page.py", [], timings)
+        assert profile.total_ms == 1.75
+        assert profile.slowest(1)[0].module == "src.models.receipt_batch"
+
+    def test_entry_point_imports_are_top_level_only(self, tmp_path):
+        page = tmp_path / "page.py"
+        page.write_text("import os\nfrom src.utils import parse_receipt_response\n\ndef later():\n    import fitz\n")
+
+        assert entry_point_imports(str(page)) == ["os", "src.utils"]
+
+    def test_regression_threshold(self):
+        profiles = [
+            StartupProfile("fast.py", [], [ImportTiming("a", 100, 500, 0)]),
+            StartupProfile("slow.py", [], [ImportTiming("b", 100, 1500, 0)]),
+            StartupProfile("new.py", [], [ImportTiming("c", 100, 9000, 0)]),
+        ]
+
+        regressions = check_regressions(profiles, {"fast.py": 450, "slow.py": 1000}, threshold=0.25)
+
+        assert len(regressions) == 1 and regressions[0].startswith("slow.py")
+
+    def test_src_modules_defer_heavy_dependencies(self):
+        modules = [
+            "src.retriever.vector_search",
+            "src.vectorstore.qdrant_client",
+            "src.embeddings.openai_embedder",
+            "src.chatbot.receipt_agent",
+            "src.extraction.cache",
+            "src.extraction.pdf",
+            "src.utils",
+        ]
+        profile = profile_imports("src", modules)
+
+        assert profile.missing == []
+        loaded = {timing.module.split(".")[0] for timing in profile.timings}
+        assert loaded & {"langchain_openai", "qdrant_client", "agents", "openai", "fitz", "pandas"} == set()
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from src.vectorstore.custom_vectordb import CustomVectorDB
+from src.vectorstore.dedup import VectorDeduplicator
+from src.vectorstore.qdrant_client import Qdrant
+
+
+def random_vectors(count: int, dimension: int = 64, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension))
+
+
+def near_copies(vectors: np.ndarray, noise: float = 0.01, seed: int = 1) -> np.ndarray:
+    return vectors + noise * np.random.default_rng(seed).standard_normal(vectors.shape)
+
+
+class TestVectorDeduplicator:
+
+    def test_skip_prevents_duplicates(self, tmp_path):
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"), dedup=VectorDeduplicator(policy="skip"))
+        vectors = random_vectors(200)
+        ids = store.add_vectors(vectors.tolist(), [{"n": i} for i in range(200)])
+
+        duplicate_ids = store.add_vectors(near_copies(vectors[:50]).tolist(), [{"copy": i} for i in range(50)])
+
+        assert duplicate_ids == ids[:50]
+        assert store.count_documents() == 200
+        assert store.get_document_by_id(ids[0])["payload"] == {"n": 0}
+        assert store.dedup.stats()["skipped"] == 50
+
+    def test_distinct_vectors_are_kept(self, tmp_path):
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"), dedup=VectorDeduplicator())
+
+        store.add_vectors(random_vectors(300).tolist())
+        store.add_vectors(random_vectors(300, seed=2).tolist())
+
+        assert store.count_documents() == 600
+        assert store.dedup.stats()["duplicates"] == 0
+
+    def test_merge_and_replace_keep_ids(self, tmp_path):
+        vector = random_vectors(1)[0]
+        copy = near_copies(vector[None])[0]
+
+        merging = CustomVectorDB(filepath=str(tmp_path / "merge.csv"), dedup=VectorDeduplicator(policy="merge"))
+        [doc_id] = merging.add_vectors([vector.tolist()], [{"source": "a.pdf", "page": 1}])
+        assert merging.add_vectors([copy.tolist()], [{"page": 2}]) == [doc_id]
+        assert merging.get_document_by_id(doc_id)["payload"] == {"source": "a.pdf", "page": 2}
+        assert merging.get_document_by_id(doc_id)["vector"] == vector.tolist()
+
+        replacing = CustomVectorDB(filepath=str(tmp_path / "replace.csv"), dedup=VectorDeduplicator(policy="replace"))
+        [doc_id] = replacing.add_vectors([vector.tolist()], [{"version": 1}])
+        assert replacing.add_vectors([copy.tolist()], [{"version": 2}]) == [doc_id]
+        assert replacing.get_document_by_id(doc_id)["vector"] == copy.tolist()
+        assert replacing.count_documents() == 1
+
+    def test_duplicates_within_batch_and_after_reload(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        vectors = random_vectors(10)
+        store = CustomVectorDB(filepath=filepath, dedup=VectorDeduplicator())
+        ids = store.add_vectors(np.vstack([vectors, vectors]).tolist())
+        assert ids[10:] == ids[:10]
+
+        reloaded = CustomVectorDB(filepath=filepath, dedup=VectorDeduplicator())
+        assert reloaded.add_vectors(near_copies(vectors).tolist()) == ids[:10]
+        assert reloaded.count_documents() == 10
+
+        reloaded.delete_vectors(ids[:1])
+        assert reloaded.add_vectors(vectors[:1].tolist()) != ids[:1]
+
+    def test_match_deleted_before_ingest_is_no_match(self):
+        vector = random_vectors(1)[0]
+        dedup = VectorDeduplicator(policy="merge")
+        dedup.deduplicate(["original"], [vector.tolist()], [{}], lambda ids: {})
+        stored = {"original": {"vector": vector.tolist(), "payload": {}}}
+
+        def get_documents(ids):
+            found = {doc_id: stored[doc_id] for doc_id in ids if doc_id in stored}
+            # Another writer deletes the match right after it was compared
+            stored.clear()
+            return found
+
+        [decision] = dedup.deduplicate(["copy"], [near_copies(vector[None])[0].tolist()], [{}], get_documents)
+
+        assert (decision.action, decision.id) == ("insert", "copy")
+        assert dedup.stats()["duplicates"] == 0
+
+    def test_candidates_are_sublinear(self):
+        dedup = VectorDeduplicator()
+        vectors = random_vectors(5000)
+        dedup.add(list(range(5000)), vectors.tolist())
+
+        keys = dedup.bucket_keys(random_vectors(100, seed=3))
+        candidate_counts = [len(dedup._candidates(row)) for row in keys]
+
+        assert np.mean(candidate_counts) < 100
+
+    def test_qdrant_skip(self):
+        qdrant = Qdrant(collection_name="dedup_test", vector_size=64, dedup=VectorDeduplicator())
+        qdrant.client = QdrantClient(location=":memory:")
+        qdrant.setup()
+        vectors = random_vectors(20)
+
+        qdrant.add_vectors(vectors.tolist())
+        qdrant.add_vectors(near_copies(vectors).tolist())
+
+        assert len(qdrant.list_all_documents()) == 20
+        assert qdrant.dedup.stats()["skipped"] == 20
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            VectorDeduplicator(policy="drop")
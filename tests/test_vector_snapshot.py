@@ -0,0 +1,148 @@
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from src.vectorstore.custom_vectordb import CustomVectorDB
+from src.vectorstore.qdrant_client import Qdrant
+from src.vectorstore.snapshot import ORIGINAL_ID_KEY, SnapshotReader, migrate_vector_store, point_id
+
+
+def make_store(tmp_path, name: str, count: int = 0, dimension: int = 8) -> CustomVectorDB:
+    store = CustomVectorDB(filepath=str(tmp_path / name / "vectors.csv"))
+    if count:
+        rng = np.random.default_rng(0)
+        ids = [str(uuid.uuid4()) for _ in range(count)]
+        store.upsert_documents(ids, rng.random((count, dimension)).tolist(), [{"content": f"doc {i}"} for i in range(count)])
+    return store
+
+
+def make_qdrant(dimension: int = 8) -> Qdrant:
+    qdrant = Qdrant(collection_name="snapshot_test", vector_size=dimension)
+    qdrant.client = QdrantClient(location=":memory:")
+    qdrant.setup()
+    return qdrant
+
+
+def unit(vector):
+    return None if vector is None else np.asarray(vector) / np.linalg.norm(vector)
+
+
+def assert_same_documents(a, b):
+    documents_a = {doc["id"]: doc for doc in a.list_all_documents()}
+    documents_b = {doc["id"]: doc for doc in b.list_all_documents()}
+    assert documents_a.keys() == documents_b.keys()
+    for doc_id, doc in documents_a.items():
+        assert documents_b[doc_id]["payload"] == doc["payload"]
+        if doc["vector"] is None:
+            assert documents_b[doc_id]["vector"] is None
+        else:
+            # Qdrant stores cosine vectors normalized, so compare directions
+            np.testing.assert_allclose(unit(documents_b[doc_id]["vector"]), unit(doc["vector"]), rtol=1e-5)
+
+
+class TestVectorSnapshot:
+
+    def test_round_trip_keeps_ids(self, tmp_path):
+        source = make_store(tmp_path, "source", count=25)
+        source.upsert_documents(["no-vector"], [None], [{"content": "empty"}])
+
+        manifest = source.export_snapshot(str(tmp_path / "snapshot"), chunk_size=10)
+        target = make_store(tmp_path, "target")
+        imported = target.import_snapshot(str(tmp_path / "snapshot"), batch_size=4)
+
+        assert manifest["count"] == 26
+        assert len(manifest["chunks"]) == 3
+        assert imported == 26
+        assert target.get_document_by_id("no-vector")["vector"] is None
+        assert_same_documents(source, target)
+
+    def test_migrates_through_qdrant_past_first_page(self, tmp_path):
+        source = make_store(tmp_path, "source", count=1200)
+        qdrant = make_qdrant()
+
+        migrate_vector_store(source, qdrant, str(tmp_path / "to_qdrant"), chunk_size=500)
+        assert len(qdrant.list_all_documents()) == 1200
+
+        target = make_store(tmp_path, "target")
+        migrate_vector_store(qdrant, target, str(tmp_path / "from_qdrant"), chunk_size=500)
+        assert_same_documents(source, target)
+
+    def test_migrates_unsupported_ids_and_missing_vectors_to_qdrant(self, tmp_path):
+        source = make_store(tmp_path, "source", count=3)
+        kept_id = source.list_all_documents()[0]["id"]
+        source.upsert_documents(["receipt-7", "no-vector"], [[0.5] * 8, None], [{"content": "named"}, {"content": "empty"}])
+        qdrant = make_qdrant()
+
+        imported = migrate_vector_store(source, qdrant, str(tmp_path / "to_qdrant"), chunk_size=2)
+
+        documents = {doc["id"]: doc for doc in qdrant.list_all_documents()}
+        assert imported == 4
+        assert len(documents) == 4
+        assert kept_id in documents and ORIGINAL_ID_KEY not in documents[kept_id]["payload"]
+        assert documents[point_id("receipt-7")]["payload"] == {"content": "named", ORIGINAL_ID_KEY: "receipt-7"}
+        assert point_id("no-vector") not in documents
+        assert point_id("receipt-7") == point_id("receipt-7") != point_id("receipt-8")
+        assert point_id(42) == 42
+
+    def test_export_resumes_after_failure(self, tmp_path, monkeypatch):
+        source = make_store(tmp_path, "source", count=30)
+        scroll = source.scroll_documents
+        calls = []
+
+        def failing_scroll(limit, offset=None):
+            calls.append(offset)
+            if len(calls) == 3:
+                raise ConnectionError("simulated failure")
+            return scroll(limit, offset)
+
+        monkeypatch.setattr(source, "scroll_documents", failing_scroll)
+        with pytest.raises(ConnectionError):
+            source.export_snapshot(str(tmp_path / "snapshot"), chunk_size=10)
+        calls.clear()
+
+        manifest = source.export_snapshot(str(tmp_path / "snapshot"), chunk_size=10)
+
+        assert calls == [20]
+        assert manifest["count"] == 30
+        assert SnapshotReader(str(tmp_path / "snapshot")).count == 30
+
+    def test_import_resumes_from_checkpoint(self, tmp_path, monkeypatch):
+        source = make_store(tmp_path, "source", count=30)
+        source.export_snapshot(str(tmp_path / "snapshot"), chunk_size=10)
+        target = make_store(tmp_path, "target")
+        upsert = target.upsert_documents
+        imported_ids = []
+
+        def failing_upsert(ids, vectors, payloads):
+            if len(imported_ids) == 20:
+                raise ConnectionError("simulated failure")
+            imported_ids.extend(ids)
+            upsert(ids, vectors, payloads)
+
+        monkeypatch.setattr(target, "upsert_documents", failing_upsert)
+        with pytest.raises(ConnectionError):
+            target.import_snapshot(str(tmp_path / "snapshot"), batch_size=10)
+        monkeypatch.setattr(target, "upsert_documents", upsert)
+
+        assert target.import_snapshot(str(tmp_path / "snapshot"), batch_size=10) == 10
+        assert_same_documents(source, target)
+
+    def test_incomplete_snapshot_is_rejected(self, tmp_path, monkeypatch):
+        source = make_store(tmp_path, "source", count=5)
+        scroll = source.scroll_documents
+
+        def failing_scroll(limit, offset=None):
+            if offset:
+                raise ConnectionError("simulated failure")
+            return scroll(limit, offset)
+
+        monkeypatch.setattr(source, "scroll_documents", failing_scroll)
+        with pytest.raises(ConnectionError):
+            source.export_snapshot(str(tmp_path / "snapshot"), chunk_size=2)
+
+        with pytest.raises(ValueError):
+            make_store(tmp_path, "target").import_snapshot(str(tmp_path / "snapshot"))
+        with pytest.raises(ValueError):
+            SnapshotReader(str(tmp_path / "missing"))
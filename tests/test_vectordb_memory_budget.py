@@ -0,0 +1,64 @@
+import numpy as np
+
+from src.vectorstore import custom_vectordb, vector_index
+from src.vectorstore.custom_vectordb import CustomVectorDB
+from src.vectorstore.document_cache import DocumentTable
+
+
+def random_vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension))
+
+
+class TestMemoryBudget:
+
+    def test_budgeted_search_matches_unbudgeted(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(vector_index, "SCAN_ROWS", 16)
+        vectors = random_vectors(300)
+        payloads = [{"n": i} for i in range(300)]
+        full = CustomVectorDB(filepath=str(tmp_path / "full.csv"))
+        budgeted = CustomVectorDB(filepath=str(tmp_path / "budgeted.csv"), memory_budget=64 * 1024)
+        full_ids = full.add_vectors(vectors.tolist(), payloads)
+        budgeted_ids = budgeted.add_vectors(vectors.tolist(), payloads)
+
+        assert budgeted.memory_usage()["vectors_mapped"] > 0
+        for query in random_vectors(5, seed=1):
+            expected = [full_ids.index(result["id"]) for result in full.search_vectors(query.tolist(), top_k=10)]
+            results = budgeted.search_vectors(query.tolist(), top_k=10)
+            assert [budgeted_ids.index(result["id"]) for result in results] == expected
+            assert [result["payload"]["n"] for result in results] == expected
+
+    def test_evicted_documents_are_read_back(self, tmp_path):
+        budget = 64 * 1024
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"), memory_budget=budget)
+        vectors = random_vectors(300)
+        ids = store.add_vectors(vectors.tolist(), [{"n": i} for i in range(300)])
+
+        assert isinstance(store.documents, DocumentTable)
+        for n in (0, 150, 299, 0):
+            document = store.get_document_by_id(ids[n])
+            assert document["payload"] == {"n": n}
+            assert np.allclose(document["vector"], vectors[n])
+
+        usage = store.memory_usage()
+        assert usage["document_cache"]["misses"] > 0
+        assert usage["documents_cached"] <= budget - budget // 2
+        assert usage["budget"] == budget
+        assert len(store.list_all_documents()) == 300
+
+    def test_reload_delete_and_compaction_under_budget(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(custom_vectordb, "LOAD_BLOCK_BYTES", 4096)
+        filepath = str(tmp_path / "vectors.csv")
+        store = CustomVectorDB(filepath=filepath, memory_budget=64 * 1024, compact_min_rows=10)
+        vectors = random_vectors(200)
+        ids = store.add_vectors(vectors.tolist(), [{"n": i} for i in range(200)])
+        store.delete_vectors(ids[:40])
+
+        reopened = CustomVectorDB(filepath=filepath, memory_budget=64 * 1024)
+        assert reopened.count_documents() == 160
+        assert reopened.get_document_by_id(ids[120])["payload"] == {"n": 120}
+
+        store.delete_vectors(ids[40:70])
+        assert store.compactions == 1
+        assert store.stats()["rows"] == 130
+        assert store.search_vectors(vectors[150].tolist(), top_k=1)[0]["id"] == ids[150]
+        assert store.get_document_by_id(ids[199])["payload"] == {"n": 199}
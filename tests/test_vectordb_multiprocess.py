@@ -0,0 +1,83 @@
+import multiprocessing
+
+import numpy as np
+
+from src.vectorstore.custom_vectordb import CustomVectorDB
+
+
+def random_vectors(count: int, dimension: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension))
+
+
+def add_in_batches(filepath: str, seed: int, batches: int, batch_size: int):
+    store = CustomVectorDB(filepath=filepath)
+    for batch in range(batches):
+        vectors = random_vectors(batch_size, seed=seed * 1000 + batch)
+        store.add_vectors(vectors.tolist(), [{"worker": seed, "batch": batch}] * batch_size)
+
+
+class TestSharedVectorDB:
+
+    def test_reader_picks_up_appends_and_deletes(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        writer = CustomVectorDB(filepath=filepath)
+        vectors = random_vectors(20)
+        ids = writer.add_vectors(vectors[:10].tolist())
+
+        reader = CustomVectorDB(filepath=filepath)
+        assert reader.count_documents() == 10
+        generation = reader.generation
+
+        new_ids = writer.add_vectors(vectors[10:].tolist())
+        writer.delete_vectors(ids[:4])
+
+        assert reader.search_vectors(vectors[15].tolist(), top_k=1)[0]["id"] == new_ids[5]
+        assert reader.count_documents() == 16
+        assert reader.get_document_by_id(ids[0]) is None
+        # Caught up from the appended bytes, not a reload
+        assert reader.generation == generation
+        assert reader.stats()["rows"] == 20
+
+    def test_reader_reloads_after_compaction(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        writer = CustomVectorDB(filepath=filepath, compact_min_rows=5)
+        vectors = random_vectors(20)
+        ids = writer.add_vectors(vectors.tolist())
+        reader = CustomVectorDB(filepath=filepath)
+
+        writer.delete_vectors(ids[:10])
+        assert writer.compactions == 1
+
+        assert reader.count_documents() == 10
+        assert reader.generation == writer.generation
+        assert reader.search_vectors(vectors[12].tolist(), top_k=1)[0]["id"] == ids[12]
+
+    def test_writers_catch_up_before_writing(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        first = CustomVectorDB(filepath=filepath)
+        second = CustomVectorDB(filepath=filepath)
+
+        first_ids = first.add_vectors(random_vectors(5).tolist())
+        second_ids = second.add_vectors(random_vectors(5, seed=1).tolist())
+        # Row numbers in tombstones must match rows the other writer appended
+        first.delete_vectors(second_ids[:2])
+
+        reloaded = CustomVectorDB(filepath=filepath)
+        assert set(reloaded.documents) == set(first_ids) | set(second_ids[2:])
+
+    def test_concurrent_processes_lose_no_writes(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        CustomVectorDB(filepath=filepath).setup()
+
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=add_in_batches, args=(filepath, seed, 5, 10)) for seed in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=120)
+            assert process.exitcode == 0
+
+        store = CustomVectorDB(filepath=filepath)
+        assert store.count_documents() == 150
+        for seed in range(3):
+            assert sum(doc["payload"]["worker"] == seed for doc in store.documents.values()) == 50
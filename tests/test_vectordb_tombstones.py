@@ -0,0 +1,101 @@
+import threading
+
+import numpy as np
+
+from src.vectorstore.custom_vectordb import CustomVectorDB
+
+
+def random_vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dimension))
+
+
+class TestTombstones:
+
+    def test_deleted_documents_are_not_returned(self, tmp_path):
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"))
+        vectors = random_vectors(50)
+        ids = store.add_vectors(vectors.tolist(), [{"n": i} for i in range(50)])
+
+        assert store.search_vectors(vectors[3].tolist(), top_k=1)[0]["id"] == ids[3]
+        store.delete_vectors([ids[3]])
+
+        results = store.search_vectors(vectors[3].tolist(), top_k=50)
+        assert ids[3] not in [result["id"] for result in results]
+        assert len(results) == 49
+        assert store.count_documents() == 49
+
+    def test_deletes_append_tombstones_instead_of_rewriting(self, tmp_path):
+        filepath = tmp_path / "vectors.csv"
+        store = CustomVectorDB(filepath=str(filepath))
+        ids = store.add_vectors(random_vectors(20).tolist())
+        contents = filepath.read_text()
+
+        store.delete_vectors(ids[:5])
+
+        assert filepath.read_text() == contents
+        assert len((tmp_path / "vectors.csv.tombstones").read_text().splitlines()) == 5
+        assert store.stats()["dead"] == 5
+
+    def test_reload_applies_tombstones_and_later_rows(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        store = CustomVectorDB(filepath=filepath)
+        vectors = random_vectors(10)
+        ids = store.add_vectors(vectors.tolist())
+        store.delete_vectors(ids[:3])
+        store.upsert_documents([ids[5]], [vectors[0].tolist()], [{"updated": True}])
+        # Re-adding a deleted id appends a new row that its old tombstone must not hide
+        store.upsert_documents([ids[0]], [vectors[0].tolist()], [{"back": True}])
+
+        reloaded = CustomVectorDB(filepath=filepath)
+
+        assert reloaded.count_documents() == 8
+        assert reloaded.get_document_by_id(ids[1]) is None
+        assert reloaded.get_document_by_id(ids[0])["payload"] == {"back": True}
+        assert reloaded.get_document_by_id(ids[5])["payload"] == {"updated": True}
+        assert reloaded.stats()["dead"] == 4
+        top = reloaded.search_vectors(vectors[0].tolist(), top_k=2)
+        assert {result["id"] for result in top} == {ids[0], ids[5]}
+
+    def test_compaction_past_threshold(self, tmp_path):
+        filepath = str(tmp_path / "vectors.csv")
+        store = CustomVectorDB(filepath=filepath, compact_threshold=0.3, compact_min_rows=10)
+        vectors = random_vectors(100)
+        ids = store.add_vectors(vectors.tolist(), [{"n": i} for i in range(100)])
+
+        store.delete_vectors(ids[:30])
+        assert store.compactions == 0
+        store.delete_vectors(ids[30:31])
+
+        assert store.compactions == 1
+        assert store.stats() == {"rows": 69, "live": 69, "dead": 0, "dead_fraction": 0.0, "compactions": 1, "generation": 2}
+        assert not (tmp_path / "vectors.csv.tombstones").exists()
+        assert store.search_vectors(vectors[50].tolist(), top_k=1)[0]["id"] == ids[50]
+
+        reloaded = CustomVectorDB(filepath=filepath)
+        assert reloaded.count_documents() == 69
+        assert reloaded.get_document_by_id(ids[99])["payload"] == {"n": 99}
+
+    def test_search_during_deletes_and_compaction(self, tmp_path):
+        store = CustomVectorDB(filepath=str(tmp_path / "vectors.csv"), compact_min_rows=20)
+        vectors = random_vectors(400)
+        ids = store.add_vectors(vectors.tolist())
+        errors = []
+
+        def search():
+            try:
+                for i in range(200):
+                    # Kept documents are never deleted, so each must still find itself
+                    assert store.search_vectors(vectors[200 + i].tolist(), top_k=1)[0]["id"] == ids[200 + i]
+            except Exception as e:
+                errors.append(e)
+
+        reader = threading.Thread(target=search)
+        reader.start()
+        for start in range(0, 200, 10):
+            store.delete_vectors(ids[start:start + 10])
+        reader.join()
+
+        assert store.compactions >= 1
+        assert store.count_documents() == 200
+        assert errors == []
+        assert store.search_vectors(vectors[300].tolist(), top_k=1)[0]["id"] == ids[300]